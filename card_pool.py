@@ -0,0 +1,221 @@
+"""
+卡池文件：开包模拟器与卡组构建器之间交换卡池的紧凑格式
+
+生成Excel抽卡报告时，同时在旁边写一份卡池文件（与报告同名，后缀为 .pool.parquet 或
+.pool.jsonl）。卡池文件按列保存原始字段（dbfId、法力值、攻击力、生命值、种族、
+符文等保持原有类型，稀有度、职业等保存代码而不是中文名称），卡组构建器导入时
+优先读取它，不需要解析Excel再把字符串转换回来。
+
+安装了 pyarrow 时写 Parquet，否则写 JSONL：第一行为列名，其余每行是一张卡牌的值数组。
+"""
+
+import json
+import os
+
+from config import (CLASS_NAMES, RARITY_NAMES, SET_NAMES, CARD_TYPE_NAMES,
+                    RACE_TRANSLATIONS, SPELL_SCHOOL_TRANSLATIONS)
+
+POOL_FORMAT = "hs-card-pool"
+POOL_VERSION = 1
+PARQUET_SUFFIX = ".pool.parquet"
+JSONL_SUFFIX = ".pool.jsonl"
+
+# 卡池文件的列（沿用 HearthstoneJSON 的字段名）
+POOL_COLUMNS = ['dbfId', 'id', 'name', 'cardClass', 'set', 'rarity', 'cost', 'type',
+                'attack', 'health', 'races', 'spellSchool', 'runeCost', 'count', 'text']
+RUNE_KEYS = ('blood', 'frost', 'unholy')
+
+
+def format_attack_health(card):
+    """随从的 "攻击力/生命值"，其余卡牌为空字符串"""
+    if card.get('type') != 'MINION':
+        return ""
+    return f"{card.get('attack') or 0}/{card.get('health') or 0}"
+
+
+def format_race_type(card):
+    """随从的种族或法术的派系（中文），没有时为空字符串"""
+    card_type = card.get('type')
+    if card_type == 'MINION' and card.get('races'):
+        return '、'.join(RACE_TRANSLATIONS.get(race, race) for race in card['races'])
+    if card_type == 'SPELL' and card.get('spellSchool'):
+        return SPELL_SCHOOL_TRANSLATIONS.get(card['spellSchool'], card['spellSchool'])
+    return ""
+
+
+def format_description(card):
+    """去掉粗体/斜体标签的卡牌描述，有符文消耗时在开头加上 "符文：..." """
+    description = card.get('text') or ''
+    description = description.replace('<b>', '').replace('</b>', '')
+    description = description.replace('<i>', '').replace('</i>', '')
+
+    rune_cost = card.get('runeCost')
+    if rune_cost:
+        rune_text = []
+        if rune_cost.get('blood', 0) > 0:
+            rune_text.append(f"{rune_cost['blood']} 红")
+        if rune_cost.get('frost', 0) > 0:
+            rune_text.append(f"{rune_cost['frost']} 蓝")
+        if rune_cost.get('unholy', 0) > 0:
+            rune_text.append(f"{rune_cost['unholy']} 绿")
+        if rune_text:
+            description = f"符文：{', '.join(rune_text)}。\n{description}"
+    return description
+
+
+def pool_file_path(report_path, suffix):
+    """报告对应的卡池文件路径"""
+    return os.path.splitext(report_path)[0] + suffix
+
+
+def find_pool_file(report_path):
+    """
+    查找报告旁边的卡池文件
+
+    Excel报告比卡池文件新（例如手动编辑过）时以Excel为准，返回None
+
+    Returns:
+        str 或 None: 卡池文件路径
+    """
+    if report_path.endswith((PARQUET_SUFFIX, JSONL_SUFFIX)):
+        return report_path if os.path.exists(report_path) else None
+    for suffix in (PARQUET_SUFFIX, JSONL_SUFFIX):
+        path = pool_file_path(report_path, suffix)
+        if os.path.exists(path):
+            if os.path.exists(report_path) and os.path.getmtime(report_path) > os.path.getmtime(path):
+                return None
+            return path
+    return None
+
+
+def _pool_values(card):
+    """一张卡牌在卡池文件中的一行值（按 POOL_COLUMNS 顺序）"""
+    rune_cost = card.get('runeCost')
+    if rune_cost:
+        rune_cost = {key: int(rune_cost.get(key, 0)) for key in RUNE_KEYS}
+    return [
+        card.get('dbfId'),
+        card.get('id', ''),
+        card.get('name', '未知卡牌'),
+        card.get('cardClass', 'NEUTRAL'),
+        card.get('set', ''),
+        card.get('rarity', 'COMMON'),
+        card.get('cost', 0),
+        card.get('type', ''),
+        card.get('attack'),
+        card.get('health'),
+        list(card.get('races') or []),
+        card.get('spellSchool'),
+        rune_cost or None,
+        card.get('count', 1),
+        card.get('text', ''),
+    ]
+
+
+def write_pool_file(report_path, cards_by_class):
+    """
+    在报告旁边写卡池文件（先写临时文件再替换，避免留下写了一半的文件）
+
+    Args:
+        report_path: 报告文件路径
+        cards_by_class: {职业: [带 count 字段的卡牌信息]}
+
+    Returns:
+        str: 卡池文件路径
+    """
+    rows = [_pool_values(card) for cards in cards_by_class.values() for card in cards]
+    try:
+        import pyarrow
+    except ImportError:
+        pyarrow = None
+
+    if pyarrow is not None:
+        path = pool_file_path(report_path, PARQUET_SUFFIX)
+        _write_parquet(path + ".tmp", rows)
+    else:
+        path = pool_file_path(report_path, JSONL_SUFFIX)
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'format': POOL_FORMAT, 'version': POOL_VERSION,
+                                'columns': POOL_COLUMNS}, ensure_ascii=False))
+            f.write('\n')
+            for values in rows:
+                f.write(json.dumps(values, ensure_ascii=False, separators=(',', ':')))
+                f.write('\n')
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def _write_parquet(path, rows):
+    """按 POOL_COLUMNS 的类型写 Parquet"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('dbfId', pa.int32()),
+        ('id', pa.string()),
+        ('name', pa.string()),
+        ('cardClass', pa.string()),
+        ('set', pa.string()),
+        ('rarity', pa.string()),
+        ('cost', pa.int16()),
+        ('type', pa.string()),
+        ('attack', pa.int16()),
+        ('health', pa.int16()),
+        ('races', pa.list_(pa.string())),
+        ('spellSchool', pa.string()),
+        ('runeCost', pa.struct([(key, pa.int8()) for key in RUNE_KEYS])),
+        ('count', pa.int32()),
+        ('text', pa.string()),
+    ])
+    columns = list(zip(*rows)) if rows else [[] for _ in POOL_COLUMNS]
+    table = pa.Table.from_arrays([pa.array(list(column), type=field.type)
+                                  for column, field in zip(columns, schema)], schema=schema)
+    pq.write_table(table, path)
+
+
+def read_pool_file(path):
+    """
+    读取卡池文件
+
+    Returns:
+        list: 卡牌信息字典列表（字段见 POOL_COLUMNS）
+    """
+    if path.endswith(PARQUET_SUFFIX):
+        import pyarrow.parquet as pq
+        return pq.read_table(path).to_pylist()
+
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('format') != POOL_FORMAT:
+            raise ValueError(f"不是卡池文件：{path}")
+        if header.get('version', 0) > POOL_VERSION:
+            raise ValueError(f"不支持的卡池文件版本：{header.get('version')}")
+        columns = header['columns']
+        return [dict(zip(columns, json.loads(line))) for line in f if line.strip()]
+
+
+def deck_builder_card(card):
+    """
+    把卡池中的一张卡牌转换为卡组构建器使用的卡牌信息（中文显示字段，与Excel报告一致），
+    并保留 dbfId 和卡牌ID
+
+    名称和职业去掉首尾空白（与读取Excel报告相同），名称为空的卡牌由调用方跳过
+    """
+    card_class = card.get('cardClass') or 'NEUTRAL'
+    card_set = card.get('set') or ''
+    rarity = card.get('rarity') or 'COMMON'
+    card_type = card.get('type') or ''
+    return {
+        'name': (card.get('name') or '').strip(),
+        'count': card.get('count') or 1,
+        'class': CLASS_NAMES.get(card_class, card_class).strip(),
+        'set': SET_NAMES.get(card_set, card_set) or "未知",
+        'rarity': RARITY_NAMES.get(rarity, rarity),
+        'cost': card.get('cost') or 0,
+        'type': CARD_TYPE_NAMES.get(card_type, card_type) or "未知",
+        'description': format_description(card),
+        'attack_health': format_attack_health(card),
+        'race_type': format_race_type(card),
+        'dbfId': card.get('dbfId'),
+        'id': card.get('id', ''),
+    }
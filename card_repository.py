@@ -0,0 +1,150 @@
+"""
+进程内共享的卡牌数据仓库
+
+开包模拟器、报告生成器、卡组构建器都通过 CardRepository.instance() 获取卡牌数据。
+卡牌保存在 SQLite 卡牌数据库（card_store）中，按扩展包、职业、稀有度、法力值、dbfId
+和名称建有索引，查询时只读取需要的卡牌；数据库由数据管理器生成，旧版本下载的数据
+（只有JSON文件）会在首次使用时转换一次。数据更新后调用 reset_instance()，下次使用时重新打开。
+"""
+
+import json
+import os
+import threading
+
+from config import DATA_PATH, CARD_JSON_DIR, CARD_STORE_PATH
+from card_store import CardStore, write_card_store
+
+
+class CardRepository:
+    """卡牌数据仓库
+
+    数据库不存在或比 HearthstoneJSON 的完整数据 cards_complete.json 旧时，由它重新生成；
+    没有 cards_complete.json 时退回到分类目录中的 all_collectible_cards.json（只有可收藏卡牌）。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, json_dir=CARD_JSON_DIR, data_path=DATA_PATH, store_path=CARD_STORE_PATH):
+        """
+        Args:
+            json_dir: HearthstoneJSON 数据目录
+            data_path: 分类后的卡牌数据目录
+            store_path: 卡牌数据库路径
+        """
+        self.json_dir = json_dir
+        self.data_path = data_path
+        self.store_path = store_path
+        self.source_path = None
+        self.store = None
+        self._set_ids = []
+        # 扩展包的卡牌列表会被反复使用（模拟器、报告），按 (扩展包ID, 是否只要可收藏) 缓存
+        self._set_cards = {}
+
+    @classmethod
+    def instance(cls):
+        """获取共享的卡牌数据仓库（首次调用时加载，加载失败时抛出异常且不缓存）"""
+        repository = cls._instance
+        if repository is None:
+            with cls._instance_lock:
+                repository = cls._instance
+                if repository is None:
+                    repository = cls()
+                    repository.load()
+                    cls._instance = repository
+        return repository
+
+    @classmethod
+    def reset_instance(cls):
+        """丢弃共享的仓库并关闭数据库（卡牌数据更新前后调用），下次使用时重新加载"""
+        with cls._instance_lock:
+            if cls._instance is not None:
+                cls._instance.close()
+            cls._instance = None
+
+    def load(self):
+        """
+        打开卡牌数据库（需要时先由JSON数据生成）
+
+        Returns:
+            int: 卡牌数量
+        """
+        self.ensure_store()
+        print(f"正在打开卡牌数据库: {self.store_path}")
+        self.store = CardStore(self.store_path)
+        self.source_path = self.store_path
+        self._set_ids = self.store.set_ids()
+        count = self.store.count()
+        print(f"卡牌数据库中有 {count} 张卡牌（可收藏扩展包 {len(self._set_ids)} 个）")
+        return count
+
+    def ensure_store(self):
+        """数据库不存在或比JSON数据旧时，由JSON数据生成"""
+        complete_path = os.path.join(self.json_dir, "cards_complete.json")
+        collectible_path = os.path.join(self.data_path, "all_collectible_cards.json")
+        if os.path.exists(complete_path):
+            path = complete_path
+        elif os.path.exists(collectible_path):
+            path = collectible_path
+        elif os.path.exists(self.store_path):
+            return
+        else:
+            raise FileNotFoundError(f"找不到卡牌数据文件：{complete_path}")
+
+        if os.path.exists(self.store_path) and os.path.getmtime(self.store_path) >= os.path.getmtime(path):
+            return
+
+        print(f"正在由 {path} 生成卡牌数据库")
+        with open(path, 'r', encoding='utf-8') as f:
+            cards = json.load(f)
+        os.makedirs(os.path.dirname(self.store_path) or '.', exist_ok=True)
+        write_card_store(self.store_path, cards, {'source': os.path.basename(path)})
+
+    def close(self):
+        """关闭数据库"""
+        if self.store is not None:
+            self.store.close()
+
+    def set_ids(self):
+        """返回包含可收藏卡牌的扩展包ID列表"""
+        return list(self._set_ids)
+
+    def cards_in_set(self, set_id, collectible_only=True):
+        """返回扩展包的卡牌列表（默认只包含可收藏卡牌；列表会被缓存共享，调用方不要修改）"""
+        key = (set_id, collectible_only)
+        cards = self._set_cards.get(key)
+        if cards is None:
+            cards = self._set_cards[key] = self.store.cards_in_set(set_id, collectible_only)
+        return cards
+
+    def find_cards(self, collectible=None, **filters):
+        """按扩展包、职业、稀有度、法力值等条件查找卡牌，见 CardStore.find_cards"""
+        return self.store.find_cards(collectible, **filters)
+
+    def card_by_id(self, card_id):
+        """按卡牌ID查找，找不到时返回None"""
+        return self.store.card_by_id(card_id)
+
+    def card_by_dbf_id(self, dbf_id):
+        """按 dbfId 查找，找不到时返回None"""
+        return self.store.card_by_dbf_id(dbf_id)
+
+    def cards_by_name(self, name):
+        """按名称查找（同名卡牌可能有多个版本）"""
+        return self.store.find_cards(name=name)
+
+    def cards_by_rarity(self, rarity):
+        """按稀有度查找"""
+        return self.store.find_cards(rarity=rarity)
+
+    def cards_by_class(self, card_class):
+        """按职业查找"""
+        return self.store.find_cards(card_class=card_class)
+
+    def dbf_ids(self):
+        """返回所有不重复的 dbfId"""
+        return self.store.dbf_ids()
+
+    def collectible_names(self):
+        """返回可收藏卡牌的 (名称, dbfId, 扩展包)，见 CardStore.collectible_names"""
+        return self.store.collectible_names()
@@ -0,0 +1,215 @@
+"""
+卡牌数据库：以 SQLite 保存全部卡牌的单一本地存储
+
+每张卡牌只保存一份（完整JSON），并把常用的查询字段（扩展包、职业、稀有度、法力值、
+dbfId、名称）单独存为带索引的列。数据库由数据管理器在一个事务中生成到临时文件，
+完成后再替换正式文件，读取方不会看到写了一半的数据。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+CARD_STORE_FILE = "cards.db"
+CARD_STORE_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE cards (
+    seq INTEGER PRIMARY KEY,    -- 在 cards_complete.json 中的顺序
+    id TEXT,
+    dbf_id INTEGER,
+    name TEXT,
+    card_set TEXT,
+    card_class TEXT,
+    rarity TEXT,
+    cost INTEGER,
+    type TEXT,
+    collectible INTEGER NOT NULL,
+    data TEXT NOT NULL          -- 完整的卡牌JSON
+);
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# 数据写入完成后再建索引，比边插入边维护索引快
+_INDEXES = """
+CREATE INDEX idx_cards_set ON cards (card_set, collectible);
+CREATE INDEX idx_cards_class ON cards (card_class);
+CREATE INDEX idx_cards_rarity ON cards (rarity);
+CREATE INDEX idx_cards_cost ON cards (cost);
+CREATE INDEX idx_cards_dbf_id ON cards (dbf_id);
+CREATE INDEX idx_cards_name ON cards (name);
+CREATE INDEX idx_cards_id ON cards (id);
+"""
+
+# find_cards 支持的筛选条件 -> 列名
+_FILTER_COLUMNS = {
+    'card_set': 'card_set',
+    'card_class': 'card_class',
+    'rarity': 'rarity',
+    'cost': 'cost',
+    'dbf_id': 'dbf_id',
+    'name': 'name',
+    'card_id': 'id',
+}
+
+
+def _card_row(seq, card):
+    """一张卡牌在 cards 表中的一行"""
+    return (
+        seq,
+        card.get('id'),
+        card.get('dbfId'),
+        card.get('name'),
+        card.get('set'),
+        card.get('cardClass'),
+        card.get('rarity'),
+        card.get('cost'),
+        card.get('type'),
+        1 if card.get('collectible', False) else 0,
+        json.dumps(card, ensure_ascii=False, separators=(',', ':')),
+    )
+
+
+def write_card_store(path, cards, meta=None):
+    """
+    生成卡牌数据库（在一个事务中写入临时文件，完成后替换 path）
+
+    Args:
+        path: 数据库文件路径
+        cards: 卡牌信息的可迭代对象（可以是流式读取的生成器）
+        meta: 额外记录的元数据 {键: 值}，例如内容哈希
+
+    Returns:
+        int: 写入的卡牌数量
+    """
+    temp_path = path + ".tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    connection = sqlite3.connect(temp_path)
+    try:
+        # 临时文件写完才替换正式文件，不需要日志和同步
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(_SCHEMA)
+        with connection:
+            connection.executemany("INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   (_card_row(seq, card) for seq, card in enumerate(cards)))
+            connection.executescript(_INDEXES)
+            meta = dict(meta or {})
+            meta['version'] = CARD_STORE_VERSION
+            connection.executemany("INSERT INTO meta VALUES (?, ?)",
+                                   [(key, str(value)) for key, value in meta.items()])
+        count = connection.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+    finally:
+        connection.close()
+
+    os.replace(temp_path, path)
+    return count
+
+
+class CardStore:
+    """只读的卡牌数据库
+
+    连接可以在多个线程中使用（查询时加锁）。查询结果是新解析的卡牌字典，调用方可以修改。
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 数据库文件路径
+
+        Raises:
+            FileNotFoundError: 数据库不存在
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"找不到卡牌数据库：{path}")
+        self.path = path
+        self._lock = threading.Lock()
+        uri = "file:" + os.path.abspath(path).replace('\\', '/') + "?mode=ro"
+        self._connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def _cards(self, sql, params=()):
+        return [json.loads(data) for (data,) in self._query(sql, params)]
+
+    def meta(self):
+        """返回元数据 {键: 值}"""
+        return dict(self._query("SELECT key, value FROM meta"))
+
+    def count(self):
+        """卡牌总数"""
+        return self._query("SELECT COUNT(*) FROM cards")[0][0]
+
+    def set_ids(self):
+        """返回包含可收藏卡牌的扩展包ID列表，按扩展包第一次出现的顺序排列"""
+        rows = self._query("SELECT card_set FROM cards WHERE collectible = 1 AND card_set != '' "
+                           "GROUP BY card_set ORDER BY MIN(seq)")
+        return [card_set for (card_set,) in rows]
+
+    def find_cards(self, collectible=None, **filters):
+        """
+        按条件查找卡牌（条件之间为"且"的关系，结果按原始顺序排列）
+
+        Args:
+            collectible: True/False 只返回可收藏/不可收藏的卡牌，None 不限
+            **filters: card_set, card_class, rarity, cost, dbf_id, name, card_id
+
+        Returns:
+            list: 卡牌信息列表
+        """
+        conditions = []
+        params = []
+        for key, value in filters.items():
+            # 值为None时查找缺少该字段的卡牌
+            if value is None:
+                conditions.append(f"{_FILTER_COLUMNS[key]} IS NULL")
+                continue
+            conditions.append(f"{_FILTER_COLUMNS[key]} = ?")
+            params.append(value)
+        if collectible is not None:
+            conditions.append("collectible = ?")
+            params.append(1 if collectible else 0)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return self._cards(f"SELECT data FROM cards{where} ORDER BY seq", params)
+
+    def cards_in_set(self, set_id, collectible_only=True):
+        """返回扩展包的卡牌列表（默认只包含可收藏卡牌）"""
+        return self.find_cards(collectible=True if collectible_only else None, card_set=set_id)
+
+    def card_by_id(self, card_id):
+        """按卡牌ID查找，找不到时返回None"""
+        cards = self._cards("SELECT data FROM cards WHERE id = ? ORDER BY seq DESC LIMIT 1", (card_id,))
+        return cards[0] if cards else None
+
+    def card_by_dbf_id(self, dbf_id):
+        """按 dbfId 查找，找不到时返回None"""
+        cards = self._cards("SELECT data FROM cards WHERE dbf_id = ? ORDER BY seq DESC LIMIT 1", (dbf_id,))
+        return cards[0] if cards else None
+
+    def dbf_ids(self):
+        """返回所有不重复的 dbfId"""
+        return [dbf_id for (dbf_id,) in self._query(
+            "SELECT DISTINCT dbf_id FROM cards WHERE dbf_id != 0 ORDER BY dbf_id")]
+
+    def collectible_names(self):
+        """
+        返回所有有名称、dbfId 和扩展包的可收藏卡牌的 (名称, dbfId, 扩展包)，按原始顺序排列，
+        只读取索引列，不解析卡牌JSON
+        """
+        return self._query("SELECT name, dbf_id, card_set FROM cards WHERE collectible = 1 "
+                           "AND name != '' AND dbf_id != 0 AND card_set != '' ORDER BY seq")
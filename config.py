@@ -1,5 +1,4 @@
 import os
-from PyQt5.QtGui import QColor
 
 # 稀有度概率设置
 RARITY_PROBABILITIES = {
@@ -9,13 +8,7 @@ RARITY_PROBABILITIES = {
     'LEGENDARY': 0.0124 # 传说: 1.24%
 }
 
-# 稀有度颜色设置 - Qt颜色
-RARITY_COLORS = {
-    'LEGENDARY': QColor("#FF7D0A"),  # 橙色
-    'EPIC': QColor("#A335EE"),       # 紫色
-    'RARE': QColor("#0070DD"),       # 蓝色
-    'COMMON': QColor("#888888")      # 灰色
-}
+# 稀有度Qt颜色（RARITY_COLORS）定义在 ui_utils.py 中，本文件不依赖Qt
 
 # matplotlib绘图颜色
 PLOT_COLORS = {
@@ -114,9 +107,12 @@ SET_NAMES = {
 # 保底机制设置
 GUARANTEE_RARE_OR_HIGHER = True  # 每包至少一张稀有或更高
 LEGENDARY_PITY_TIMER = 40        # 每40包必出一张传说
+FIRST_LEGENDARY_GUARANTEE = 10   # 前10包必出一张传说
 
 # 数据路径设置
 DATA_PATH = os.path.join("炉石卡牌分类")
+CARD_JSON_DIR = os.path.join("hsJSON卡牌数据")
+CARD_STORE_PATH = os.path.join(CARD_JSON_DIR, "cards.db")
 REPORTS_DIR = os.path.join("抽卡报告")
 
 # 卡牌类型映射
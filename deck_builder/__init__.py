@@ -1,2 +1,10 @@
 # 使 deck_builder 成为一个包
-from .deck_builder_main import DeckBuilder  # 修改为新的文件名
\ No newline at end of file
+# DeckBuilder 依赖 Qt，按需导入，使 deckstring_parser 等核心模块可在无界面环境中使用
+__all__ = ['DeckBuilder']
+
+
+def __getattr__(name):
+    if name == 'DeckBuilder':
+        from .deck_builder_main import DeckBuilder  # 修改为新的文件名
+        return DeckBuilder
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
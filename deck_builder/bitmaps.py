@@ -0,0 +1,50 @@
+"""
+行号位图：用 Python 整数表示卡牌行号的集合（第 i 位为1表示包含第 i 行）
+
+位图之间用 &、|、~ 组合，运算在C中按机器字进行；与行号列表之间的转换用 numpy 批量完成。
+"""
+
+import numpy as np
+
+
+def rows_to_bitmap(rows, size):
+    """
+    行号转换为位图
+
+    Args:
+        rows: 行号的可迭代对象（列表或 numpy 数组）
+        size: 总行数
+
+    Returns:
+        int: 位图
+    """
+    flags = np.zeros(size, dtype=bool)
+    flags[np.asarray(rows, dtype=np.intp)] = True
+    return flags_to_bitmap(flags)
+
+
+def flags_to_bitmap(flags):
+    """布尔数组（第 i 个元素对应第 i 行）转换为位图"""
+    return int.from_bytes(np.packbits(flags, bitorder='little').tobytes(), 'little')
+
+
+def full_bitmap(size):
+    """包含全部 size 行的位图"""
+    return (1 << size) - 1
+
+
+def bitmap_rows(bitmap, size):
+    """
+    位图转换为行号列表
+
+    Args:
+        bitmap: 位图
+        size: 总行数
+
+    Returns:
+        list: 从小到大排列的行号
+    """
+    if not bitmap:
+        return []
+    data = np.frombuffer(bitmap.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(data, bitorder='little')[:size]).tolist()
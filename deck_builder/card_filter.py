@@ -0,0 +1,135 @@
+"""
+卡牌分面筛选：导入抽卡报告时为每个分面的每个取值预先计算卡牌行号位图
+
+分面包括职业、扩展包、稀有度、法力值档位、卡牌类型、种族/派系。筛选时只对位图做按位与/或，
+再与搜索索引的结果相与，不需要逐张检查卡牌；游客职业变化时只增减对应职业的位图。
+"""
+
+from deck_builder.bitmaps import rows_to_bitmap, bitmap_rows
+from deck_builder.deck_constants import NEUTRAL_CLASS, GUEST_CARD_SET
+
+FACETS = ('class', 'set', 'rarity', 'cost', 'type', 'race')
+
+# 法力值档位：0-6 各一档，7及以上为一档（与游戏中的法力值筛选相同）
+MAX_COST_BUCKET = 7
+
+
+def cost_bucket(cost):
+    """法力值所在的档位"""
+    try:
+        return min(max(int(cost), 0), MAX_COST_BUCKET)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _facet_values(card):
+    """卡牌在各分面上的取值 {分面: [取值]}（种族可能有多个）"""
+    race_type = card.get('race_type') or ''
+    return {
+        'class': [(card.get('class') or '').strip()],
+        'set': [card.get('set')],
+        'rarity': [card.get('rarity')],
+        'cost': [cost_bucket(card.get('cost'))],
+        'type': [card.get('type')],
+        'race': [race for race in race_type.split('、') if race],
+    }
+
+
+class CardFilter:
+    """卡牌分面筛选器（行号为卡牌在列表中的位置）"""
+
+    def __init__(self, cards=()):
+        """
+        Args:
+            cards: 卡牌字典列表（卡组构建器使用的中文字段）
+        """
+        cards = list(cards)
+        self.size = len(cards)
+        rows_by_value = {facet: {} for facet in FACETS}
+        valid_rows = []
+        for row, card in enumerate(cards):
+            # 缺少名称或职业的卡牌不显示
+            if card.get('name') and card.get('class'):
+                valid_rows.append(row)
+            for facet, values in _facet_values(card).items():
+                facet_rows = rows_by_value[facet]
+                for value in values:
+                    facet_rows.setdefault(value, []).append(row)
+
+        self.valid = rows_to_bitmap(valid_rows, self.size)
+        self.facets = {facet: {value: rows_to_bitmap(rows, self.size) for value, rows in values.items()}
+                       for facet, values in rows_by_value.items()}
+        # 当前允许的游客职业及其在游客扩展包中的卡牌
+        self.guest_classes = set()
+        self.guest_cards = 0
+
+    def facet(self, facet, value):
+        """分面取某个值的卡牌位图"""
+        return self.facets[facet].get(value, 0)
+
+    def any_of(self, facet, values):
+        """分面取其中任一值的卡牌位图"""
+        bitmap = 0
+        for value in values:
+            bitmap |= self.facet(facet, value)
+        return bitmap
+
+    def select(self, **conditions):
+        """
+        按多个分面筛选（分面之间为"且"，同一分面的多个取值之间为"或"）
+
+        Args:
+            **conditions: 分面名 -> 取值或取值的列表/集合，例如 rarity='传说', cost=[0, 1, 2]
+
+        Returns:
+            int: 卡牌位图
+        """
+        bitmap = self.valid
+        for facet, values in conditions.items():
+            if isinstance(values, (list, tuple, set, frozenset)):
+                bitmap &= self.any_of(facet, values)
+            else:
+                bitmap &= self.facet(facet, values)
+        return bitmap
+
+    def set_guest_classes(self, guest_classes):
+        """更新允许的游客职业（只增减有变化的职业的位图）"""
+        guest_set = self.facet('set', GUEST_CARD_SET)
+        for class_name in self.guest_classes - guest_classes:
+            self.guest_cards &= ~(self.facet('class', class_name) & guest_set)
+        for class_name in guest_classes - self.guest_classes:
+            self.guest_cards |= self.facet('class', class_name) & guest_set
+        self.guest_classes = set(guest_classes)
+
+    def class_cards(self, selected_class):
+        """
+        所选职业的卡组可以使用的卡牌：该职业和中立卡牌，以及游客职业在游客扩展包中的卡牌
+
+        Args:
+            selected_class: 职业名称，None 表示全部职业
+        """
+        if selected_class is None:
+            return self.valid
+        selected_class = selected_class.strip()
+        allowed = self.facet('class', selected_class) | self.facet('class', NEUTRAL_CLASS) | self.guest_cards
+        return self.valid & allowed
+
+    def visible(self, selected_class, search=None):
+        """
+        卡牌列表中显示的卡牌
+
+        Args:
+            selected_class: 职业名称，None 表示全部职业
+            search: 搜索索引返回的位图，None 表示不搜索
+
+        Returns:
+            int: 卡牌位图
+        """
+        bitmap = self.class_cards(selected_class)
+        if search is not None:
+            bitmap &= search
+        return bitmap
+
+    def rows(self, bitmap):
+        """位图中的行号（从小到大）"""
+        return bitmap_rows(bitmap, self.size)
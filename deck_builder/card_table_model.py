@@ -0,0 +1,146 @@
+"""
+卡组构建器左侧"可选卡牌"表格的数据模型
+
+模型直接引用导入的卡牌字典列表，显示文本在视图请求某个单元格时才生成，不为每个单元格创建对象。
+过滤只改变模型中可见卡牌的行号列表。各列的排序键在导入报告时一次算好（法力值、数量按数字排序，
+其余列按文本排序），排序只是在 Python 中按排序键重排行号列表；使用 QSortFilterProxyModel 时
+每次比较都要回调两次 data()，几百行就需要上万次回调，比重建整个表格还慢。
+"""
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+from config import RARITY_NAMES
+from ui_utils import RARITY_COLORS
+
+# (表头, 卡牌字段)
+COLUMNS = [
+    ("法力值", 'cost'),
+    ("卡牌名称", 'name'),
+    ("职业", 'class'),
+    ("扩展包", 'set'),
+    ("稀有度", 'rarity'),
+    ("卡牌类型", 'type'),
+    ("攻/生", 'attack_health'),
+    ("种族/类型", 'race_type'),
+    ("卡牌描述", 'description'),
+    ("数量", 'count'),
+]
+NUMERIC_FIELDS = {'cost', 'count'}
+CENTERED_FIELDS = {'cost', 'attack_health', 'race_type', 'count'}
+
+# 稀有度（中文名称）-> 文字颜色；普通卡牌使用接近黑色的深灰色
+RARITY_TEXT_COLORS = {RARITY_NAMES[rarity]: color for rarity, color in RARITY_COLORS.items() if rarity != 'COMMON'}
+DEFAULT_TEXT_COLOR = QColor("#333333")
+
+
+def _sort_key(card, field):
+    """卡牌在某一列上的排序键"""
+    value = card.get(field)
+    if field in NUMERIC_FIELDS:
+        # 无法转换为数字的值按0排序
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
+    return '' if value is None else str(value)
+
+
+class CardTableModel(QAbstractTableModel):
+    """可选卡牌表格模型：每行是卡牌列表中的一张卡牌"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cards = []
+        self.sort_keys = []   # 每列所有卡牌的排序键
+        self.colors = []      # 每张卡牌的文字颜色
+        self.rows = []        # 可见卡牌在卡牌列表中的位置
+        self.row_of = {}      # 卡牌位置 -> 模型行号
+        self.sort_column = -1
+        self.sort_order = Qt.AscendingOrder
+
+    def set_cards(self, cards):
+        """
+        设置卡牌列表（导入报告时调用），预先计算排序键和颜色，并清空可见卡牌
+
+        Args:
+            cards: 卡牌字典列表（卡组构建器使用的中文字段）
+        """
+        self.beginResetModel()
+        self.cards = cards
+        self.sort_keys = [[_sort_key(card, field) for card in cards] for _, field in COLUMNS]
+        self.colors = [RARITY_TEXT_COLORS.get(card.get('rarity'), DEFAULT_TEXT_COLOR) for card in cards]
+        self.rows = []
+        self.row_of = {}
+        self.endResetModel()
+
+    def set_rows(self, rows):
+        """
+        设置可见的卡牌（按当前的排序列排列）
+
+        Args:
+            rows: 可见卡牌在卡牌列表中的位置列表
+        """
+        self.beginResetModel()
+        self._set_rows(self._sorted(rows))
+        self.endResetModel()
+
+    def _set_rows(self, rows):
+        self.rows = rows
+        self.row_of = {card_row: row for row, card_row in enumerate(rows)}
+
+    def _sorted(self, rows):
+        """按当前的排序列排列行号（排序键相同的卡牌保持原来的顺序）"""
+        if self.sort_column < 0:
+            return list(rows)
+        return sorted(rows, key=self.sort_keys[self.sort_column].__getitem__,
+                      reverse=self.sort_order == Qt.DescendingOrder)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """按列排序（视图点击表头时调用），选中的行随卡牌移动"""
+        self.sort_column = column
+        self.sort_order = order
+        if not self.rows:
+            return
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self.rows
+        self._set_rows(self._sorted(old_rows))
+        old_indexes = self.persistentIndexList()
+        new_indexes = [self.index(self.row_of[old_rows[index.row()]], index.column()) for index in old_indexes]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def card_row(self, row):
+        """模型行对应的卡牌在卡牌列表中的位置"""
+        return self.rows[row]
+
+    def card_changed(self, card_row):
+        """通知视图卡牌所在的一行需要刷新（卡牌不可见时忽略）"""
+        row = self.row_of.get(card_row)
+        if row is not None:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        card_row = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            value = self.cards[card_row].get(COLUMNS[column][1])
+            return '' if value is None else str(value)
+        if role == Qt.ForegroundRole:
+            return self.colors[card_row]
+        if role == Qt.TextAlignmentRole and COLUMNS[column][1] in CENTERED_FIELDS:
+            return Qt.AlignCenter
+        return None
@@ -1,6 +1,6 @@
 import os
 import sys
-import pandas as pd
+import time
 
 from PyQt5.QtWidgets import QApplication, QMainWindow, QMessageBox, QDialog
 from PyQt5.QtCore import Qt, QTimer
@@ -12,6 +12,9 @@ from deck_builder.deck_constants import ACCURATE_HERO_DBF_IDS
 from deck_builder.deck_data_manager import DeckDataManager
 from deck_builder.deck_ui_components import DeckBuilderUI
 from deck_builder.deck_import_export import DeckImportExport
+from deck_builder.report_import import load_report, merge_reports
+from deck_builder.search_index import CardSearchIndex
+from deck_builder.card_filter import CardFilter
 
 class DeckBuilder(QMainWindow):
     def __init__(self):
@@ -20,6 +23,9 @@ class DeckBuilder(QMainWindow):
         
         # 初始化数据
         self.all_cards = []  # 所有卡牌
+        self.search_index = CardSearchIndex()  # 所有卡牌的搜索索引（导入报告时建立）
+        self.card_filter = CardFilter()  # 所有卡牌的分面位图（导入报告时建立）
+        self.visible_cards = None  # 卡牌列表中当前显示的卡牌位图
         self.deck = []  # 当前卡组中的卡牌
         self.selected_class = None  # 当前选择的职业
         self.search_text = ""  # 搜索文本
@@ -63,8 +69,8 @@ class DeckBuilder(QMainWindow):
         self.ui.cards_table.setFont(self.current_font)
         self.ui.deck_list.setFont(self.current_font)
         
-        # 调整行高以适应新字体
-        self.ui.cards_table.resizeRowsToContents()
+        # 调整可见行的行高以适应新字体
+        self.ui.schedule_row_resize()
 
     def on_search_changed(self, text):
         """搜索文本改变时的处理"""
@@ -82,87 +88,55 @@ class DeckBuilder(QMainWindow):
             self.sort_order = Qt.AscendingOrder
         
         # 应用排序
-        self.ui.cards_table.sortItems(logical_index, self.sort_order)
+        self.ui.cards_table.sortByColumn(logical_index, self.sort_order)
     
     def import_report(self):
-        """导入抽卡报告"""
+        """导入抽卡报告（可多选，多份报告的卡牌数量合并）"""
         try:
             # 打开文件选择对话框
             from PyQt5.QtWidgets import QFileDialog
-            file_path, _ = QFileDialog.getOpenFileName(
+            file_paths, _ = QFileDialog.getOpenFileNames(
                 self,
                 "选择抽卡报告",
                 os.path.join("抽卡报告"),
-                "Excel Files (*.xlsx)"
+                "抽卡报告 (*.xlsx *.pool.parquet *.pool.jsonl);;Excel Files (*.xlsx)"
             )
             
-            if not file_path:
+            if not file_paths:
                 return
             
-            # 读取Excel文件
-            df = pd.read_excel(file_path, sheet_name='抽卡结果')
-
-            # --- 容错：检查必需列是否存在 ---
-            required_column = '卡牌名称'
-            if required_column not in df.columns:
-                QMessageBox.critical(self, "错误", f"导入失败：Excel文件中缺少必需的列 '{required_column}'。")
-                return
-            # ------------------------------
+            # 读取报告（优先读取报告旁边的卡池文件，否则按列整体解析Excel）
+            start_time = time.perf_counter()
+            card_lists = []
+            skipped_rows = 0
+            for file_path in file_paths:
+                try:
+                    cards, skipped = load_report(file_path)
+                except ValueError as e:
+                    QMessageBox.critical(self, "错误", f"导入失败：{os.path.basename(file_path)}：{e}")
+                    return
+                card_lists.append(cards)
+                skipped_rows += skipped
+            all_cards = card_lists[0] if len(card_lists) == 1 else merge_reports(card_lists)
+            print(f"已导入 {len(file_paths)} 份抽卡报告，共 {len(all_cards)} 种卡牌，耗时 {time.perf_counter() - start_time:.3f}s")
             
-            # 清空现有数据
-            self.all_cards = []
+            # 清空现有数据，为导入的卡牌建立搜索索引和分面位图
+            self.all_cards = all_cards
+            self.search_index = CardSearchIndex(all_cards)
+            self.card_filter = CardFilter(all_cards)
             self.deck = []
-            self.ui.cards_table.setRowCount(0)
+            self.visible_cards = None
+            self.ui.card_model.set_cards(all_cards)
             self.ui.deck_list.clear()
             
-            skipped_rows = 0
-            # 处理每一行数据
-            for index, row in df.iterrows(): 
-                # --- 容错：检查必需列的值是否为空 ---
-                card_name = str(row[required_column]).strip() if required_column in row and pd.notna(row[required_column]) else ""
-                if not card_name:
-                    skipped_rows += 1
-                    # print(f"Skipping row {index+2} because '{required_column}' is empty.")
-                    continue 
-                # -------------------------------------
-                
-                # --- 容错：读取可选列，不存在则使用默认值 ---
-                # 读取拥有数量，默认为1
-                owned_count = int(float(row['数量'])) if '数量' in df.columns and pd.notna(row['数量']) and row['数量'] > 0 else 1 
-                card_class = str(row['职业']).strip() if '职业' in df.columns and pd.notna(row['职业']) else "中立"
-                card_set = str(row['扩展包']) if '扩展包' in df.columns and pd.notna(row['扩展包']) else "未知"
-                card_rarity = str(row['稀有度']) if '稀有度' in df.columns and pd.notna(row['稀有度']) else "普通"
-                card_cost = int(float(row['法力值'])) if '法力值' in df.columns and pd.notna(row['法力值']) else 0
-                card_type = str(row['卡牌类型']) if '卡牌类型' in df.columns and pd.notna(row['卡牌类型']) else "未知"
-                card_description = str(row['卡牌描述']) if '卡牌描述' in df.columns and pd.notna(row['卡牌描述']) else ""
-                
-                # 读取攻击力/生命值，默认为空字符串
-                attack_health = str(row['攻击力/生命值']) if '攻击力/生命值' in df.columns and pd.notna(row['攻击力/生命值']) else ""
-                
-                # 读取种族/类型，默认为空字符串
-                race_type = str(row['种族/类型']) if '种族/类型' in df.columns and pd.notna(row['种族/类型']) else ""
-                # -------------------------------------------
-                
-                card = {
-                    'name': card_name,
-                    'count': owned_count, # 存储拥有数量
-                    'class': card_class, 
-                    'set': card_set,
-                    'rarity': card_rarity,
-                    'cost': card_cost,
-                    'type': card_type,
-                    'description': card_description,
-                    'attack_health': attack_health,
-                    'race_type': race_type
-                }
-                self.all_cards.append(card)
-            
             # 更新显示
             self.update_cards_list()
             self.update_deck_count()
             
             # 成功消息
             success_message = "抽卡报告导入成功！"
+            if len(file_paths) > 1:
+                success_message = f"已合并导入 {len(file_paths)} 份抽卡报告！"
             if skipped_rows > 0:
                 success_message += f" (已跳过 {skipped_rows} 行缺少卡牌名称的数据)"
             QMessageBox.information(self, "成功", success_message)
@@ -229,46 +203,19 @@ class DeckBuilder(QMainWindow):
     
     def update_cards_list(self):
         """更新左侧卡牌列表"""
-        # 过滤卡牌
-        filtered_cards = []
-        for card in self.all_cards:
-            # 检查卡牌是否有完整信息 (name and class are essential)
-            if not card['name'] or not card['class']:
-                continue
-                
-            # 准备职业名称进行比较 (去除空白)
-            card_class_name = card['class'].strip()
-            selected_class_name = self.selected_class.strip() if self.selected_class else None
-            
-            # 职业过滤
-            if selected_class_name is not None:
-                # 如果选择了特定职业，显示该职业中和立卡牌
-                if not (card_class_name == selected_class_name or card_class_name == '中立'):
-                    # 检查这张卡是否是来自圣地历险记且职业是游客卡允许的职业
-                    vacation_allowed = (card['set'] == '胜地历险记' and card_class_name in self.guest_classes)
-                    
-                    # 打印调试信息
-                    # if card['set'] == '胜地历险记' and not vacation_allowed:
-                    #     print(f"过滤掉圣地历险记卡牌: {card['name']} (职业: {card_class_name})，当前允许的游客职业: {self.guest_classes}")
-                        
-                    if not vacation_allowed:
-                        continue
-            
-            # 搜索过滤
-            if self.search_text:
-                # 包含所有可能的搜索字段，包括种族/派系
-                race_type = card.get('race_type', '')
-                attack_health = card.get('attack_health', '')
-                searchable_text = f"{card['name']} {card['description']} {card['type']} {card_class_name} {card['set']} {card['rarity']} {race_type} {attack_health}".lower()
-                if self.search_text not in searchable_text:
-                    continue
-            
-            filtered_cards.append(card)
+        # 职业过滤（所选职业、中立卡牌，以及游客职业在胜地历险记中的卡牌）与搜索过滤
+        # 都由预先计算的位图按位运算得出，不逐张检查卡牌
+        self.card_filter.set_guest_classes(self.guest_classes)
+        visible = self.card_filter.visible(self.selected_class, self.search_index.search(self.search_text))
+        # 显示的卡牌没有变化时（例如添加、移除卡组中的卡牌后）不重建表格
+        if visible == self.visible_cards:
+            return
+        self.visible_cards = visible
         
         # 更新UI
-        self.ui.update_cards_list(filtered_cards, self.sort_column, self.sort_order)
+        self.ui.update_cards_list(self.card_filter.rows(visible))
     
-    def add_card_to_deck(self, item):
+    def add_card_to_deck(self, index):
         """添加卡牌到卡组"""
         # --- 检查是否选择了具体职业 ---
         if self.selected_class is None:
@@ -280,29 +227,12 @@ class DeckBuilder(QMainWindow):
             QMessageBox.warning(self, "警告", "卡组已达到30张卡牌上限！")
             return
         
-        # 获取选中的行
-        row = item.row()
+        # 获取双击的行对应的卡牌
+        card_row = self.ui.card_model.card_row(index.row())
         
-        # --- 从表格中获取卡牌数据 (包括拥有数量) ---
-        card_name = self.ui.cards_table.item(row, 1).text()
-        try:
-            owned_count = int(self.ui.cards_table.item(row, 9).text())
-        except (ValueError, TypeError):
-            owned_count = 1 # Fallback if count is invalid
-            # print(f"Warning: Could not parse owned count for {card_name}, defaulting to 1.")
-        
-        card = {
-            'name': card_name,
-            'count': owned_count, # Store owned count here too for consistency
-            'class': self.ui.cards_table.item(row, 2).text(),
-            'set': self.ui.cards_table.item(row, 3).text(),
-            'rarity': self.ui.cards_table.item(row, 4).text(),
-            'cost': int(self.ui.cards_table.item(row, 0).text()),
-            'type': self.ui.cards_table.item(row, 5).text(),
-            'race_type': self.ui.cards_table.item(row, 7).text(),
-            'description': self.ui.cards_table.item(row, 8).text(),
-            'attack_health': self.ui.cards_table.item(row, 6).text()
-        }
+        # --- 复制卡牌数据 (包括拥有数量) ---
+        card = dict(self.all_cards[card_row])
+        owned_count = card['count']
         
         # --- 检查添加的卡是否符合当前职业 --- (双重保险)
         if card['class'] != self.selected_class and card['class'] != '中立':
@@ -426,8 +356,9 @@ class DeckBuilder(QMainWindow):
         # 更新显示
         self.update_deck_list()
         self.update_deck_count()
-        # 确保左侧卡牌列表也更新，以反映新的可用卡牌
+        # 确保左侧卡牌列表也更新，以反映新的可用卡牌；显示的卡牌不变时只刷新这张卡所在的一行
         self.update_cards_list()
+        self.ui.card_model.card_changed(card_row)
     
     def check_and_update_guest_classes(self, card):
         """检查是否是游客卡牌，并更新允许的游客职业"""
@@ -26,4 +26,10 @@ ACCURATE_HERO_DBF_IDS = {
     "萨满": 1066,
     "术士": 893,
     "战士": 7,
-} 
\ No newline at end of file
+}
+
+# 中立卡牌的职业名称（任何职业的卡组都可以使用）
+NEUTRAL_CLASS = "中立"
+
+# 游客卡牌所属的扩展包：卡组中有某职业的游客卡牌时，可以使用该扩展包中这个职业的卡牌
+GUEST_CARD_SET = "胜地历险记"
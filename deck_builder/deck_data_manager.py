@@ -1,10 +1,39 @@
-import os
-import json
-
 # 修改导入路径
-from config import DATA_PATH
+from collections.abc import Mapping
 from PyQt5.QtWidgets import QMessageBox
 from utils import normalize_card_name
+from card_repository import CardRepository
+
+class DbfIdCardMap(Mapping):
+    """按 dbfId 查询卡牌信息的只读映射，每次查询直接访问共享的卡牌数据库（结果会缓存）
+    
+    不保存仓库对象：数据更新后仓库会被重置，下次查询时自动使用新打开的数据库
+    """
+    
+    def __init__(self):
+        self._cache = {}
+        self._dbf_ids = None
+    
+    def __getitem__(self, dbf_id):
+        card = self._cache.get(dbf_id)
+        if card is None:
+            card = CardRepository.instance().card_by_dbf_id(dbf_id)
+            if card is None:
+                raise KeyError(dbf_id)
+            self._cache[dbf_id] = card
+        return card
+    
+    def _all_ids(self):
+        if self._dbf_ids is None:
+            self._dbf_ids = CardRepository.instance().dbf_ids()
+        return self._dbf_ids
+    
+    def __iter__(self):
+        return iter(self._all_ids())
+    
+    def __len__(self):
+        return len(self._all_ids())
+
 
 class DeckDataManager:
     """卡组数据管理类"""
@@ -17,7 +46,8 @@ class DeckDataManager:
     
     def load_card_data(self, parent_widget=None):
         """
-        加载 card_infos.json 并构建映射，严格优先选择 CORE 系列卡牌。
+        从共享的卡牌数据仓库构建映射，严格优先选择 CORE 系列卡牌。
+        卡牌数据在进程内只解析一次，开包模拟器已加载过时不会重复读取。
         
         Args:
             parent_widget: 父窗口部件，用于显示错误消息框
@@ -25,69 +55,46 @@ class DeckDataManager:
         Returns:
             bool: 加载是否成功
         """
-        json_path = "hsJSON卡牌数据/card_infos.json"
-        if not os.path.exists(json_path):
+        try:
+            repository = CardRepository.instance()
+        except FileNotFoundError as e:
+            if parent_widget:
+                QMessageBox.critical(parent_widget, "错误", f"{e}\n无法实现卡组导出/导入功能。")
+            return False
+        except Exception as e:
+            import traceback
+            traceback_str = traceback.format_exc()
             if parent_widget:
-                QMessageBox.critical(parent_widget, "错误", f"找不到卡牌数据文件：{json_path}\n无法实现卡组导出/导入功能。")
+                QMessageBox.critical(parent_widget, "错误", f"加载卡牌数据时出错：{str(e)}\n\n{traceback_str}")
             return False
             
         try:
-            print(f"Loading card data from {json_path}...")
-            with open(json_path, 'r', encoding='utf-8') as f:
-                all_data = json.load(f)
-            
             self.card_name_to_dbf_id = {}
             normalized_name_to_dbf_id = {}
-            self.dbf_id_to_card_info = {}
+            # DBF ID 到卡牌信息的映射直接查询卡牌数据库，不再把所有卡牌读入内存
+            self.dbf_id_to_card_info = DbfIdCardMap()
             
             print("正在构建卡牌名称到DBF ID的映射 (优先CORE系列)...")
-
-            for card_data in all_data:
-                dbf_id = card_data.get('dbfId')
-                card_name = card_data.get('name')
-                card_set = card_data.get('set')
-                is_collectible = card_data.get('collectible', False)
+            
+            # 只读取数据库的名称、dbfId、扩展包列，记录每个映射当前选中卡牌的扩展包
+            chosen_sets = {}
+            normalized_chosen_sets = {}
+            for card_name, dbf_id, card_set in repository.collectible_names():
+                is_current_core = (card_set == "CORE")
+                normalized_name = normalize_card_name(card_name)
                 
-                # 建立 DBF ID 到信息的完整映射
-                if dbf_id:
-                    self.dbf_id_to_card_info[dbf_id] = card_data
+                # --- 处理原始名称映射 --- 
+                # 名称不存在时直接添加；已存在时仅当: 当前是CORE 且 已存在不是CORE 时，才覆盖
+                if card_name not in self.card_name_to_dbf_id or (
+                        is_current_core and chosen_sets[card_name] != "CORE"):
+                    self.card_name_to_dbf_id[card_name] = dbf_id
+                    chosen_sets[card_name] = card_set
                 
-                # 处理可收集卡牌的名称->DBF ID 映射
-                if is_collectible and card_name and dbf_id and card_set:
-                    is_current_core = (card_set == "CORE")
-                    normalized_name = normalize_card_name(card_name)
-                    
-                    # --- 处理原始名称映射 --- 
-                    if card_name not in self.card_name_to_dbf_id:
-                        # 如果名称不存在，直接添加
-                        self.card_name_to_dbf_id[card_name] = dbf_id
-                    else:
-                        # 如果名称已存在，检查是否需要用CORE版本覆盖
-                        existing_dbf_id = self.card_name_to_dbf_id[card_name]
-                        existing_card_info = self.dbf_id_to_card_info.get(existing_dbf_id, {})
-                        existing_set = existing_card_info.get('set')
-                        is_existing_core = (existing_set == "CORE")
-                        
-                        # 仅当: 当前是CORE 且 已存在不是CORE 时，才覆盖
-                        if is_current_core and not is_existing_core:
-                            self.card_name_to_dbf_id[card_name] = dbf_id
-                        # 在其他情况下 (包括两者都是CORE, 两者都不是CORE, 当前不是CORE但已存在是CORE), 保持不变
-                        
-                    # --- 处理规范化名称映射 --- 
-                    if normalized_name not in normalized_name_to_dbf_id:
-                        # 如果规范化名称不存在，直接添加
-                        normalized_name_to_dbf_id[normalized_name] = dbf_id
-                    else:
-                        # 如果规范化名称已存在，检查是否需要用CORE版本覆盖
-                        existing_dbf_id = normalized_name_to_dbf_id[normalized_name]
-                        existing_card_info = self.dbf_id_to_card_info.get(existing_dbf_id, {})
-                        existing_set = existing_card_info.get('set')
-                        is_existing_core = (existing_set == "CORE")
-                        
-                        # 仅当: 当前是CORE 且 已存在不是CORE 时，才覆盖
-                        if is_current_core and not is_existing_core:
-                            normalized_name_to_dbf_id[normalized_name] = dbf_id
-                        # 其他情况保持不变
+                # --- 处理规范化名称映射 --- 
+                if normalized_name not in normalized_name_to_dbf_id or (
+                        is_current_core and normalized_chosen_sets[normalized_name] != "CORE"):
+                    normalized_name_to_dbf_id[normalized_name] = dbf_id
+                    normalized_chosen_sets[normalized_name] = card_set
             
             self.normalized_name_to_dbf_id = normalized_name_to_dbf_id
             
@@ -99,7 +106,7 @@ class DeckDataManager:
             import traceback
             traceback_str = traceback.format_exc()
             if parent_widget:
-                QMessageBox.critical(parent_widget, "错误", f"加载卡牌数据 {json_path} 时出错：{str(e)}\n\n{traceback_str}")
+                QMessageBox.critical(parent_widget, "错误", f"加载卡牌数据 {repository.source_path} 时出错：{str(e)}\n\n{traceback_str}")
             self.card_name_to_dbf_id = {} 
             self.normalized_name_to_dbf_id = {}
             self.dbf_id_to_card_info = {}
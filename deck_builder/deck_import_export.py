@@ -1,6 +1,4 @@
 import base64
-import os
-import json
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTextEdit, QPushButton, QMessageBox, QApplication, QInputDialog
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
@@ -10,6 +8,7 @@ from .deck_constants import ACCURATE_HERO_DBF_IDS
 from utils import write_varint
 from .deckstring_parser import parse_deckstring
 from config import CLASS_NAMES
+from card_repository import CardRepository
 
 class DeckImportExport:
     """卡组导入导出管理类"""
@@ -32,34 +31,27 @@ class DeckImportExport:
         if dbf_id in DeckImportExport._hero_info_cache:
             return DeckImportExport._hero_info_cache[dbf_id]
         
-        # 英雄皮肤数据文件路径
-        hero_skins_file = os.path.join("炉石卡牌分类", "HERO_SKINS", "all_cards.json")
-        
         try:
-            if os.path.exists(hero_skins_file):
-                with open(hero_skins_file, 'r', encoding='utf-8') as f:
-                    hero_data = json.load(f)
-                
-                # 查找匹配的英雄
-                for hero in hero_data:
-                    if hero.get('dbfId') == dbf_id:
-                        card_class = hero.get('cardClass')
-                        if card_class:
-                            # 转换为中文职业名
-                            for en_name, cn_name in CLASS_NAMES.items():
-                                if en_name.upper() == card_class:
-                                    DeckImportExport._hero_info_cache[dbf_id] = cn_name
-                                    return cn_name
-                            
-                            # 如果没有找到中文名，缓存英文名
-                            for en_name, cn_name in CLASS_NAMES.items():
-                                if en_name.upper() in card_class or card_class in en_name.upper():
-                                    DeckImportExport._hero_info_cache[dbf_id] = cn_name
-                                    return cn_name
-                            
-                            # 实在没办法，返回英文名
-                            DeckImportExport._hero_info_cache[dbf_id] = None
-                            return None
+            # 从共享的卡牌数据仓库中按dbfId查找英雄皮肤，不再每次读取 HERO_SKINS 文件
+            hero = CardRepository.instance().card_by_dbf_id(dbf_id)
+            if hero and hero.get('set') == 'HERO_SKINS':
+                card_class = hero.get('cardClass')
+                if card_class:
+                    # 转换为中文职业名
+                    for en_name, cn_name in CLASS_NAMES.items():
+                        if en_name.upper() == card_class:
+                            DeckImportExport._hero_info_cache[dbf_id] = cn_name
+                            return cn_name
+                    
+                    # 如果没有找到中文名，缓存英文名
+                    for en_name, cn_name in CLASS_NAMES.items():
+                        if en_name.upper() in card_class or card_class in en_name.upper():
+                            DeckImportExport._hero_info_cache[dbf_id] = cn_name
+                            return cn_name
+                    
+                    # 实在没办法，返回英文名
+                    DeckImportExport._hero_info_cache[dbf_id] = None
+                    return None
         except Exception as e:
             # 出错时默认返回None
             pass
@@ -99,9 +91,12 @@ class DeckImportExport:
         # print("开始统计和查找卡牌DBF ID...")
         # 统计卡牌数量
         card_counts = {}
+        known_dbf_ids = {}  # 从卡池文件导入的卡牌自带 dbfId，不需要按名称查找
         for card in deck:
             card_name = card['name']
             card_counts[card_name] = card_counts.get(card_name, 0) + 1
+            if card.get('dbfId'):
+                known_dbf_ids.setdefault(card_name, card['dbfId'])
             
         cards_x1 = []  # 一张的卡牌
         cards_x2 = []  # 两张的卡牌
@@ -114,7 +109,7 @@ class DeckImportExport:
             card_index += 1
             # print(f"  查找卡牌 {card_index}/{total_cards}: {card_name} (数量: {count})...")
             # 尝试多种方式找到 DBF ID
-            dbf_id = data_manager.find_card_dbf_id(card_name)
+            dbf_id = known_dbf_ids.get(card_name) or data_manager.find_card_dbf_id(card_name)
             # print(f"    找到DBF ID: {dbf_id if dbf_id else '未找到'}")
             
             if dbf_id:
@@ -1,17 +1,16 @@
 import os
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                           QComboBox, QLineEdit, QPushButton, QTableWidget,
-                           QTableWidgetItem, QHeaderView, QListWidget, 
+                           QComboBox, QLineEdit, QPushButton, QTableView,
+                           QHeaderView, QListWidget, 
                            QListWidgetItem, QAbstractItemView, QSplitter,
                            QToolButton)  # 添加 QToolButton 导入
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, QTimer
 from PyQt5.QtGui import QColor, QFont, QIcon
 
 # 修改导入路径
 from config import CLASS_NAMES, RARITY_NAMES
 
-from utils import NumericTableWidgetItem
-from config import CLASS_NAMES
+from deck_builder.card_table_model import CardTableModel
 
 class DeckBuilderUI:
     """卡组构建器UI组件管理类"""
@@ -26,6 +25,8 @@ class DeckBuilderUI:
         self.parent = parent
         self.central_widget = None
         self.cards_table = None
+        self.card_model = None  # 可选卡牌的数据模型
+        self.row_height_timer = None  # 合并多次行高调整请求
         self.deck_list = None
         self.class_combo = None
         self.deck_count_label = None
@@ -112,12 +113,10 @@ class DeckBuilderUI:
         cards_title.setFont(QFont("Sans Serif", 12, QFont.Bold))
         left_layout.addWidget(cards_title)
         
-        # 卡牌表格
-        self.cards_table = QTableWidget()
-        self.cards_table.setColumnCount(10)  # 10列，包括种族/类型列
-        self.cards_table.setHorizontalHeaderLabels([
-            "法力值", "卡牌名称", "职业", "扩展包", "稀有度", "卡牌类型", "攻/生", "种族/类型", "卡牌描述", "数量"
-        ])
+        # 卡牌表格（模型/视图：过滤只重置模型中的可见行，排序由模型按预先计算的排序键完成）
+        self.card_model = CardTableModel(self.parent)
+        self.cards_table = QTableView()
+        self.cards_table.setModel(self.card_model)
         # 设置列宽调整模式为 Interactive (允许用户调整，并由我们代码控制)
         self.cards_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
         # 取消最后列拉伸
@@ -126,10 +125,20 @@ class DeckBuilderUI:
         self.cards_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.cards_table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.cards_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.cards_table.itemDoubleClicked.connect(self.parent.add_card_to_deck)
+        self.cards_table.doubleClicked.connect(self.parent.add_card_to_deck)
         # 启用排序
         self.cards_table.setSortingEnabled(True)
         self.cards_table.horizontalHeader().sectionClicked.connect(self.parent.on_header_clicked)
+        
+        # 行高只按内容调整可见的行，其余行在滚动到时再调整
+        self.row_height_timer = QTimer(self.parent)
+        self.row_height_timer.setSingleShot(True)
+        self.row_height_timer.setInterval(0)
+        self.row_height_timer.timeout.connect(self.resize_visible_rows)
+        self.card_model.modelReset.connect(self.schedule_row_resize)
+        self.card_model.layoutChanged.connect(self.schedule_row_resize)
+        self.cards_table.verticalScrollBar().valueChanged.connect(self.schedule_row_resize)
+        self.cards_table.horizontalHeader().sectionResized.connect(self.schedule_row_resize)
         left_layout.addWidget(self.cards_table)
         
         return left_panel
@@ -286,89 +295,30 @@ class DeckBuilderUI:
         """
         self.deck_count_label.setText(f"卡牌数量: {deck_size}/30")
     
-    def update_cards_list(self, filtered_cards, sort_column, sort_order):
+    def update_cards_list(self, rows):
         """
-        更新左侧卡牌列表
+        更新左侧卡牌列表（保持当前的排序）
         
         Args:
-            filtered_cards: 过滤后的卡牌列表
-            sort_column: 当前排序列索引
-            sort_order: 当前排序顺序
+            rows: 过滤后的卡牌在卡牌列表中的位置列表
         """
-        # 更新前禁用排序，避免冲突
-        self.cards_table.setSortingEnabled(False)
-        
-        # 清空表格
-        self.cards_table.setRowCount(0)
-        
-        # 添加到表格
-        for card in filtered_cards:
-            row = self.cards_table.rowCount()
-            self.cards_table.insertRow(row)
-            
-            # 创建单元格
-            # 使用 NumericTableWidgetItem 来处理法力值列
-            cost_item = NumericTableWidgetItem(str(card['cost'])) 
-            cost_item.setTextAlignment(Qt.AlignCenter)  # 居中对齐
-            
-            name_item = QTableWidgetItem(card['name'])
-            # 添加拥有数量单元格
-            count_item = NumericTableWidgetItem(str(card['count'])) 
-            count_item.setTextAlignment(Qt.AlignCenter)
-            
-            class_item = QTableWidgetItem(card['class'])
-            set_item = QTableWidgetItem(card['set'])
-            rarity_item = QTableWidgetItem(card['rarity'])
-            type_item = QTableWidgetItem(card['type'])
-            
-            # 添加种族/类型单元格
-            race_type_item = QTableWidgetItem(card.get('race_type', ''))
-            race_type_item.setTextAlignment(Qt.AlignCenter)
-            
-            desc_item = QTableWidgetItem(card['description'])
-            
-            # 添加攻击力/生命值单元格
-            attack_health_item = QTableWidgetItem(card.get('attack_health', ''))
-            attack_health_item.setTextAlignment(Qt.AlignCenter)
-            
-            # 设置单元格数据
-            self.cards_table.setItem(row, 0, cost_item)
-            self.cards_table.setItem(row, 1, name_item)
-            self.cards_table.setItem(row, 2, class_item)
-            self.cards_table.setItem(row, 3, set_item)
-            self.cards_table.setItem(row, 4, rarity_item)
-            self.cards_table.setItem(row, 5, type_item)
-            self.cards_table.setItem(row, 6, attack_health_item)
-            self.cards_table.setItem(row, 7, race_type_item)
-            self.cards_table.setItem(row, 8, desc_item)
-            self.cards_table.setItem(row, 9, count_item)
-            
-            # 设置颜色
-            if card['rarity'] == '传说':
-                color = QColor("#FF7D0A")  # 橙色
-            elif card['rarity'] == '史诗':
-                color = QColor("#A335EE")  # 紫色
-            elif card['rarity'] == '稀有':
-                color = QColor("#0070DD")  # 蓝色
-            else:
-                color = QColor("#333333")  # 更深的灰色，接近黑色
-            
-            # 为整行设置颜色
-            for col in range(self.cards_table.columnCount()):
-                item = self.cards_table.item(row, col)
-                if item: # 检查单元格是否存在
-                    item.setForeground(color)
-        
-        # 恢复排序状态
-        if sort_column >= 0:
-            # 先设置排序列和顺序，再重新启用排序
-            self.cards_table.sortItems(sort_column, sort_order)
-        
-        # 重新启用排序
-        self.cards_table.setSortingEnabled(True)
-            
-        # 调整行高
-        self.cards_table.resizeRowsToContents()
+        self.card_model.set_rows(rows)
+    
+    def schedule_row_resize(self, *args):
+        """在事件循环空闲时调整可见行的行高（多次请求只调整一次）"""
+        self.row_height_timer.start()
+    
+    def resize_visible_rows(self):
+        """按内容调整当前可见行的行高"""
+        table = self.cards_table
+        row = table.rowAt(0)
+        if row < 0:
+            return
+        row_count = self.card_model.rowCount()
+        viewport_height = table.viewport().height()
+        while row < row_count and table.rowViewportPosition(row) < viewport_height:
+            table.resizeRowToContents(row)
+            row += 1
     
     def create_menu_bar(self, set_font_size_callback):
         """
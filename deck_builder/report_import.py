@@ -0,0 +1,142 @@
+"""
+抽卡报告导入：把Excel抽卡报告或卡池文件读取为卡组构建器使用的卡牌列表
+
+Excel报告按列整体处理：只读取需要的列，缺失值和默认值按列填充，
+用布尔掩码跳过缺少卡牌名称的行，最后一次性转换为卡牌字典列表。
+"""
+
+import importlib.util
+
+import pandas as pd
+
+from card_pool import find_pool_file, read_pool_file, deck_builder_card
+
+REPORT_SHEET = '抽卡结果'
+REQUIRED_COLUMN = '卡牌名称'
+
+# Excel列名 -> 卡牌字段
+TEXT_COLUMNS = {
+    '卡牌名称': 'name',
+    '职业': 'class',
+    '扩展包': 'set',
+    '稀有度': 'rarity',
+    '卡牌类型': 'type',
+    '卡牌描述': 'description',
+    '攻击力/生命值': 'attack_health',
+    '种族/类型': 'race_type',
+}
+NUMBER_COLUMNS = {
+    '数量': 'count',
+    '法力值': 'cost',
+}
+
+# 列不存在或值为空时使用的默认值
+FIELD_DEFAULTS = {
+    'name': "",
+    'count': 1,
+    'class': "中立",
+    'set': "未知",
+    'rarity': "普通",
+    'cost': 0,
+    'type': "未知",
+    'description': "",
+    'attack_health': "",
+    'race_type': "",
+}
+
+# 安装了 python-calamine 时使用 Rust 实现的 calamine 引擎解析Excel（比 openpyxl 快一个数量级）
+EXCEL_ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') else None
+
+# 卡牌字典的字段顺序
+CARD_FIELDS = ['name', 'count', 'class', 'set', 'rarity', 'cost', 'type',
+               'description', 'attack_health', 'race_type']
+
+
+def read_excel_report(file_path):
+    """
+    读取Excel抽卡报告
+
+    Args:
+        file_path: Excel文件路径
+
+    Returns:
+        tuple: (卡牌字典列表, 因缺少卡牌名称而跳过的行数)
+
+    Raises:
+        ValueError: 缺少必需的 "卡牌名称" 列
+    """
+    known_columns = set(TEXT_COLUMNS) | set(NUMBER_COLUMNS)
+    # 文本列按字符串读取，避免名称、扩展包等被推断成数字
+    df = pd.read_excel(file_path, sheet_name=REPORT_SHEET, engine=EXCEL_ENGINE,
+                       usecols=lambda column: column in known_columns,
+                       dtype={column: object for column in TEXT_COLUMNS})
+    if REQUIRED_COLUMN not in df.columns:
+        raise ValueError(f"Excel文件中缺少必需的列 '{REQUIRED_COLUMN}'。")
+
+    columns = {}
+    for column, field in TEXT_COLUMNS.items():
+        if column not in df.columns:
+            continue
+        values = df[column]
+        present = values.notna()
+        text = values.where(present, "").astype(str)
+        if field in ('name', 'class'):
+            text = text.str.strip()
+        columns[field] = text.where(present, FIELD_DEFAULTS[field])
+
+    for column, field in NUMBER_COLUMNS.items():
+        if column not in df.columns:
+            continue
+        values = pd.to_numeric(df[column], errors='coerce')
+        if field == 'count':
+            # 数量缺失或不大于0时按1张计算
+            values = values.where(values > 0)
+        columns[field] = values.fillna(FIELD_DEFAULTS[field]).astype('int64')
+
+    # 卡牌名称为空的行跳过
+    keep = columns['name'] != ""
+    skipped_rows = int((~keep).sum())
+
+    cards = pd.DataFrame(columns, index=df.index)[keep]
+    for field in CARD_FIELDS:
+        if field not in cards.columns:
+            cards[field] = FIELD_DEFAULTS[field]
+    return cards[CARD_FIELDS].to_dict('records'), skipped_rows
+
+
+def load_report(file_path):
+    """
+    读取抽卡报告，报告旁边有卡池文件时优先读取卡池文件
+
+    Returns:
+        tuple: (卡牌字典列表, 跳过的行数)
+    """
+    pool_path = find_pool_file(file_path)
+    if pool_path:
+        cards = [deck_builder_card(card) for card in read_pool_file(pool_path)]
+        # 与Excel报告相同，卡牌名称为空的卡牌跳过
+        kept = [card for card in cards if card['name']]
+        return kept, len(cards) - len(kept)
+    return read_excel_report(file_path)
+
+
+def merge_reports(card_lists):
+    """
+    合并多份报告的卡牌，同一张卡牌（名称、职业、扩展包相同）的数量相加
+
+    Args:
+        card_lists: 卡牌字典列表的可迭代对象
+
+    Returns:
+        list: 合并后的卡牌列表，按首次出现的顺序排列
+    """
+    merged = {}
+    for cards in card_lists:
+        for card in cards:
+            key = (card['name'], card['class'], card['set'])
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = dict(card)
+            else:
+                existing['count'] += card['count']
+    return list(merged.values())
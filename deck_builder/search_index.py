@@ -0,0 +1,105 @@
+"""
+卡牌搜索索引：导入抽卡报告时为卡牌建立一次倒排索引，输入搜索文本时只查索引
+
+可搜索的文本与原来的逐张匹配相同：名称、描述、类型、职业、扩展包、稀有度、种族/派系、
+攻击力/生命值（不区分大小写），匹配方式也仍是子串匹配。
+文本按空白分段，每段的每个字符（单字）和相邻两个字符（bigram）作为索引键：中文按字切分，
+ASCII 词（数字、英文）同样按字符切分，因此 "3" 能找到 "1/3" 和 "13"，前缀和词中间的匹配都保留。
+
+搜索文本按空白分成多个词，卡牌需要包含所有词（AND）。一两个字符的词由倒排表直接得出结果；
+更长的词（例如 "火球术"）取所有相邻两字倒排表的交集，再在候选卡牌上确认一次是否包含该词。
+"""
+
+from deck_builder.bitmaps import rows_to_bitmap, bitmap_rows, full_bitmap
+
+# 搜索文本包含的卡牌字段
+SEARCH_FIELDS = ('name', 'description', 'type', 'class', 'set', 'rarity', 'race_type', 'attack_health')
+
+
+def card_search_text(card):
+    """卡牌的可搜索文本（小写，职业名称去掉首尾空白）"""
+    values = [str(card.get(field) or '') for field in SEARCH_FIELDS]
+    class_index = SEARCH_FIELDS.index('class')
+    values[class_index] = values[class_index].strip()
+    return ' '.join(values).lower()
+
+
+def _bigrams(word):
+    return [word[i:i + 2] for i in range(len(word) - 1)]
+
+
+def _index_keys(text):
+    """文本中的索引键：每段文本的单字和相邻两字"""
+    keys = set()
+    for word in text.split():
+        keys.update(word)
+        keys.update(_bigrams(word))
+    return keys
+
+
+def _query_keys(term):
+    """
+    搜索词（不含空白）需要的索引键
+
+    Returns:
+        tuple: (索引键列表, 是否需要在候选卡牌上确认包含该词)
+    """
+    if len(term) == 1:
+        return [term], False
+    return _bigrams(term), len(term) > 2
+
+
+class CardSearchIndex:
+    """卡牌倒排索引：索引键 -> 包含它的卡牌行号位图（行号为卡牌在列表中的位置）"""
+
+    def __init__(self, cards=()):
+        """
+        Args:
+            cards: 卡牌字典列表（字段见 SEARCH_FIELDS）
+        """
+        self.texts = [card_search_text(card) for card in cards]
+        rows_by_key = {}
+        for row, text in enumerate(self.texts):
+            for key in _index_keys(text):
+                rows = rows_by_key.get(key)
+                if rows is None:
+                    rows_by_key[key] = [row]
+                else:
+                    rows.append(row)
+        size = len(self.texts)
+        self.postings = {key: rows_to_bitmap(rows, size) for key, rows in rows_by_key.items()}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def search(self, query):
+        """
+        搜索卡牌
+
+        Args:
+            query: 搜索文本（按空白分成多个词，不区分大小写）
+
+        Returns:
+            int 或 None: 包含所有词的卡牌行号位图（见 deck_builder.bitmaps）；搜索文本为空时返回None（不过滤）
+        """
+        terms = query.lower().split()
+        if not terms:
+            return None
+
+        result = full_bitmap(len(self.texts))
+        verify_terms = []
+        for term in terms:
+            keys, verify = _query_keys(term)
+            if verify:
+                verify_terms.append(term)
+            for key in keys:
+                result &= self.postings.get(key, 0)
+                if not result:
+                    return 0
+
+        if verify_terms:
+            texts = self.texts
+            rows = [row for row in bitmap_rows(result, len(texts))
+                    if all(term in texts[row] for term in verify_terms)]
+            result = rows_to_bitmap(rows, len(texts))
+        return result
@@ -1,15 +1,321 @@
 import requests
+import codecs
+import hashlib
 import json
 import os
+import re
+import shutil
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import sys # Import sys
 
+# HearthstoneJSON API URL（latest 会重定向到具体版本号的地址）
+# 注意：将zhCN改为enUS可以获取英文版卡牌
+DEFAULT_API_URL = "https://api.hearthstonejson.com/v1/latest/zhCN/cards.json"
+
+# 记录上次更新状态的清单文件（位于 hsJSON卡牌数据 目录）
+MANIFEST_FILE = "manifest.json"
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # 下载时每次写入的字节数
+DOWNLOAD_TIMEOUT = 30            # 连接和读取超时（秒）
+ORGANIZE_BUFFER_CARDS = 3000     # 整理时所有分类文件合计最多缓冲的卡牌数
+ORGANIZE_WRITE_THREADS = 8       # 整理时写入（比较）分类文件的最大线程数（不超过CPU核数）
+
+
+def content_hash(data):
+    """返回数据的 sha256（bytes 直接计算，其他对象按排序键的紧凑JSON计算）"""
+    if not isinstance(data, bytes):
+        data = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def iter_json_array(f, chunk_size=DOWNLOAD_CHUNK_SIZE, on_bytes=None):
+    """
+    逐个读取JSON数组中的元素，内存中只保留当前数据块和当前元素
+    
+    Args:
+        f: 以二进制模式打开的文件
+        chunk_size: 每次读取的字节数
+        on_bytes: 每读取一块原始字节时调用（例如计算文件哈希）
+        
+    Yields:
+        数组中的每个元素
+        
+    Raises:
+        ValueError: 内容不是合法的JSON数组
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    eof = False
+    started = False
+    has_items = False
+    
+    def read_more():
+        nonlocal buffer, pos, eof
+        data = f.read(chunk_size)
+        if on_bytes is not None and data:
+            on_bytes(data)
+        eof = not data
+        # 丢弃已经处理过的内容，避免缓冲区无限增长
+        buffer = buffer[pos:] + utf8.decode(data, final=eof)
+        pos = 0
+    
+    while True:
+        # 跳过空白和分隔符
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            read_more()
+        if pos >= len(buffer):
+            raise ValueError("JSON数组不完整")
+        
+        char = buffer[pos]
+        if not started:
+            if char != '[':
+                raise ValueError("内容不是JSON数组")
+            started = True
+            pos += 1
+            expect_value = True
+            continue
+        if char == ']':
+            if expect_value and has_items:
+                raise ValueError("JSON数组末尾多了逗号")
+            pos += 1
+            break
+        if not expect_value:
+            if char != ',':
+                raise ValueError("JSON数组元素之间缺少逗号")
+            pos += 1
+            expect_value = True
+            continue
+        
+        # 解析一个元素；元素不完整（数据块在中间截断）时读取更多内容后重试
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                if end < len(buffer) or eof:
+                    break
+            except ValueError:
+                if eof:
+                    raise
+            read_more()
+        pos = end
+        expect_value = False
+        has_items = True
+        yield value
+    
+    # 数组之后只允许空白
+    while True:
+        if buffer[pos:].strip():
+            raise ValueError("JSON数组之后还有多余的内容")
+        if eof:
+            return
+        read_more()
+
+
+class JsonArrayWriter:
+    """逐个写入JSON数组元素，输出格式与 json.dump(列表, indent=2) 相同
+    
+    元素序列化后先放在小缓冲区中，攒够一批再追加到文件，写入期间不保持文件打开，
+    同时写很多个文件也不会占用大量文件句柄或内存。
+    """
+    
+    def __init__(self, path, buffer_size=64):
+        """
+        Args:
+            path: 输出文件路径
+            buffer_size: 攒够多少个元素写入一次
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.pending = []
+        self.count = 0
+    
+    @staticmethod
+    def format_item(value):
+        """把元素序列化为数组中的一项（同一元素写入多个文件时只需序列化一次）"""
+        return '  ' + json.dumps(value, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+    
+    def add(self, value):
+        """添加一个元素"""
+        self.add_item(self.format_item(value))
+    
+    def add_item(self, item):
+        """添加一个已由 format_item 序列化的元素"""
+        self.pending.append(item)
+        self.count += 1
+        if len(self.pending) >= self.buffer_size:
+            self.flush()
+    
+    def flush(self):
+        """把缓冲区中的元素追加到文件"""
+        if not self.pending:
+            return
+        first_write = self.count == len(self.pending)
+        self._write(('[\n' if first_write else ',\n') + ',\n'.join(self.pending), first_write)
+        self.pending = []
+    
+    def close(self):
+        """写入剩余元素并结束数组"""
+        if self.count == 0:
+            self._write('[]', True)
+            return
+        self.flush()
+        self._write('\n]', False)
+    
+    def _write(self, text, first_write):
+        """写入一段输出（第一段覆盖文件，之后追加）"""
+        with open(self.path, 'w' if first_write else 'a', encoding='utf-8') as f:
+            f.write(text)
+
+
+def encode_text(text):
+    """按文本模式写文件时的换行符把文本编码为UTF-8字节（与 open(..., 'w', encoding='utf-8') 写出的内容相同）"""
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    return text.encode('utf-8')
+
+
+def write_file_if_changed(path, text):
+    """
+    内容与已有文件不同时才写入文件（先写临时文件再替换）
+    
+    Returns:
+        bool: 是否写入了文件
+    """
+    data = encode_text(text)
+    if os.path.isfile(path) and os.path.getsize(path) == len(data):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    with open(path + ".tmp", 'wb') as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+    return True
+
+
+class SyncedJsonArrayWriter(JsonArrayWriter):
+    """输出与 JsonArrayWriter 相同，但只在内容有变化时替换文件
+    
+    每批输出先与已有文件的对应部分比较，内容相同时不写入任何数据；第一次出现不同时，
+    把已比较过的相同部分复制到临时文件并继续写入，关闭时用临时文件替换原文件。
+    给出线程池时比较和写入在线程池中执行，同一文件的批次按顺序执行。
+    """
+    
+    def __init__(self, path, buffer_size=64, executor=None):
+        """
+        Args:
+            path: 输出文件路径
+            buffer_size: 攒够多少个元素写入一次
+            executor: 执行比较和写入的线程池，None 时在当前线程执行
+        """
+        super().__init__(path, buffer_size)
+        self.temp_path = path + ".tmp"
+        self.executor = executor
+        self.changed = None       # 文件是否有变化（wait() 之后有效）
+        self._future = None
+        self._comparing = os.path.isfile(path)
+        self._matched = 0         # 与已有文件相同的字节数
+        self._temp_started = False
+    
+    def _write(self, text, first_write):
+        data = encode_text(text)
+        self._submit(self._emit, data)
+    
+    def close(self):
+        """写入剩余元素并结束数组，之后在后台判断是否需要替换原文件（用 wait() 等待结果）"""
+        super().close()
+        self._submit(self._finish)
+    
+    def wait(self):
+        """
+        等待线程池中的比较和写入完成（出错时抛出异常）
+        
+        Returns:
+            bool: 文件是否有变化（被替换）
+        """
+        if self._future is not None:
+            self._future.result()
+        return self.changed
+    
+    def discard(self):
+        """放弃写入，删除临时文件"""
+        try:
+            self.wait()
+        except Exception:
+            pass
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+    
+    def _submit(self, func, *args):
+        if self.executor is None:
+            func(*args)
+            return
+        # 等待上一批完成，保证同一文件的批次按顺序执行
+        self.wait()
+        self._future = self.executor.submit(func, *args)
+    
+    def _emit(self, data):
+        if self._comparing:
+            with open(self.path, 'rb') as f:
+                f.seek(self._matched)
+                if f.read(len(data)) == data:
+                    self._matched += len(data)
+                    return
+            self._start_temp()
+        elif not self._temp_started:
+            self._start_temp()
+        with open(self.temp_path, 'ab') as f:
+            f.write(data)
+    
+    def _start_temp(self):
+        """开始写临时文件：先复制与已有文件相同的前缀"""
+        with open(self.temp_path, 'wb') as out:
+            if self._matched:
+                with open(self.path, 'rb') as f:
+                    remaining = self._matched
+                    while remaining:
+                        chunk = f.read(min(remaining, DOWNLOAD_CHUNK_SIZE))
+                        out.write(chunk)
+                        remaining -= len(chunk)
+        self._comparing = False
+        self._temp_started = True
+    
+    def _finish(self):
+        # 新内容与整个已有文件相同（长度也相同）时不替换
+        if self._comparing and os.path.getsize(self.path) == self._matched:
+            self.changed = False
+            return
+        if not self._temp_started:
+            self._start_temp()
+        os.replace(self.temp_path, self.path)
+        self.changed = True
+
+
 class HearthstoneDataManager:
-    """炉石传说卡牌数据管理器，支持获取和组织卡牌数据"""
+    """炉石传说卡牌数据管理器，支持获取和组织卡牌数据
+    
+    更新是增量的：清单文件记录版本号、ETag/Last-Modified 和内容哈希，
+    请求时带上条件请求头，服务器返回304或内容没有变化时跳过全部处理；
+    整理时只重新生成卡牌内容有变化的扩展包目录。
+    """
     
-    def __init__(self):
+    def __init__(self, api_url=DEFAULT_API_URL, base_dir=None, progress_callback=None, export_json=False):
+        """
+        Args:
+            api_url: 卡牌数据地址（可以指向本地的测试服务器）
+            base_dir: 数据目录所在的根目录，默认为程序所在目录
+            progress_callback: 下载进度回调 (已下载字节数, 总字节数，未知时为0)
+            export_json: 是否同时导出按扩展包、职业、稀有度分类的JSON目录（程序本身只使用卡牌数据库）
+        """
         # --- 判断运行环境并确定基准路径 ---
-        if getattr(sys, 'frozen', False):
+        if base_dir is not None:
+            application_path = base_dir
+        elif getattr(sys, 'frozen', False):
             # 如果是打包后的 exe 文件运行
             application_path = os.path.dirname(sys.executable)
         else:
@@ -19,8 +325,17 @@ class HearthstoneDataManager:
         # ------------------------------------
     
         # 使用 application_path 来构建输出目录
+        self.api_url = api_url
         self.json_data_dir = os.path.join(application_path, "hsJSON卡牌数据")
         self.organized_dir = os.path.join(application_path, "炉石卡牌分类")
+        self.manifest_path = os.path.join(self.json_data_dir, MANIFEST_FILE)
+        self.store_path = os.path.join(self.json_data_dir, "cards.db")
+        self.export_json = export_json
+        self.manifest = self.load_manifest()
+        # 本次更新中卡牌数据是否有变化（run_all 之后有效）
+        self.data_changed = False
+        self.progress_callback = progress_callback
+        self.expected_size = 0  # 本次下载的完整文件大小（未知时为0）
         
         # 职业名称中英文映射（便于目录命名）
         self.class_name_map = {
@@ -47,75 +362,138 @@ class HearthstoneDataManager:
             'FREE': '基本'
         }
         
-        # 确保目录存在
+        # 确保目录存在（分类目录只在导出时创建）
         os.makedirs(self.json_data_dir, exist_ok=True)
-        os.makedirs(self.organized_dir, exist_ok=True)
+        if export_json:
+            os.makedirs(self.organized_dir, exist_ok=True)
+    
+    def load_manifest(self):
+        """读取清单文件，不存在或损坏时返回空清单"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def save_manifest(self):
+        """写入清单文件（先写临时文件再替换）"""
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.manifest_path)
+    
+    def conditional_headers(self):
+        """根据清单生成条件请求头（本地数据不完整时不带条件，重新下载）"""
+        if self.manifest.get('api_url') != self.api_url:
+            return {}
+        if not os.path.exists(os.path.join(self.json_data_dir, "cards_complete.json")):
+            return {}
+        headers = {}
+        if self.manifest.get('etag'):
+            headers['If-None-Match'] = self.manifest['etag']
+        if self.manifest.get('last_modified'):
+            headers['If-Modified-Since'] = self.manifest['last_modified']
+        return headers
     
     def fetch_from_hearthstonejson(self):
         """
         从HearthstoneJSON获取完整的卡牌数据
         HearthstoneJSON是一个知名的提供炉石卡牌数据的公共API
+        
+        使用条件请求：服务器返回304，或返回的内容与清单中的哈希相同时，不写任何文件，
+        self.data_changed 为 False。下载以流的方式写入临时文件（中断后可以续传），
+        校验通过后才替换 cards_complete.json。
         """
         print("开始从HearthstoneJSON获取炉石传说卡牌数据...")
         
-        # HearthstoneJSON API URL
-        api_url = "https://api.hearthstonejson.com/v1/latest/zhCN/cards.json"
-        # 注意：将zhCN改为enUS可以获取英文版卡牌
+        api_url = self.api_url
+        complete_path = os.path.join(self.json_data_dir, "cards_complete.json")
         
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36'
         }
+        headers.update(self.conditional_headers())
         
         try:
             print(f"正在请求API: {api_url}")
-            response = requests.get(api_url, headers=headers)
+            response, part_path = self.download_file(api_url, complete_path, headers)
+            
+            if response.status_code == 304:
+                print("卡牌数据没有变化（HTTP 304），跳过下载")
+                self.data_changed = False
+                return True
             
-            if response.status_code == 200:
-                # 解析JSON数据
-                cards_data = response.json()
+            if response.status_code in (200, 206):
+                body_hash = self.verify_download(part_path)
+                http_info = {
+                    'api_url': api_url,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'build': self.parse_build(response.url),
+                }
                 
-                # 保存完整数据
-                with open(os.path.join(self.json_data_dir, "cards_complete.json"), 'w', encoding='utf-8') as f:
-                    json.dump(cards_data, f, ensure_ascii=False, indent=2)
-                print(f"已保存完整卡牌数据")
+                if body_hash == self.manifest.get('content_sha256') and os.path.exists(complete_path):
+                    print("卡牌数据内容没有变化，跳过保存")
+                    os.remove(part_path)
+                    self.manifest.update(http_info)
+                    self.data_changed = False
+                    return True
                 
-                # 提取卡牌名称和其他基本信息
-                card_names = []
-                card_infos = []
+                # 流式解析下载的数据，逐张提取卡牌名称和其他基本信息写入临时文件；
+                # 完整解析一遍同时校验了下载内容，无效时不替换原有数据
+                names_path = os.path.join(self.json_data_dir, "card_names.json")
+                infos_path = os.path.join(self.json_data_dir, "card_infos.json")
+                names_writer = JsonArrayWriter(names_path + ".tmp")
+                infos_writer = JsonArrayWriter(infos_path + ".tmp")
+                try:
+                    with open(part_path, 'rb') as f:
+                        for card in iter_json_array(f):
+                            # 检查卡牌是否有中文名称
+                            if 'name' in card:
+                                names_writer.add(card['name'])
+                                
+                                # 提取一些基本信息
+                                infos_writer.add({
+                                    'name': card.get('name', ''),
+                                    'id': card.get('id', ''),
+                                    'dbfId': card.get('dbfId', ''),
+                                    'type': card.get('type', ''),
+                                    'set': card.get('set', ''),
+                                    'rarity': card.get('rarity', ''),
+                                    'cost': card.get('cost', ''),
+                                    'attack': card.get('attack', ''),
+                                    'health': card.get('health', ''),
+                                    'text': card.get('text', ''),
+                                    'flavor': card.get('flavor', ''),
+                                    'artist': card.get('artist', ''),
+                                    'collectible': card.get('collectible', False)
+                                })
+                    names_writer.close()
+                    infos_writer.close()
+                except (ValueError, AttributeError) as e:
+                    for temp_path in (names_path + ".tmp", infos_path + ".tmp"):
+                        if os.path.exists(temp_path):
+                            os.remove(temp_path)
+                    self.discard_download(part_path)
+                    raise ValueError(f"下载的卡牌数据不是有效的卡牌JSON数组: {e}")
                 
-                for card in cards_data:
-                    # 检查卡牌是否有中文名称
-                    if 'name' in card:
-                        card_names.append(card['name'])
-                        
-                        # 提取一些基本信息
-                        card_info = {
-                            'name': card.get('name', ''),
-                            'id': card.get('id', ''),
-                            'dbfId': card.get('dbfId', ''),
-                            'type': card.get('type', ''),
-                            'set': card.get('set', ''),
-                            'rarity': card.get('rarity', ''),
-                            'cost': card.get('cost', ''),
-                            'attack': card.get('attack', ''),
-                            'health': card.get('health', ''),
-                            'text': card.get('text', ''),
-                            'flavor': card.get('flavor', ''),
-                            'artist': card.get('artist', ''),
-                            'collectible': card.get('collectible', False)
-                        }
-                        
-                        card_infos.append(card_info)
+                # 校验通过，替换完整数据（服务器返回的原始内容）
+                os.replace(part_path, complete_path)
+                print(f"已保存完整卡牌数据")
                 
                 # 保存卡牌名称
-                with open(os.path.join(self.json_data_dir, "card_names.json"), 'w', encoding='utf-8') as f:
-                    json.dump(card_names, f, ensure_ascii=False, indent=2)
-                print(f"已保存 {len(card_names)} 个卡牌名称")
+                os.replace(names_path + ".tmp", names_path)
+                print(f"已保存 {names_writer.count} 个卡牌名称")
                 
                 # 保存基本信息
-                with open(os.path.join(self.json_data_dir, "card_infos.json"), 'w', encoding='utf-8') as f:
-                    json.dump(card_infos, f, ensure_ascii=False, indent=2)
-                print(f"已保存 {len(card_infos)} 张卡牌基本信息")
+                os.replace(infos_path + ".tmp", infos_path)
+                print(f"已保存 {infos_writer.count} 张卡牌基本信息")
+                
+                self.manifest.update(http_info)
+                self.manifest['content_sha256'] = body_hash
+                self.manifest.pop('partial', None)
+                self.save_manifest()
+                self.data_changed = True
                 
                 # 立即开始组织卡牌数据
                 print("数据获取完成，准备开始组织卡牌数据")
@@ -127,12 +505,127 @@ class HearthstoneDataManager:
             print(f"获取卡牌数据时出错: {e}")
             return False
     
+    def download_file(self, url, path, headers):
+        """
+        以流的方式把 url 下载到 path + ".part"，每次只在内存中保留一个数据块
+        
+        上次下载中断时保留了 .part 文件和它的 ETag/Last-Modified，本次用 Range + If-Range
+        从中断处继续；服务器上的文件已变化时会返回完整内容（200），从头重新写入。
+        下载过程中出错时保留 .part 文件，下次更新继续。
+        
+        Args:
+            url: 下载地址
+            path: 最终文件路径（本方法不替换它）
+            headers: 请求头
+            
+        Returns:
+            tuple: (响应, .part 文件路径)，304 时没有写入任何内容
+        """
+        part_path = path + ".part"
+        self.expected_size = 0
+        request_headers = headers
+        headers = dict(headers)
+        # 续传和进度都按原始字节计算，不使用压缩传输
+        headers['Accept-Encoding'] = 'identity'
+        
+        partial = self.manifest.get('partial') or {}
+        resume_from = 0
+        validator = partial.get('etag') or partial.get('last_modified')
+        if partial.get('url') == url and validator and os.path.exists(part_path):
+            resume_from = os.path.getsize(part_path)
+        if resume_from:
+            headers['Range'] = f"bytes={resume_from}-"
+            headers['If-Range'] = validator
+        
+        response = requests.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT)
+        if response.status_code == 416 and resume_from:
+            # .part 文件已无法续传（例如比服务器上的文件还大），丢弃后重新下载
+            response.close()
+            self.discard_download(part_path)
+            return self.download_file(url, path, request_headers)
+        try:
+            if response.status_code not in (200, 206):
+                return response, part_path
+            
+            if response.status_code == 206:
+                print(f"从 {resume_from} 字节处继续下载")
+                mode = 'ab'
+                done = resume_from
+            else:
+                mode = 'wb'
+                done = 0
+            content_length = response.headers.get('Content-Length')
+            total = done + int(content_length) if content_length else 0
+            self.expected_size = total
+            
+            # 记录 .part 对应的版本，中断后可以续传
+            self.manifest['partial'] = {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
+            self.save_manifest()
+            
+            self.report_progress(done, total)
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    done += len(chunk)
+                    self.report_progress(done, total)
+            return response, part_path
+        finally:
+            response.close()
+    
+    def verify_download(self, part_path):
+        """
+        校验下载的 .part 文件大小与 Content-Length 一致，并计算 sha256
+        
+        Returns:
+            str: 文件的 sha256
+            
+        Raises:
+            ValueError: 大小不一致（删除 .part 文件，下次重新下载）
+        """
+        size = os.path.getsize(part_path)
+        if self.expected_size and size != self.expected_size:
+            self.discard_download(part_path)
+            raise ValueError(f"下载的文件大小不正确：{size} 字节，应为 {self.expected_size} 字节")
+        
+        sha256 = hashlib.sha256()
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+    
+    def discard_download(self, part_path):
+        """删除无效的 .part 文件和续传记录"""
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        self.manifest.pop('partial', None)
+        self.save_manifest()
+    
+    def report_progress(self, done, total):
+        """调用进度回调（已下载字节数, 总字节数，未知时为0）"""
+        if self.progress_callback is not None:
+            self.progress_callback(done, total)
+    
+    @staticmethod
+    def parse_build(url):
+        """从重定向后的地址（.../v1/<版本号>/zhCN/cards.json）中解析版本号"""
+        match = re.search(r'/v1/(\d+)/', url or '')
+        return int(match.group(1)) if match else None
+    
     def organize_hearthstone_cards(self):
         """
         将炉石传说卡牌按照扩展包(set)、职业(cardClass)和稀有度(rarity)分类整理
         每个文件夹下都保存一个包含完整信息的json文件，只包含可收藏(collectible)的卡牌
+        
+        卡牌数据以流的方式逐张读取并直接写入所属的各层文件，不把全部卡牌保存在内存中，
+        峰值内存与数据大小无关；内容没有变化的文件不会被重写，有变化的文件通过临时文件替换。
+        程序本身只使用卡牌数据库，分类目录仅在需要导出时生成
         """
         print("开始按照扩展包、职业和稀有度整理炉石传说卡牌数据...")
+        os.makedirs(self.organized_dir, exist_ok=True)
         
         # 检查源数据文件是否存在
         complete_cards_path = os.path.join(self.json_data_dir, "cards_complete.json")
@@ -141,85 +634,86 @@ class HearthstoneDataManager:
             return False
             
         try:
-            # 读取所有卡牌数据
-            print(f"正在读取完整卡牌数据")
-            with open(complete_cards_path, 'r', encoding='utf-8') as f:
-                all_cards = json.load(f)
-            
-            print(f"共读取 {len(all_cards)} 张卡牌")
+            # 有上次整理的记录时，先流式扫描一遍计算每个扩展包的哈希，确定需要重新生成的扩展包；
+            # 第一次整理时所有扩展包都要生成，扫描和写入合并为一遍
+            root_cards_path = os.path.join(self.organized_dir, "all_collectible_cards.json")
+            old_hashes = self.manifest.get('set_hashes', {}) if os.path.exists(root_cards_path) else {}
             
-            # 只保留可收藏的卡牌
-            collectible_cards = [card for card in all_cards if card.get('collectible', False)]
-            print(f"其中可收藏卡牌 {len(collectible_cards)} 张")
-            
-            # 创建扩展包列表和统计信息
-            sets_info = defaultdict(int)
-            for card in collectible_cards:
-                if 'set' in card and card['set']:
-                    sets_info[card['set']] += 1
-            
-            # 输出扩展包信息
-            print(f"\n找到 {len(sets_info)} 个扩展包:")
-            for set_name, count in sorted(sets_info.items(), key=lambda x: x[1], reverse=True):
-                print(f"- {set_name}: {count}张可收藏卡牌")
-            
-            # 开始组织文件结构
-            print("\n开始组织文件结构...")
-            
-            # 创建用于存储每个层级卡牌的字典
-            set_cards = defaultdict(list)  # 每个扩展包的所有卡牌
-            class_cards = defaultdict(list)  # 每个扩展包下每个职业的所有卡牌
-            rarity_cards = defaultdict(list)  # 每个扩展包下每个职业的每个稀有度的所有卡牌
-            
-            # 首先，按照扩展包、职业和稀有度组织卡牌到最底层目录
-            for card in collectible_cards:
-                # 获取卡牌的扩展包、职业和稀有度
-                card_set = card.get('set', 'UNKNOWN')
-                card_class = card.get('cardClass', 'NEUTRAL')
-                card_rarity = card.get('rarity', 'UNKNOWN')
+            if old_hashes:
+                print(f"正在扫描完整卡牌数据")
+                scan = self.scan_cards(complete_cards_path)
+                changed_sets = {card_set for card_set, set_hash in scan['set_hashes'].items()
+                                if set_hash != old_hashes.get(card_set)
+                                or not os.path.exists(os.path.join(self.organized_dir, card_set, "all_cards.json"))}
+                removed_sets = [card_set for card_set in old_hashes if card_set not in scan['set_hashes']]
                 
-                # 构建目录路径（保持原始英文ID）
-                set_dir = os.path.join(self.organized_dir, card_set)
-                class_dir = os.path.join(set_dir, card_class)
-                rarity_dir = os.path.join(class_dir, card_rarity)
+                if not changed_sets and not removed_sets:
+                    print("\n所有扩展包的卡牌都没有变化，跳过整理")
+                    self.manifest['organized_sha256'] = scan['sha256']
+                    return True
                 
-                # 创建目录
-                os.makedirs(rarity_dir, exist_ok=True)
+                print(f"\n需要重新整理 {len(changed_sets)} 个扩展包，移除 {len(removed_sets)} 个扩展包")
+                for card_set in removed_sets:
+                    set_dir = os.path.join(self.organized_dir, card_set)
+                    if os.path.isdir(set_dir):
+                        shutil.rmtree(set_dir)
+            else:
+                changed_sets = None  # 全部生成
+            
+            # 开始组织文件结构：逐张读取卡牌，直接写入所属的扩展包/职业/稀有度文件；
+            # 每个文件边生成边与已有文件比较，只替换内容有变化的文件，比较和写入由线程池并行执行
+            print("\n开始组织文件结构...")
+            writers = {}
+            targets_by_key = {}
+            # 只有一个CPU核时线程池只会增加切换开销，直接在当前线程写入
+            write_threads = min(ORGANIZE_WRITE_THREADS, os.cpu_count() or 1)
+            executor = ThreadPoolExecutor(max_workers=write_threads) if write_threads > 1 else None
+            try:
+                root_writer = SyncedJsonArrayWriter(root_cards_path, executor=executor)
+                writers[root_cards_path] = root_writer
+                pending = 0
                 
-                # 保存卡牌到相应的字典
-                set_key = card_set
-                class_key = f"{set_key}/{card_class}"
-                rarity_key = f"{class_key}/{card_rarity}"
+                def route(card_set, card):
+                    nonlocal pending
+                    item = JsonArrayWriter.format_item(card)
+                    root_writer.add_item(item)
+                    if changed_sets is None or card_set in changed_sets:
+                        self.write_card_to_set(writers, targets_by_key, card_set, card, item, executor)
+                        # 所有文件缓冲的卡牌总数有上限，超过时全部写入，内存占用不随文件数量增长
+                        pending += 3
+                        if pending >= ORGANIZE_BUFFER_CARDS:
+                            for writer in writers.values():
+                                writer.flush()
+                            pending = 0
                 
-                # 添加到对应的集合中
-                set_cards[set_key].append(card)
-                class_cards[class_key].append(card)
-                rarity_cards[rarity_key].append(card)
-            
-            # 保存每个层级的卡牌数据到对应目录
-            print("正在为每个层级保存卡牌数据...")
+                try:
+                    scan = self.scan_cards(complete_cards_path, route)
+                    for writer in writers.values():
+                        writer.close()
+                    changed_files = sum(1 for writer in writers.values() if writer.wait())
+                except Exception:
+                    for writer in writers.values():
+                        writer.discard()
+                    raise
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+            print(f"写入 {changed_files} 个文件，{len(writers) - changed_files} 个文件内容没有变化")
             
-            # 1. 保存最底层（稀有度）的卡牌
-            for rarity_path, cards in rarity_cards.items():
-                json_file = os.path.join(self.organized_dir, rarity_path, "cards.json")
-                with open(json_file, 'w', encoding='utf-8') as f:
-                    json.dump(cards, f, ensure_ascii=False, indent=2)
+            # 删除重新整理的扩展包中已不存在的职业/稀有度文件
+            routed_sets = scan['set_hashes'] if changed_sets is None else changed_sets
+            self.remove_stale_files([os.path.join(self.organized_dir, card_set) for card_set in routed_sets],
+                                    set(writers))
+            set_hashes = scan['set_hashes']
+            sets_info = scan['set_counts']
             
-            # 2. 保存中间层（职业）的卡牌
-            for class_path, cards in class_cards.items():
-                json_file = os.path.join(self.organized_dir, class_path, "all_cards.json")
-                with open(json_file, 'w', encoding='utf-8') as f:
-                    json.dump(cards, f, ensure_ascii=False, indent=2)
+            print(f"共读取 {scan['total']} 张卡牌")
+            print(f"其中可收藏卡牌 {scan['collectible']} 张")
             
-            # 3. 保存顶层（扩展包）的卡牌
-            for set_path, cards in set_cards.items():
-                json_file = os.path.join(self.organized_dir, set_path, "all_cards.json")
-                with open(json_file, 'w', encoding='utf-8') as f:
-                    json.dump(cards, f, ensure_ascii=False, indent=2)
-            
-            # 4. 保存根目录所有可收藏卡牌
-            with open(os.path.join(self.organized_dir, "all_collectible_cards.json"), 'w', encoding='utf-8') as f:
-                json.dump(collectible_cards, f, ensure_ascii=False, indent=2)
+            # 输出扩展包信息
+            print(f"\n找到 {len(sets_info)} 个扩展包:")
+            for set_name, count in sorted(sets_info.items(), key=lambda x: x[1], reverse=True):
+                print(f"- {set_name}: {count}张可收藏卡牌")
             
             # 创建统计信息
             print("\n创建统计信息文件...")
@@ -230,34 +724,36 @@ class HearthstoneDataManager:
                 set_stats[card_set] = count
             
             # 保存统计信息
-            with open(os.path.join(self.organized_dir, "stats.json"), 'w', encoding='utf-8') as f:
-                json.dump({
-                    "total_cards": len(all_cards),
-                    "collectible_cards": len(collectible_cards),
-                    "sets": set_stats
-                }, f, ensure_ascii=False, indent=2)
+            write_file_if_changed(os.path.join(self.organized_dir, "stats.json"), json.dumps({
+                "total_cards": scan['total'],
+                "collectible_cards": scan['collectible'],
+                "sets": set_stats
+            }, ensure_ascii=False, indent=2))
             
             print(f"统计信息已保存")
             
             # 创建README文件
-            with open(os.path.join(self.organized_dir, "README.txt"), 'w', encoding='utf-8') as f:
-                f.write("# 炉石传说卡牌分类目录\n\n")
-                f.write("## 目录结构\n")
-                f.write("- 扩展包(set)：第一级目录，包含all_cards.json文件（该扩展包的所有卡牌）\n")
-                f.write("- 职业(cardClass)：第二级目录，包含all_cards.json文件（该职业的所有卡牌）\n")
-                f.write("- 稀有度(rarity)：第三级目录，包含cards.json文件（该稀有度的所有卡牌）\n\n")
-                f.write("每个目录都有一个JSON文件，包含该层级的所有可收藏卡牌的完整信息。\n\n")
-                f.write("## 统计信息\n")
-                f.write(f"- 总卡牌数量：{len(all_cards)}张\n")
-                f.write(f"- 可收藏卡牌数量：{len(collectible_cards)}张\n")
-                f.write(f"- 扩展包数量：{len(sets_info)}个\n\n")
-                
-                f.write("## 扩展包列表\n")
-                for set_name, count in sorted(sets_info.items(), key=lambda x: x[1], reverse=True):
-                    f.write(f"- {set_name}: {count}张可收藏卡牌\n")
+            readme = [
+                "# 炉石传说卡牌分类目录\n\n",
+                "## 目录结构\n",
+                "- 扩展包(set)：第一级目录，包含all_cards.json文件（该扩展包的所有卡牌）\n",
+                "- 职业(cardClass)：第二级目录，包含all_cards.json文件（该职业的所有卡牌）\n",
+                "- 稀有度(rarity)：第三级目录，包含cards.json文件（该稀有度的所有卡牌）\n\n",
+                "每个目录都有一个JSON文件，包含该层级的所有可收藏卡牌的完整信息。\n\n",
+                "## 统计信息\n",
+                f"- 总卡牌数量：{scan['total']}张\n",
+                f"- 可收藏卡牌数量：{scan['collectible']}张\n",
+                f"- 扩展包数量：{len(sets_info)}个\n\n",
+                "## 扩展包列表\n",
+            ]
+            for set_name, count in sorted(sets_info.items(), key=lambda x: x[1], reverse=True):
+                readme.append(f"- {set_name}: {count}张可收藏卡牌\n")
+            write_file_if_changed(os.path.join(self.organized_dir, "README.txt"), ''.join(readme))
             
             print(f"README文件已创建")
             
+            self.manifest['set_hashes'] = set_hashes
+            self.manifest['organized_sha256'] = scan['sha256']
             print("\n卡牌分类整理完成！")
             return True
             
@@ -267,9 +763,135 @@ class HearthstoneDataManager:
             traceback.print_exc()
             return False
     
+    def scan_cards(self, complete_cards_path, route=None):
+        """
+        流式读取完整卡牌数据，逐张统计可收藏卡牌（内存中只保留当前卡牌）
+        
+        Args:
+            complete_cards_path: cards_complete.json 路径
+            route: 对每张可收藏卡牌调用 route(扩展包ID, 卡牌)
+            
+        Returns:
+            dict: total 总卡牌数，collectible 可收藏卡牌数，set_counts 各扩展包可收藏卡牌数，
+                  set_hashes 各扩展包可收藏卡牌的哈希（与 content_hash(卡牌列表) 相同），
+                  sha256 文件的哈希
+        """
+        file_hash = hashlib.sha256()
+        set_hashes = {}
+        set_counts = defaultdict(int)
+        total = 0
+        collectible = 0
+        
+        with open(complete_cards_path, 'rb') as f:
+            for card in iter_json_array(f, on_bytes=file_hash.update):
+                total += 1
+                if not card.get('collectible', False):
+                    continue
+                collectible += 1
+                if card.get('set'):
+                    set_counts[card['set']] += 1
+                # 扩展包为空时归入 UNKNOWN，避免目录指向分类根目录
+                card_set = card.get('set') or 'UNKNOWN'
+                
+                # 逐张累加 "[卡牌,卡牌,...]" 的哈希，结果与对整个列表计算 content_hash 相同
+                card_json = json.dumps(card, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+                set_hash = set_hashes.get(card_set)
+                if set_hash is None:
+                    set_hash = set_hashes[card_set] = hashlib.sha256(b'[')
+                else:
+                    set_hash.update(b',')
+                set_hash.update(card_json.encode('utf-8'))
+                
+                if route is not None:
+                    route(card_set, card)
+        
+        for set_hash in set_hashes.values():
+            set_hash.update(b']')
+        return {
+            'total': total,
+            'collectible': collectible,
+            'set_counts': dict(set_counts),
+            'set_hashes': {card_set: set_hash.hexdigest() for card_set, set_hash in set_hashes.items()},
+            'sha256': file_hash.hexdigest(),
+        }
+    
+    def write_card_to_set(self, writers, targets_by_key, card_set, card, item, executor=None):
+        """
+        把一张卡牌写入扩展包目录：扩展包/职业/稀有度，每一层的JSON文件都包含该层级的卡牌
+        
+        Args:
+            writers: {文件路径: SyncedJsonArrayWriter}，所有卡牌写完后需要逐个 close() 和 wait()
+            targets_by_key: {(扩展包, 职业, 稀有度): [该卡牌要写入的 SyncedJsonArrayWriter]}
+            card_set: 扩展包ID
+            card: 卡牌信息
+            item: JsonArrayWriter.format_item(card) 的结果
+            executor: 执行比较和写入的线程池
+        """
+        card_class = card.get('cardClass', 'NEUTRAL')
+        card_rarity = card.get('rarity', 'UNKNOWN')
+        key = (card_set, card_class, card_rarity)
+        targets = targets_by_key.get(key)
+        if targets is None:
+            set_dir = os.path.join(self.organized_dir, card_set)
+            class_dir = os.path.join(set_dir, card_class)
+            rarity_dir = os.path.join(class_dir, card_rarity)
+            os.makedirs(rarity_dir, exist_ok=True)
+            targets = []
+            for path in (os.path.join(rarity_dir, "cards.json"),      # 最底层（稀有度）
+                         os.path.join(class_dir, "all_cards.json"),   # 中间层（职业）
+                         os.path.join(set_dir, "all_cards.json")):    # 顶层（扩展包）
+                # 同一职业/扩展包的文件由多个稀有度共用
+                writer = writers.get(path)
+                if writer is None:
+                    writer = writers[path] = SyncedJsonArrayWriter(path, executor=executor)
+                targets.append(writer)
+            targets_by_key[key] = targets
+        for writer in targets:
+            writer.add_item(item)
+    
+    @staticmethod
+    def remove_stale_files(set_dirs, kept_paths):
+        """删除扩展包目录中本次没有生成的文件，以及因此变空的目录"""
+        for set_dir in set_dirs:
+            if not os.path.isdir(set_dir):
+                continue
+            for dir_path, _, file_names in os.walk(set_dir, topdown=False):
+                for file_name in file_names:
+                    path = os.path.join(dir_path, file_name)
+                    if path not in kept_paths:
+                        os.remove(path)
+                if not os.listdir(dir_path):
+                    os.rmdir(dir_path)
+    
+    def build_card_store(self):
+        """
+        由 cards_complete.json 生成卡牌数据库（SQLite，一个事务写入，按扩展包、职业、稀有度、
+        法力值、dbfId、名称建索引）。卡牌以流的方式逐张读取，不把全部卡牌保存在内存中
+        """
+        # 卡牌数据库模块位于项目根目录，仅在生成时导入（本脚本也可以单独运行）
+        from card_store import write_card_store
+        
+        complete_cards_path = os.path.join(self.json_data_dir, "cards_complete.json")
+        if not os.path.exists(complete_cards_path):
+            print(f"源数据文件不存在，请先运行fetch_from_hearthstonejson()")
+            return False
+        
+        try:
+            content_sha256 = self.manifest.get('content_sha256', '')
+            with open(complete_cards_path, 'rb') as f:
+                count = write_card_store(self.store_path, iter_json_array(f),
+                                         {'source': "cards_complete.json", 'content_sha256': content_sha256})
+            self.manifest['store_sha256'] = content_sha256
+            print(f"卡牌数据库已生成: {self.store_path}（{count} 张卡牌）")
+            return True
+        except Exception as e:
+            print(f"生成卡牌数据库时出错: {e}")
+            return False
+    
     def run_all(self):
-        """运行所有数据处理步骤"""
+        """运行所有数据处理步骤（卡牌数据没有变化时跳过生成数据库和导出）"""
         print("开始炉石传说卡牌数据处理流程...\n")
+        self.data_changed = False
         
         # 1. 从HearthstoneJSON获取数据
         print("=== 步骤1: 从HearthstoneJSON获取数据 ===")
@@ -279,18 +901,39 @@ class HearthstoneDataManager:
             print("从HearthstoneJSON获取数据失败，无法继续")
             return False
         
-        # 2. 整理卡牌数据
-        print("\n=== 步骤2: 整理炉石传说卡牌数据 ===")
-        organize_success = self.organize_hearthstone_cards()
+        content_sha256 = self.manifest.get('content_sha256')
         
-        if not organize_success:
-            print("整理炉石传说卡牌数据失败")
-            return False
+        # 2. 生成卡牌数据库（数据库是由当前的 cards_complete.json 生成的时才能跳过）
+        if (not self.data_changed and self.manifest.get('store_sha256') == content_sha256
+                and os.path.exists(self.store_path)):
+            print("\n卡牌数据库已是最新")
+        else:
+            print("\n=== 步骤2: 生成卡牌数据库 ===")
+            if not self.build_card_store():
+                print("生成卡牌数据库失败")
+                return False
+            self.save_manifest()
+        
+        # 3. 按需导出分类JSON目录（分类目录是由当前的 cards_complete.json 生成的时才能跳过）
+        if self.export_json:
+            organized = (self.manifest.get('organized_sha256') == content_sha256
+                         and os.path.exists(os.path.join(self.organized_dir, "all_collectible_cards.json")))
+            if not self.data_changed and organized:
+                print("\n分类目录已是最新，无需整理")
+            else:
+                print("\n=== 步骤3: 整理炉石传说卡牌数据 ===")
+                if not self.organize_hearthstone_cards():
+                    print("整理炉石传说卡牌数据失败")
+                    return False
         
+        # 记录数据库和分类目录对应的内容哈希，失败时下次更新会重新生成
+        self.save_manifest()
         print("\n所有数据处理步骤完成！")
         return True
 
-# 如果直接运行此脚本，则执行全部流程
+# 如果直接运行此脚本，则执行全部流程（--export-json 同时导出分类JSON目录）
 if __name__ == "__main__":
-    manager = HearthstoneDataManager()
-    manager.run_all()
\ No newline at end of file
+    # 单独运行时把项目根目录加入模块搜索路径，以便导入卡牌数据库模块
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    manager = HearthstoneDataManager(export_json='--export-json' in sys.argv[1:])
+    manager.run_all()
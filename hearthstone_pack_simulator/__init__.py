@@ -1 +1,9 @@
-from .pack_simulator import HearthstonePackSimulator
\ No newline at end of file
+# 主窗口依赖 Qt，按需导入，使 hearthstone_pack_simulator.simulator 等核心模块可在无界面环境中使用
+__all__ = ['HearthstonePackSimulator']
+
+
+def __getattr__(name):
+    if name == 'HearthstonePackSimulator':
+        from .pack_simulator import HearthstonePackSimulator
+        return HearthstonePackSimulator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,233 @@
+"""
+抽卡HTML报告
+
+直接根据 SimulationResults 中的紧凑记录生成HTML报告，与界面控件无关。
+报告按扩展包分节（<details> 可折叠），卡包较多时再按 PAGE_SIZE 分页折叠；
+每页拼接完成后立即写入文件，内存占用只与一页的大小有关，生成时间与卡牌数量成线性关系。
+"""
+
+import html
+from datetime import datetime
+
+from config import RARITY_NAMES, RARITY_TAGS, SET_NAMES
+
+PAGE_SIZE = 1000           # 每个折叠分页包含的卡包数量
+OPEN_PACK_LIMIT = 1000     # 总包数不超过该值时默认展开所有扩展包（便于直接打印）
+RARITY_ORDER = ['LEGENDARY', 'EPIC', 'RARE', 'COMMON']
+RARITY_CSS_CLASSES = {
+    'LEGENDARY': 'legendary',
+    'EPIC': 'epic',
+    'RARE': 'rare',
+    'COMMON': 'common',
+}
+
+HTML_HEAD = """<!DOCTYPE HTML>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>炉石传说抽卡报告</title>
+    <style>
+        body {
+            font-family: 'Microsoft YaHei', Arial, sans-serif;
+            line-height: 1.5;
+            margin: 20px;
+            background-color: #f5f5f5;
+        }
+        .report-container {
+            max-width: 1000px;
+            margin: 0 auto;
+            background-color: white;
+            padding: 20px;
+            box-shadow: 0 0 10px rgba(0,0,0,0.1);
+            border-radius: 5px;
+        }
+        h1 {
+            color: #1E6BB8;
+            text-align: center;
+            margin-bottom: 30px;
+        }
+        .pack-title {
+            font-weight: bold;
+            margin: 10px 0 5px 0;
+            background-color: #f0f0f0;
+            padding: 5px;
+            border-radius: 3px;
+        }
+        .expansion-title {
+            font-size: 20px;
+            font-weight: bold;
+            margin: 20px 0 10px 0;
+            padding-bottom: 5px;
+            border-bottom: 1px solid #ddd;
+            color: #333;
+        }
+        .card {
+            margin-bottom: 5px;
+            padding: 3px;
+            border-radius: 3px;
+        }
+        .legendary {
+            color: #FF7D0A !important;
+            font-weight: bold;
+        }
+        .epic {
+            color: #A335EE !important;
+            font-weight: bold;
+        }
+        .rare {
+            color: #0070DD !important;
+        }
+        .common {
+            color: #888888 !important;
+        }
+        .statistics {
+            margin-top: 30px;
+            background-color: #f9f9f9;
+            padding: 15px;
+            border-radius: 5px;
+        }
+        .timestamp {
+            text-align: right;
+            color: #999;
+            font-size: 12px;
+            margin-top: 20px;
+        }
+        details {
+            margin: 5px 0;
+        }
+        summary {
+            cursor: pointer;
+        }
+        .page-title {
+            font-size: 14px;
+            color: #555;
+            margin: 5px 0;
+        }
+        /* 打印时的样式 */
+        @media print {
+            body {
+                background-color: white;
+                margin: 0;
+            }
+            .report-container {
+                box-shadow: none;
+                max-width: 100%;
+            }
+            .legendary {
+                color: #FF7D0A !important;
+                -webkit-print-color-adjust: exact !important;
+                print-color-adjust: exact !important;
+            }
+            .epic {
+                color: #A335EE !important;
+                -webkit-print-color-adjust: exact !important;
+                print-color-adjust: exact !important;
+            }
+            .rare {
+                color: #0070DD !important;
+                -webkit-print-color-adjust: exact !important;
+                print-color-adjust: exact !important;
+            }
+            .common {
+                color: #888888 !important;
+                -webkit-print-color-adjust: exact !important;
+                print-color-adjust: exact !important;
+            }
+        }
+    </style>
+</head>
+<body>
+    <div class="report-container">
+        <h1>炉石传说抽卡报告</h1>
+        <div class="content">
+"""
+
+HTML_TAIL = """
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+
+def _card_line(card_table, row):
+    """生成一张卡牌的HTML行"""
+    rarity = card_table.rarity(row) or 'COMMON'
+    card_name = html.escape(card_table.names[row] or '未知卡牌')
+    localized_rarity = RARITY_NAMES.get(rarity, rarity)
+    rarity_tag = RARITY_TAGS.get(rarity, "【灰】")
+    css_class = RARITY_CSS_CLASSES.get(rarity, 'common')
+    return f'<div class="card {css_class}">  {rarity_tag}{card_name} ({localized_rarity})</div>\n'
+
+
+def _statistics_html(results):
+    """生成统计信息的HTML"""
+    rarity_counts = results.rarity_counts()
+    total_cards = sum(rarity_counts.values())
+    parts = ['<div class="statistics-title">抽卡统计</div>\n', '<div class="statistics">\n',
+             f'<div>总计抽取: {results.total_packs}个卡包 ({total_cards}张卡牌)</div>\n',
+             '<div>稀有度分布:</div>\n']
+    sorted_rarities = sorted(rarity_counts, key=lambda x: RARITY_ORDER.index(x) if x in RARITY_ORDER else 999)
+    for rarity in sorted_rarities:
+        count = rarity_counts[rarity]
+        css_class = RARITY_CSS_CLASSES.get(rarity, 'common')
+        parts.append(f'<div class="card {css_class}">  {RARITY_TAGS.get(rarity, "【灰】")}'
+                     f'{RARITY_NAMES.get(rarity, rarity)}: {count}张 ({count / total_cards * 100:.2f}%)</div>\n')
+    parts.append('</div>\n')
+    return ''.join(parts)
+
+
+def write_pack_html_report(path, results, page_size=PAGE_SIZE, open_limit=OPEN_PACK_LIMIT):
+    """
+    将抽卡结果流式写入HTML报告
+
+    Args:
+        path: 报告文件路径
+        results: SimulationResults
+        page_size: 每个折叠分页包含的卡包数量
+        open_limit: 总包数不超过该值时默认展开所有扩展包
+
+    Returns:
+        str: 报告文件路径
+    """
+    card_table = results.card_table
+    # 卡牌行号 -> HTML行，每张卡只格式化一次
+    card_lines = {}
+    expand = ' open' if results.total_packs <= open_limit else ''
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HTML_HEAD)
+
+        for set_id in results.set_ids:
+            card_rows = results.card_rows(set_id)
+            pack_count = len(card_rows)
+            set_name = html.escape(SET_NAMES.get(set_id, set_id))
+            f.write(f'<details{expand}>\n<summary class="expansion-title">{set_name}（{pack_count} 包）</summary>\n')
+
+            paged = pack_count > page_size
+            for page_start in range(0, pack_count, page_size):
+                page_end = min(page_start + page_size, pack_count)
+                parts = []
+                if paged:
+                    parts.append(f'<details>\n<summary class="page-title">卡包 #{page_start + 1} - #{page_end}</summary>\n')
+                for i, rows in enumerate(card_rows[page_start:page_end].tolist(), page_start + 1):
+                    parts.append(f'<div class="pack-title">卡包 #{i}:</div>\n')
+                    for row in rows:
+                        line = card_lines.get(row)
+                        if line is None:
+                            line = card_lines[row] = _card_line(card_table, row)
+                        parts.append(line)
+                if paged:
+                    parts.append('</details>\n')
+                f.write(''.join(parts))
+
+            f.write('</details>\n')
+
+        if results.total_packs:
+            f.write(_statistics_html(results))
+
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        f.write(f'<div class="timestamp">报告生成时间: {current_time}</div>\n')
+        f.write(HTML_TAIL)
+
+    return path
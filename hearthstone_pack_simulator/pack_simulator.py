@@ -1,22 +1,23 @@
 import os
 import sys
 from datetime import datetime
-from collections import defaultdict
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                           QHBoxLayout, QLabel, QPushButton, QListWidget, 
-                          QListWidgetItem, QAbstractItemView, QTextEdit, 
+                          QListWidgetItem, QAbstractItemView, QTreeView, 
                           QMessageBox, QDialog, QSplitter, QCheckBox)
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor, QFont
+from PyQt5.QtGui import QFont
 
 # 导入自定义模块
 from config import (RARITY_NAMES, RARITY_TAGS, SET_NAMES, CLASS_NAMES,
-                 GUARANTEE_RARE_OR_HIGHER, LEGENDARY_PITY_TIMER,
-                 RARITY_PROBABILITIES)
+                 GUARANTEE_RARE_OR_HIGHER, LEGENDARY_PITY_TIMER)
 # 修改导入路径
 from .simulator.simulator import PackSimulator, CardDataManager
+from .simulator.stream import SimulationResults
 from .ui.text_display_manager import TextDisplayManager
 from .ui.ui_dialogs import PackCountDialog, RarityProbabilityDialog
+from .ui.simulation_worker import SimulationWorker
+from .ui.results_model import SimulationResultsModel, RarityColorDelegate
 from .report_generator import ReportGenerator
 
 # 修改导入路径
@@ -44,7 +45,9 @@ class HearthstonePackSimulator(QMainWindow):
         # 抽卡设置
         self.selected_sets = []
         self.pack_counts = {}
-        self.all_opened_cards = []  # 存储本次模拟中所有抽到的卡牌
+        # 本次模拟中所有抽到的卡牌（紧凑记录，不保存卡牌字典）
+        self.simulation_results = SimulationResults(self.card_manager.card_table)
+        self.simulation_worker = None  # 正在运行的后台模拟线程
         
         # 加载卡牌数据
         self.load_card_data()
@@ -169,16 +172,24 @@ class HearthstonePackSimulator(QMainWindow):
         result_title.setFont(QFont("Sans Serif", 12, QFont.Bold))
         right_layout.addWidget(result_title)
         
-        # 结果文本框
-        self.results_text = QTextEdit()
-        self.results_text.setReadOnly(True)
-        self.results_text.setFont(QFont("Monospace", 10))
-        self.results_text.setMinimumWidth(500)
-        
-        # 设置默认内容
-        self.results_text.setPlainText("选择扩展包并设置卡包数量后，点击「开始抽卡」按钮开始模拟抽卡。")
-        
-        right_layout.addWidget(self.results_text)
+        # 结果列表：扩展包 -> 卡包 -> 卡牌，只渲染可见的行
+        self.results_model = SimulationResultsModel(
+            self.simulation_results, self.display_manager, self.rarity_tags, self)
+        self.results_view = QTreeView()
+        self.results_view.setModel(self.results_model)
+        self.results_view.setItemDelegate(RarityColorDelegate(self.results_view))
+        self.results_view.setHeaderHidden(True)
+        self.results_view.setUniformRowHeights(True)
+        self.results_view.setFont(QFont("Monospace", 10))
+        self.results_view.setMinimumWidth(500)
+        right_layout.addWidget(self.results_view)
+        
+        # 统计信息（设置默认内容）
+        self.stats_label = QLabel("选择扩展包并设置卡包数量后，点击「开始抽卡」按钮开始模拟抽卡。")
+        self.stats_label.setFont(QFont("Monospace", 10))
+        self.stats_label.setWordWrap(True)
+        self.stats_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        right_layout.addWidget(self.stats_label)
         
         # 添加两个面板到分割器
         splitter.addWidget(left_panel)
@@ -252,7 +263,11 @@ class HearthstonePackSimulator(QMainWindow):
             QMessageBox.critical(self, "错误", f"设置卡包数量时出错: {str(e)}")
     
     def start_simulation(self):
-        """开始抽卡模拟"""
+        """开始抽卡模拟（模拟进行中时再次点击则取消）"""
+        if self.simulation_worker is not None:
+            self.cancel_simulation()
+            return
+        
         if not self.selected_sets:
             QMessageBox.information(self, "提示", "请先选择至少一个扩展包")
             return
@@ -262,27 +277,10 @@ class HearthstonePackSimulator(QMainWindow):
             return
         
         try:
-            # 显示正在抽卡的提示
-            self.statusBar().showMessage("正在模拟抽卡，请稍候...")
-            QApplication.processEvents()  # 让UI响应
-            
-            # 清空结果显示和之前的抽卡记录
-            self.results_text.clear()
-            self.all_opened_cards = []
-            
-            # 重置模拟器的传说卡记录
-            self.simulator.reset_legendary_records()
-            
-            # 统计信息
-            total_packs = 0
-            rarity_counts = defaultdict(int)
-            
-            # 进行抽卡模拟
+            # 整理要模拟的扩展包和卡包数量
+            pack_counts = []
             for set_id in self.selected_sets:
-                if set_id not in self.pack_counts:
-                    continue
-                
-                pack_count = self.pack_counts[set_id]
+                pack_count = self.pack_counts.get(set_id, 0)
                 if pack_count <= 0:
                     continue
                 
@@ -291,128 +289,117 @@ class HearthstonePackSimulator(QMainWindow):
                     print(f"警告: 扩展包 {set_id} 数据不存在")
                     continue
                 
-                # 显示扩展包标题（只显示本地化名称，不显示英文ID和括号）
-                set_name = self.display_manager.get_localized_set_name(set_id)
-                self.append_to_results(f"\n=== {set_name} ===\n\n")
-                
-                # 初始化或重置该扩展包的保底计数器
-                if set_id not in self.card_manager.pity_counter:
-                    self.card_manager.pity_counter[set_id] = 0
-                
-                # 模拟抽卡
-                for i in range(pack_count):
-                    QApplication.processEvents()  # 处理事件，保持UI响应
-                    
-                    self.append_to_results(f"卡包 #{i+1}:\n")
-                    
-                    try:
-                        # 抽取5张卡片
-                        cards = self.simulator.simulate_pack_opening(set_id)
-                        
-                        # 显示结果
-                        for card in cards:
-                            rarity = card.get('rarity', 'COMMON')
-                            rarity_counts[rarity] += 1
-                            
-                            # 保存抽到的卡牌用于报告生成
-                            self.all_opened_cards.append(card)
-                            
-                            # 如果是传说卡，记录已抽到
-                            if rarity == 'LEGENDARY':
-                                card_id = card.get('id', '')
-                                if card_id:
-                                    self.simulator.add_legendary_record(set_id, card_id)
-                            
-                            # 根据稀有度添加不同颜色标记
-                            card_name = card.get('name', '未知卡牌')
-                            localized_rarity = self.display_manager.get_localized_rarity_name(rarity)
-                            rarity_tag = self.rarity_tags.get(rarity, "【灰】")
-                            
-                            # 构建卡牌描述（只显示中文稀有度名称）
-                            card_desc = f"  {rarity_tag}{card_name} ({localized_rarity})\n"
-                            
-                            # 计算颜色
-                            color = QColor("black")
-                            if rarity == 'LEGENDARY':
-                                color = QColor("orange")
-                            elif rarity == 'EPIC':
-                                color = QColor("purple")
-                            elif rarity == 'RARE':
-                                color = QColor("blue")
-                            
-                            self.append_to_results(card_desc, color=color)
-                        
-                        self.append_to_results("\n")
-                        
-                        # 更新总卡包数
-                        total_packs += 1
-                        
-                    except Exception as e:
-                        self.append_to_results(f"  抽卡出错: {str(e)}\n", color=QColor("#FF0000"))
-                
-            # 模拟完成
-            if total_packs > 0:
-                # 启用报告生成按钮
-                self.gen_report_btn.setEnabled(True)
-                
-                # 显示文本形式的统计信息
-                # 计算稀有度百分比
-                total_cards = sum(rarity_counts.values())
-                percentages = {k: (v / total_cards * 100) for k, v in rarity_counts.items()}
-                
-                # 按稀有度顺序排序
-                rarity_order = ['LEGENDARY', 'EPIC', 'RARE', 'COMMON']
-                sorted_rarities = sorted(rarity_counts.keys(), key=lambda x: rarity_order.index(x) if x in rarity_order else 999)
-                
-                # 显示统计信息文本
-                stats_text = f"\n\n=== 抽卡统计 ===\n\n"
-                stats_text += f"总计抽取: {total_packs}个卡包 ({total_cards}张卡牌)\n\n"
-                
-                stats_text += "稀有度分布:\n"
-                for rarity in sorted_rarities:
-                    localized_rarity = self.display_manager.get_localized_rarity_name(rarity)
-                    rarity_tag = self.rarity_tags.get(rarity, "【灰】")
-                    stats_text += f"  {rarity_tag}{localized_rarity}: {rarity_counts[rarity]}张 ({percentages[rarity]:.2f}%)\n"
-                
-                # 显示统计文本
-                self.append_to_results(stats_text)
-                
-                # 成功消息
-                self.statusBar().showMessage(f"抽卡模拟完成！共模拟了 {total_packs} 个卡包的开启。")
-            else:
+                pack_counts.append((set_id, pack_count))
+            
+            if not pack_counts:
                 self.statusBar().showMessage("未能模拟任何卡包的开启。")
+                return
+            
+            # 清空结果显示和之前的抽卡记录
+            self.simulation_results.clear()
+            self.results_model.reset()
+            self.stats_label.setText("")
+            
+            # 重置模拟器的传说卡记录
+            self.simulator.reset_legendary_records()
+            
+            # 在后台线程中模拟，结果按固定频率分批送回界面
+            worker = SimulationWorker(self.simulator, pack_counts, parent=self)
+            worker.batches_ready.connect(self.on_simulation_batches)
+            worker.progress.connect(self.on_simulation_progress)
+            worker.simulation_finished.connect(self.on_simulation_finished)
+            worker.simulation_failed.connect(self.on_simulation_failed)
+            self.simulation_worker = worker
+            
+            self.set_simulation_running(True)
+            self.statusBar().showMessage("正在模拟抽卡，请稍候...")
+            worker.start()
                 
         except Exception as e:
             self.statusBar().showMessage("抽卡模拟出错")
             QMessageBox.critical(self, "错误", f"抽卡模拟过程中出错：{str(e)}")
     
-    def append_to_results(self, text, color=None):
-        """添加文本到结果显示区域，可选颜色"""
-        cursor = self.results_text.textCursor()
-        
-        # 保存当前格式
-        current_format = cursor.charFormat()
-        
-        # 如果指定了颜色，设置新格式
-        if color:
-            format = cursor.charFormat()
-            format.setForeground(color)
-            cursor.setCharFormat(format)
-        
-        # 添加文本
-        cursor.insertText(text)
+    def cancel_simulation(self):
+        """取消正在进行的抽卡模拟"""
+        if self.simulation_worker is not None:
+            self.simulation_worker.cancel()
+            self.start_btn.setEnabled(False)
+            self.statusBar().showMessage("正在取消抽卡模拟...")
+    
+    def set_simulation_running(self, running):
+        """根据模拟是否进行中切换按钮状态"""
+        self.start_btn.setText("取消抽卡" if running else "开始抽卡")
+        self.start_btn.setEnabled(True)
+        for button in (self.set_count_btn, self.set_prob_btn, self.gen_report_btn):
+            button.setEnabled(not running)
+        if not running:
+            self.gen_report_btn.setEnabled(self.simulation_results.total_packs > 0)
+    
+    def on_simulation_batches(self, batches):
+        """接收后台线程送来的一组卡包批次，保存并刷新一次结果列表"""
+        for batch in batches:
+            self.simulation_results.consume(batch)
+        self.results_model.refresh()
+    
+    def on_simulation_progress(self, done, total):
+        """更新模拟进度"""
+        if self.simulation_worker is not None and not self.simulation_worker.cancelled:
+            self.statusBar().showMessage(f"正在模拟抽卡: {done}/{total} 个卡包")
+    
+    def on_simulation_finished(self, total_packs, cancelled):
+        """模拟完成（或被取消）后显示统计信息"""
+        self.simulation_worker = None
+        self.set_simulation_running(False)
         
-        # 恢复原始格式
-        if color:
-            cursor.setCharFormat(current_format)
+        if total_packs <= 0:
+            self.statusBar().showMessage("未能模拟任何卡包的开启。")
+            return
         
-        # 滚动到最新内容
-        self.results_text.setTextCursor(cursor)
-        self.results_text.ensureCursorVisible()
+        # 显示文本形式的统计信息
+        # 计算稀有度百分比
+        rarity_counts = self.simulation_results.rarity_counts()
+        total_cards = sum(rarity_counts.values())
+        percentages = {k: (v / total_cards * 100) for k, v in rarity_counts.items()}
+        
+        # 按稀有度顺序排序
+        rarity_order = ['LEGENDARY', 'EPIC', 'RARE', 'COMMON']
+        sorted_rarities = sorted(rarity_counts.keys(), key=lambda x: rarity_order.index(x) if x in rarity_order else 999)
+        
+        # 显示统计信息文本
+        stats_text = f"=== 抽卡统计 ===\n\n"
+        stats_text += f"总计抽取: {total_packs}个卡包 ({total_cards}张卡牌)\n\n"
+        
+        stats_text += "稀有度分布:\n"
+        for rarity in sorted_rarities:
+            localized_rarity = self.display_manager.get_localized_rarity_name(rarity)
+            rarity_tag = self.rarity_tags.get(rarity, "【灰】")
+            stats_text += f"  {rarity_tag}{localized_rarity}: {rarity_counts[rarity]}张 ({percentages[rarity]:.2f}%)\n"
+        
+        # 显示统计文本
+        self.stats_label.setText(stats_text.rstrip())
+        
+        if cancelled:
+            self.statusBar().showMessage(f"抽卡模拟已取消，已模拟 {total_packs} 个卡包的开启。")
+        else:
+            self.statusBar().showMessage(f"抽卡模拟完成！共模拟了 {total_packs} 个卡包的开启。")
+    
+    def on_simulation_failed(self, message):
+        """后台模拟出错"""
+        self.simulation_worker = None
+        self.set_simulation_running(False)
+        self.statusBar().showMessage("抽卡模拟出错")
+        QMessageBox.critical(self, "错误", f"抽卡模拟过程中出错：{message}")
+    
+    def closeEvent(self, event):
+        """关闭窗口前停止后台模拟"""
+        if self.simulation_worker is not None:
+            self.simulation_worker.cancel()
+            self.simulation_worker.wait()
+        super().closeEvent(event)
     
     def generate_report(self):
         """生成抽卡报告"""
-        if not self.all_opened_cards:
+        if not self.simulation_results.total_packs:
             QMessageBox.information(self, "提示", "没有抽卡记录，请先进行抽卡")
             return
         
@@ -428,28 +415,24 @@ class HearthstonePackSimulator(QMainWindow):
             include_core_event = self.include_core_event.isChecked()
             
             # 生成Excel报告
-            excel_report_path = self.report_generator.generate_pack_report(
-                self.all_opened_cards, 
+            excel_report_path = self.report_generator.generate_pack_report_from_counts(
+                self.simulation_results.items(), 
                 timestamp,
                 include_core_event=include_core_event
             )
             
-            # 生成HTML报告
-            html_report_path = os.path.join(os.path.dirname(excel_report_path), f"抽卡报告_{timestamp}.html")
-            
-            # 获取QTextEdit的HTML内容并增强
-            enhanced_html = self.enhance_html_report()
-            
-            # 写入HTML文件
-            with open(html_report_path, 'w', encoding='utf-8') as f:
-                f.write(enhanced_html)
+            # 生成HTML报告（直接从抽卡记录流式写入文件）
+            html_report_path = self.report_generator.generate_pack_html_report(
+                self.simulation_results,
+                timestamp
+            )
             
             # 检查报告是否生成成功
             reports_generated = []
             if excel_report_path and os.path.exists(excel_report_path):
                 reports_generated.append(f"Excel报告: {excel_report_path}")
             
-            if os.path.exists(html_report_path):
+            if html_report_path and os.path.exists(html_report_path):
                 reports_generated.append(f"HTML报告: {html_report_path}")
                 
             if reports_generated:
@@ -483,176 +466,6 @@ class HearthstonePackSimulator(QMainWindow):
             # 确保UI保持响应
             QApplication.processEvents()
             
-    def enhance_html_report(self):
-        """创建增强的HTML报告，保留颜色信息"""
-        # 创建HTML文档头部
-        html_doc = f"""<!DOCTYPE HTML>
-<html>
-<head>
-    <meta charset="utf-8">
-    <title>炉石传说抽卡报告</title>
-    <style>
-        body {{
-            font-family: 'Microsoft YaHei', Arial, sans-serif;
-            line-height: 1.5;
-            margin: 20px;
-            background-color: #f5f5f5;
-        }}
-        .report-container {{
-            max-width: 1000px;
-            margin: 0 auto;
-            background-color: white;
-            padding: 20px;
-            box-shadow: 0 0 10px rgba(0,0,0,0.1);
-            border-radius: 5px;
-        }}
-        h1 {{
-            color: #1E6BB8;
-            text-align: center;
-            margin-bottom: 30px;
-        }}
-        .pack-title {{
-            font-weight: bold;
-            margin: 10px 0 5px 0;
-            background-color: #f0f0f0;
-            padding: 5px;
-            border-radius: 3px;
-        }}
-        .expansion-title {{
-            font-size: 20px;
-            font-weight: bold;
-            margin: 20px 0 10px 0;
-            padding-bottom: 5px;
-            border-bottom: 1px solid #ddd;
-            color: #333;
-        }}
-        .card {{
-            margin-bottom: 5px;
-            padding: 3px;
-            border-radius: 3px;
-        }}
-        .legendary {{
-            color: #FF7D0A !important;
-            font-weight: bold;
-        }}
-        .epic {{
-            color: #A335EE !important;
-            font-weight: bold;
-        }}
-        .rare {{
-            color: #0070DD !important;
-        }}
-        .common {{
-            color: #888888 !important;
-        }}
-        .statistics {{
-            margin-top: 30px;
-            background-color: #f9f9f9;
-            padding: 15px;
-            border-radius: 5px;
-        }}
-        .timestamp {{
-            text-align: right;
-            color: #999;
-            font-size: 12px;
-            margin-top: 20px;
-        }}
-        /* 打印时的样式 */
-        @media print {{
-            body {{
-                background-color: white;
-                margin: 0;
-            }}
-            .report-container {{
-                box-shadow: none;
-                max-width: 100%;
-            }}
-            .legendary {{
-                color: #FF7D0A !important;
-                -webkit-print-color-adjust: exact !important;
-                print-color-adjust: exact !important;
-            }}
-            .epic {{
-                color: #A335EE !important;
-                -webkit-print-color-adjust: exact !important;
-                print-color-adjust: exact !important;
-            }}
-            .rare {{
-                color: #0070DD !important;
-                -webkit-print-color-adjust: exact !important;
-                print-color-adjust: exact !important;
-            }}
-            .common {{
-                color: #888888 !important;
-                -webkit-print-color-adjust: exact !important;
-                print-color-adjust: exact !important;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="report-container">
-        <h1>炉石传说抽卡报告</h1>
-        <div class="content">
-"""
-
-        # 直接从QTextEdit获取内容
-        text_content = self.results_text.toPlainText()
-        
-        # 按行处理文本，并使用原始颜色信息
-        lines = text_content.split('\n')
-        in_statistics = False
-        
-        for line in lines:
-            # 处理扩展包标题
-            if line.strip().startswith('=== ') and line.strip().endswith(' ==='):
-                expansion_name = line.strip(' =').strip()
-                html_doc += f'<div class="expansion-title">{expansion_name}</div>\n'
-                continue
-                
-            # 处理卡包编号
-            if '卡包 #' in line or line.strip().startswith('第 '):
-                html_doc += f'<div class="pack-title">{line}</div>\n'
-                continue
-                
-            # 处理卡牌信息（使用原始颜色标记直接映射到CSS类）
-            if '【橙】' in line:
-                html_doc += f'<div class="card legendary">{line}</div>\n'
-            elif '【紫】' in line:
-                html_doc += f'<div class="card epic">{line}</div>\n'
-            elif '【蓝】' in line:
-                html_doc += f'<div class="card rare">{line}</div>\n'
-            elif '【灰】' in line:
-                html_doc += f'<div class="card common">{line}</div>\n'
-            # 处理统计信息标题
-            elif line.strip() == '=== 抽卡统计 ===':
-                html_doc += f'<div class="statistics-title">{line.strip(" =")}</div>\n'
-                html_doc += '<div class="statistics">\n'
-                in_statistics = True
-                continue
-            # 处理普通行
-            elif line.strip():
-                html_doc += f'<div>{line}</div>\n'
-            else:
-                html_doc += '<br/>\n'
-        
-        # 关闭统计信息区域
-        if in_statistics:
-            html_doc += '</div>\n'
-        
-        # 添加时间戳
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        html_doc += f'<div class="timestamp">报告生成时间: {current_time}</div>\n'
-        
-        # 完成HTML文档
-        html_doc += """
-        </div>
-    </div>
-</body>
-</html>
-"""
-        return html_doc
-    
     def reset_simulator(self):
         """重置模拟器状态"""
         try:
@@ -660,7 +473,8 @@ class HearthstonePackSimulator(QMainWindow):
             self.simulator.reset_legendary_records()
             
             # 清空结果显示
-            self.results_text.clear()
+            self.simulation_results.clear()
+            self.results_model.reset()
             
             # 禁用报告按钮
             self.gen_report_btn.setEnabled(False)
@@ -669,21 +483,24 @@ class HearthstonePackSimulator(QMainWindow):
             self.statusBar().showMessage("模拟器已重置")
             
             # 重新显示欢迎信息
-            self.results_text.setPlainText("选择扩展包并设置卡包数量后，点击「开始抽卡」按钮开始模拟抽卡。")
+            self.stats_label.setText("选择扩展包并设置卡包数量后，点击「开始抽卡」按钮开始模拟抽卡。")
         except Exception as e:
             QMessageBox.critical(self, "错误", f"重置模拟器时出错：{str(e)}")
     
     def configure_rarity_probabilities(self):
         """配置不同稀有度的概率"""
         try:
-            dialog = RarityProbabilityDialog(self, RARITY_PROBABILITIES)
+            # 以模拟器当前使用的概率作为初始值
+            dialog = RarityProbabilityDialog(self, self.simulator.rarity_probabilities)
             result = dialog.exec_()
             
             if result == QDialog.Accepted:
-                # 获取设置的概率并更新到模拟器
+                # 获取设置的概率并更新到模拟器（模拟器会重建一次抽样表）
                 probabilities = dialog.get_probabilities()
-                self.simulator.set_rarity_probabilities(probabilities)
-                self.statusBar().showMessage("已更新稀有度概率设置")
+                if self.simulator.set_rarity_probabilities(probabilities):
+                    self.statusBar().showMessage("已更新稀有度概率设置")
+                else:
+                    self.statusBar().showMessage("稀有度概率设置无效，未更新")
         except Exception as e:
             print(f"设置稀有度概率时出错: {e}")
             QMessageBox.critical(self, "错误", f"设置稀有度概率时出错: {str(e)}")
@@ -1,27 +1,91 @@
 import os
-import pandas as pd
 from collections import defaultdict
 from config import (CLASS_NAMES, EXCEL_COLORS, REPORTS_DIR, RARITY_NAMES, 
-                   SET_NAMES, CARD_TYPE_NAMES, RACE_TRANSLATIONS, 
-                   SPELL_SCHOOL_TRANSLATIONS)
+                   SET_NAMES, CARD_TYPE_NAMES)
+from card_repository import CardRepository
+from card_pool import (format_attack_health, format_race_type, format_description,
+                       write_pool_file)
+from .html_report import write_pack_html_report
+
+# 报告中稀有度的排列顺序
+RARITY_ORDER = ['LEGENDARY', 'EPIC', 'RARE', 'COMMON']
+RARITY_SORT_ORDER = {rarity: i for i, rarity in enumerate(RARITY_ORDER)}
+
+
+def fixed_collection_count(card):
+    """收藏中固定的卡牌数量：传说卡1张，其余2张"""
+    return 1 if card.get('rarity') == 'LEGENDARY' else 2
+
+
+def aggregate_cards_by_class(card_counts=(), fixed_cards=()):
+    """按职业汇总卡牌数量并关联卡牌信息
+    
+    先登记固定数量的卡牌（核心、活动卡等），再累加抽到的数量。卡牌信息通过以卡牌ID为键的索引
+    一次关联（同一ID优先使用抽到的卡牌数据，其次是固定卡牌中第一次出现的数据），
+    总耗时与卡牌数量成线性关系。
+    
+    Args:
+        card_counts: 抽到的 (卡牌, 数量) 可迭代对象
+        fixed_cards: 固定数量的 (卡牌, 覆盖的扩展包ID或None) 可迭代对象
+        
+    Returns:
+        dict: {职业: [带 count 字段的卡牌信息]}，职业和卡牌按首次出现的顺序排列
+    """
+    cards_temp = defaultdict(lambda: defaultdict(int))
+    # 卡牌ID -> (卡牌, 覆盖的扩展包ID)
+    card_index = {}
+    fixed_index = {}
+    
+    for card, set_id in fixed_cards:
+        card_id = card.get('id', '')
+        if not card_id:
+            continue
+        cards_temp[card.get('cardClass', 'NEUTRAL')][card_id] = fixed_collection_count(card)
+        if card_id not in fixed_index:
+            fixed_index[card_id] = (card, set_id)
+    
+    for card, count in card_counts:
+        card_id = card.get('id', '')
+        if not card_id:
+            continue
+        cards_temp[card.get('cardClass', 'NEUTRAL')][card_id] += count
+        if card_id not in card_index:
+            card_index[card_id] = (card, None)
+    
+    # 转换为最终数据结构
+    cards_by_class = {}
+    for class_id, class_counts in cards_temp.items():
+        cards_by_class[class_id] = []
+        for card_id, count in class_counts.items():
+            card, set_id = card_index.get(card_id) or fixed_index[card_id]
+            card_info = card.copy()  # 复制一份避免修改原始数据
+            if set_id is not None:
+                card_info['set'] = set_id
+            card_info['count'] = count
+            cards_by_class[class_id].append(card_info)
+    return cards_by_class
 
 class ReportGenerator:
     """抽卡报告生成器"""
     def __init__(self):
         self.reports_dir = REPORTS_DIR
         os.makedirs(self.reports_dir, exist_ok=True)
-        # 修改导入语句
-        from .simulator.simulator import CardDataManager
-        self.card_manager = CardDataManager()
-        self.card_manager.load_card_data()
+    
+    def get_set_cards(self, set_id):
+        """从卡牌数据库查询扩展包的可收藏卡牌"""
+        return CardRepository.instance().cards_in_set(set_id)
 
     def create_excel_report(self, report_path, cards_by_class):
-        """创建Excel格式的抽卡报告，所有职业卡牌合并到一个表格中"""
+        """创建Excel格式的抽卡报告，所有职业卡牌合并到一个表格中
+        
+        直接使用 xlsxwriter 的 constant_memory 模式逐行写入：每个单元格只写一次，
+        写完的行立即刷新到临时文件，内存占用与行数无关；单元格格式按稀有度预先创建。
+        """
+        # 仅在导出时导入xlsxwriter，避免拖慢核心模块的导入
+        import xlsxwriter
         try:
-            # 创建Excel写入对象
-            with pd.ExcelWriter(report_path, engine='xlsxwriter') as writer:
-                workbook = writer.book
-                
+            workbook = xlsxwriter.Workbook(report_path, {'constant_memory': True})
+            try:
                 # 创建表头格式
                 header_format = workbook.add_format({
                     'bold': True,
@@ -31,33 +95,23 @@ class ReportGenerator:
                     'border': 1
                 })
                 
-                # 创建每种稀有度的单元格格式
-                rarity_formats = {
-                    'LEGENDARY': workbook.add_format({
-                        'bg_color': EXCEL_COLORS['LEGENDARY'],  # 淡橙色
-                        'font_color': 'black',
-                        'border': 1,
-                        'align': 'center'
-                    }),
-                    'EPIC': workbook.add_format({
-                        'bg_color': EXCEL_COLORS['EPIC'],  # 淡紫色
-                        'font_color': 'black',
-                        'border': 1,
-                        'align': 'center'
-                    }),
-                    'RARE': workbook.add_format({
-                        'bg_color': EXCEL_COLORS['RARE'],  # 淡蓝色
-                        'font_color': 'black',
-                        'border': 1,
-                        'align': 'center'
-                    }),
-                    'COMMON': workbook.add_format({
-                        'bg_color': EXCEL_COLORS['COMMON'],  # 淡灰色
+                # 统计工作表的表头格式
+                stats_header_format = workbook.add_format({
+                    'bold': True,
+                    'align': 'center',
+                    'valign': 'top',
+                    'border': 1
+                })
+                
+                # 创建每种稀有度的单元格格式（淡橙色、淡紫色、淡蓝色、淡灰色）
+                rarity_formats = {}
+                for rarity in RARITY_ORDER:
+                    rarity_formats[rarity] = workbook.add_format({
+                        'bg_color': EXCEL_COLORS[rarity],
                         'font_color': 'black',
                         'border': 1,
                         'align': 'center'
                     })
-                }
                 
                 # 默认格式
                 default_format = workbook.add_format({
@@ -65,88 +119,36 @@ class ReportGenerator:
                     'align': 'center'
                 })
                 
-                # 收集所有职业卡牌数据
+                # 创建描述列的字体格式（字体更小）
+                description_format = workbook.add_format({
+                    'font_size': 9,  # 字体大小减小到9
+                    'border': 1,
+                    'align': 'left',  # 靠左对齐更适合长文本
+                    'valign': 'top',
+                    'text_wrap': True
+                })
+                
+                # 收集所有职业卡牌数据，同时按稀有度和卡牌类型统计
                 all_cards_data = []
+                rarity_stats = defaultdict(int)
+                card_type_stats = defaultdict(int)
+                total_cards = 0
                 
                 for class_id, cards in cards_by_class.items():
-                    if not cards:  # 跳过没有卡牌的职业
-                        continue
-                        
                     class_name = CLASS_NAMES.get(class_id, class_id)
-                    
-                    # 按稀有度和名称排序
-                    rarity_order = {'LEGENDARY': 0, 'EPIC': 1, 'RARE': 2, 'COMMON': 3}
-                    sorted_cards = sorted(cards, key=lambda x: (rarity_order.get(x.get('rarity', 'COMMON'), 4), x.get('name', '')))
-                    
-                    # 添加每张卡牌到总列表中
-                    for card in sorted_cards:
-                        name = card.get('name', '未知卡牌')
-                        rarity = card.get('rarity', 'COMMON')
-                        # 转换稀有度为中文
-                        rarity_cn = RARITY_NAMES.get(rarity, rarity)
-                        count = card.get('count', 1)
-                        
-                        # 获取法力消耗
-                        cost = card.get('cost', 0)
-                        
-                        # 获取卡牌类型并转换为中文
-                        card_type = card.get('type', '')
-                        card_type_cn = CARD_TYPE_NAMES.get(card_type, card_type)
-                        
-                        # 获取攻击力和生命值（只对随从有效）
-                        attack_health = ""
-                        if card_type == 'MINION':
-                            attack = card.get('attack', 0)
-                            health = card.get('health', 0)
-                            attack_health = f"{attack}/{health}"
-                        
-                        # 获取种族/类型
-                        race_type = ""
-                        if card_type == 'MINION' and 'races' in card:
-                            races = [RACE_TRANSLATIONS.get(race, race) for race in card['races']]
-                            race_type = '、'.join(races)
-                        elif card_type == 'SPELL' and 'spellSchool' in card:
-                            race_type = SPELL_SCHOOL_TRANSLATIONS.get(card['spellSchool'], card['spellSchool'])
-                        
-                        # 添加卡牌描述
-                        description = card.get('text', '')
-                        # 处理描述中可能的HTML标签
-                        description = description.replace('<b>', '').replace('</b>', '')
-                        description = description.replace('<i>', '').replace('</i>', '')
-                        
-                        # 处理符文消耗
-                        if 'runeCost' in card:
-                            rune_cost = card['runeCost']
-                            rune_text = []
-                            if rune_cost.get('blood', 0) > 0:
-                                rune_text.append(f"{rune_cost['blood']} 红")
-                            if rune_cost.get('frost', 0) > 0:
-                                rune_text.append(f"{rune_cost['frost']} 蓝")
-                            if rune_cost.get('unholy', 0) > 0:
-                                rune_text.append(f"{rune_cost['unholy']} 绿")
-                            if rune_text:
-                                description = f"符文：{', '.join(rune_text)}。\n{description}"
-                        
-                        # 获取卡牌所属的扩展包ID
-                        card_set_id = card.get('set', '')
-                        # 转换扩展包ID为中文名称
-                        card_set = SET_NAMES.get(card_set_id, card_set_id)
-                        
-                        all_cards_data.append([name, class_name, card_set, rarity_cn, cost, card_type_cn, attack_health, race_type, count, description])
-                
-                # 按稀有度排序 (使用原始稀有度英文代码进行排序)
-                rarity_mapping = {RARITY_NAMES['LEGENDARY']: 0, RARITY_NAMES['EPIC']: 1, RARITY_NAMES['RARE']: 2, RARITY_NAMES['COMMON']: 3}
-                all_cards_data.sort(key=lambda x: (rarity_mapping.get(x[3], 4), x[1], x[0]))
+                    for card in cards:
+                        row = self._card_row(card, class_name)
+                        all_cards_data.append(row)
+                        count = row[9]
+                        rarity_stats[row[0]] += count
+                        card_type_stats[card.get('type', '')] += count
+                        total_cards += count
                 
-                # 创建所有卡牌的DataFrame
-                all_cards_df = pd.DataFrame(all_cards_data, columns=['卡牌名称', '职业', '扩展包', '稀有度', '法力值', '卡牌类型', '攻击力/生命值', '种族/类型', '数量', '卡牌描述'])
+                # 按稀有度、职业、名称排序
+                all_cards_data.sort(key=lambda x: (RARITY_SORT_ORDER.get(x[0], 4), x[2], x[1]))
                 
                 # 写入所有卡牌工作表
-                all_cards_df.to_excel(writer, sheet_name='抽卡结果', index=False)
-                all_cards_sheet = writer.sheets['抽卡结果']
-                
-                # 添加表头筛选功能
-                all_cards_sheet.autofilter(0, 0, len(all_cards_data), 9)  # 调整为包含新列
+                all_cards_sheet = workbook.add_worksheet('抽卡结果')
                 
                 # 设置列宽
                 all_cards_sheet.set_column('A:A', 30)  # 卡牌名称列宽
@@ -160,90 +162,30 @@ class ReportGenerator:
                 all_cards_sheet.set_column('I:I', 8)   # 数量列宽
                 all_cards_sheet.set_column('J:J', 70)  # 卡牌描述列宽
                 
-                # 创建描述列的字体格式（字体更小）
-                description_format = workbook.add_format({
-                    'font_size': 9,  # 字体大小减小到9
-                    'border': 1,
-                    'align': 'left',  # 靠左对齐更适合长文本
-                    'valign': 'top',
-                    'text_wrap': True
-                })
+                # 添加表头筛选功能
+                all_cards_sheet.autofilter(0, 0, len(all_cards_data), 9)
                 
-                # 应用格式到表头
-                for col_num, value in enumerate(['卡牌名称', '职业', '扩展包', '稀有度', '法力值', '卡牌类型', '攻击力/生命值', '种族/类型', '数量', '卡牌描述']):
-                    all_cards_sheet.write(0, col_num, value, header_format)
+                all_cards_sheet.write_row(0, 0, ['卡牌名称', '职业', '扩展包', '稀有度', '法力值', '卡牌类型', '攻击力/生命值', '种族/类型', '数量', '卡牌描述'], header_format)
                 
-                # 应用稀有度颜色格式到数据行
-                for row_num, (name, class_name, card_set, rarity_cn, cost, card_type_cn, attack_health, race_type, count, description) in enumerate(all_cards_data):
-                    # 根据中文稀有度查找原始稀有度代码
-                    original_rarity = next((k for k, v in RARITY_NAMES.items() if v == rarity_cn), None)
-                    if not original_rarity:
-                        # 回退到默认稀有度格式
-                        original_rarity = 'COMMON'
-                    
-                    cell_format = rarity_formats.get(original_rarity, default_format)
-                    
-                    # 写入数据并应用格式
-                    all_cards_sheet.write(row_num + 1, 0, name, cell_format)
-                    all_cards_sheet.write(row_num + 1, 1, class_name, cell_format)
-                    all_cards_sheet.write(row_num + 1, 2, card_set, cell_format)
-                    all_cards_sheet.write(row_num + 1, 3, rarity_cn, cell_format)
-                    all_cards_sheet.write(row_num + 1, 4, cost, cell_format)
-                    all_cards_sheet.write(row_num + 1, 5, card_type_cn, cell_format)
-                    all_cards_sheet.write(row_num + 1, 6, attack_health, cell_format)  # 攻击力/生命值
-                    all_cards_sheet.write(row_num + 1, 7, race_type, cell_format)  # 种族/类型
-                    all_cards_sheet.write(row_num + 1, 8, count, cell_format)
+                # 逐行写入数据，单元格格式按稀有度选择
+                for row_num, row in enumerate(all_cards_data, 1):
+                    cell_format = rarity_formats.get(row[0], rarity_formats['COMMON'])
+                    all_cards_sheet.write_row(row_num, 0, row[1:10], cell_format)
                     # 对描述列使用特殊格式
-                    all_cards_sheet.write(row_num + 1, 9, description, description_format)
+                    all_cards_sheet.write(row_num, 9, row[10], description_format)
                 
-                # 统计工作表 - 按稀有度统计
-                rarity_stats = defaultdict(int)
-                total_cards = 0
-                
-                for class_cards in cards_by_class.values():
-                    for card in class_cards:
-                        rarity = card.get('rarity', 'COMMON')
-                        count = card.get('count', 1)
-                        rarity_stats[rarity] += count
-                        total_cards += count
-                
-                # 创建稀有度统计数据（使用中文稀有度名称）
-                rarity_data = []
-                for rarity in ['LEGENDARY', 'EPIC', 'RARE', 'COMMON']:
+                # 创建稀有度统计工作表（使用中文稀有度名称）
+                rarity_sheet = workbook.add_worksheet('稀有度统计')
+                rarity_sheet.set_column('A:C', 15)
+                rarity_sheet.write_row(0, 0, ['稀有度', '数量', '百分比'], stats_header_format)
+                row_num = 1
+                for rarity in RARITY_ORDER:
                     if rarity in rarity_stats:
                         count = rarity_stats[rarity]
                         percentage = (count / total_cards) * 100 if total_cards > 0 else 0
-                        # 使用中文稀有度名称
-                        rarity_cn = RARITY_NAMES.get(rarity, rarity)
-                        rarity_data.append([rarity_cn, count, f"{percentage:.2f}%"])
-                
-                # 创建稀有度统计工作表
-                rarity_df = pd.DataFrame(rarity_data, columns=['稀有度', '数量', '百分比'])
-                rarity_df.to_excel(writer, sheet_name='稀有度统计', index=False)
-                
-                rarity_sheet = writer.sheets['稀有度统计']
-                rarity_sheet.set_column('A:C', 15)
-                
-                # 为稀有度统计应用格式
-                for row_num, (rarity_cn, _, _) in enumerate(rarity_data):
-                    # 查找对应的原始稀有度代码
-                    original_rarity = next((k for k, v in RARITY_NAMES.items() if v == rarity_cn), None)
-                    if not original_rarity:
-                        original_rarity = 'COMMON'
-                        
-                    cell_format = rarity_formats.get(original_rarity, default_format)
-                    
-                    for col_num in range(3):
-                        rarity_sheet.write(row_num + 1, col_num, rarity_df.iloc[row_num, col_num], cell_format)
-                
-                # 创建卡牌类型统计工作表
-                card_type_stats = defaultdict(int)
-                
-                for class_cards in cards_by_class.values():
-                    for card in class_cards:
-                        card_type = card.get('type', '')
-                        count = card.get('count', 1)
-                        card_type_stats[card_type] += count
+                        rarity_sheet.write_row(row_num, 0, [RARITY_NAMES.get(rarity, rarity), count, f"{percentage:.2f}%"],
+                                               rarity_formats[rarity])
+                        row_num += 1
                 
                 # 创建卡牌类型统计数据
                 card_type_data = []
@@ -260,24 +202,13 @@ class ReportGenerator:
                 
                 # 创建卡牌类型统计工作表
                 if card_type_data:
-                    card_type_df = pd.DataFrame(card_type_data, columns=['卡牌类型', '数量', '百分比'])
-                    card_type_df.to_excel(writer, sheet_name='卡牌类型统计', index=False)
-                    
-                    card_type_sheet = writer.sheets['卡牌类型统计']
+                    card_type_sheet = workbook.add_worksheet('卡牌类型统计')
                     card_type_sheet.set_column('A:C', 15)
-                    
-                    # 应用格式
-                    for row_num in range(len(card_type_data)):
-                        for col_num in range(3):
-                            card_type_sheet.write(row_num + 1, col_num, card_type_df.iloc[row_num, col_num], default_format)
-        
-            # 文件保存后释放资源
-            workbook = None
-            writer = None
-            
-            # 强制垃圾回收
-            import gc
-            gc.collect()
+                    card_type_sheet.write_row(0, 0, ['卡牌类型', '数量', '百分比'], stats_header_format)
+                    for row_num, row in enumerate(card_type_data, 1):
+                        card_type_sheet.write_row(row_num, 0, row, default_format)
+            finally:
+                workbook.close()
             
             return True
             
@@ -287,6 +218,54 @@ class ReportGenerator:
             traceback.print_exc()
             raise e
     
+    def write_pool_file(self, report_path, cards_by_class):
+        """在报告旁边写卡池文件（Parquet 或 JSONL），失败时只打印错误，不影响Excel报告
+        
+        Args:
+            report_path: 报告文件路径
+            cards_by_class: {职业: [带 count 字段的卡牌信息]}
+            
+        Returns:
+            str: 卡池文件路径，失败时返回None
+        """
+        try:
+            return write_pool_file(report_path, cards_by_class)
+        except Exception as e:
+            print(f"写入卡池文件时出错: {e}")
+            return None
+    
+    @staticmethod
+    def _card_row(card, class_name):
+        """
+        生成一张卡牌在抽卡结果表中的一行
+        
+        Returns:
+            tuple: (稀有度代码, 卡牌名称, 职业, 扩展包, 稀有度, 法力值, 卡牌类型, 攻击力/生命值, 种族/类型, 数量, 卡牌描述)
+        """
+        name = card.get('name', '未知卡牌')
+        rarity = card.get('rarity', 'COMMON')
+        # 转换稀有度为中文
+        rarity_cn = RARITY_NAMES.get(rarity, rarity)
+        count = card.get('count', 1)
+        
+        # 获取法力消耗
+        cost = card.get('cost', 0)
+        
+        # 获取卡牌类型并转换为中文
+        card_type = card.get('type', '')
+        card_type_cn = CARD_TYPE_NAMES.get(card_type, card_type)
+        
+        # 攻击力/生命值（只对随从有效）、种族/派系、带符文消耗的描述
+        attack_health = format_attack_health(card)
+        race_type = format_race_type(card)
+        description = format_description(card)
+        
+        # 获取卡牌所属的扩展包ID并转换为中文名称
+        card_set_id = card.get('set', '')
+        card_set = SET_NAMES.get(card_set_id, card_set_id)
+        
+        return (rarity, name, class_name, card_set, rarity_cn, cost, card_type_cn, attack_health, race_type, count, description)
+    
     def generate_pack_report(self, all_opened_cards, timestamp=None, include_core_event=False):
         """生成抽卡报告数据
         
@@ -295,6 +274,34 @@ class ReportGenerator:
             timestamp: 可选时间戳，用于文件名
             include_core_event: 是否包含核心和活动卡
             
+        Returns:
+            str: 报告文件路径
+        """
+        # 按卡牌ID合并数量，保留第一次出现的卡牌数据
+        opened_counts = {}
+        for card in all_opened_cards:
+            card_id = card.get('id', '')
+            if not card_id:
+                continue
+            if card_id in opened_counts:
+                opened_counts[card_id][1] += 1
+            else:
+                opened_counts[card_id] = [card, 1]
+        
+        return self.generate_pack_report_from_counts(
+            opened_counts.values(), timestamp, include_core_event=include_core_event)
+    
+    def generate_pack_report_from_counts(self, card_counts, timestamp=None, include_core_event=False):
+        """根据每张卡牌的数量生成抽卡报告
+        
+        流式模拟（例如 CardCounter）只保存每张卡牌的数量，不保存每一张抽到的卡牌，
+        可以直接使用该方法生成报告。
+        
+        Args:
+            card_counts: (卡牌, 数量) 的可迭代对象
+            timestamp: 可选时间戳，用于文件名
+            include_core_event: 是否包含核心和活动卡
+            
         Returns:
             str: 报告文件路径
         """
@@ -309,72 +316,44 @@ class ReportGenerator:
         report_filename = f"抽卡报告_{timestamp}.xlsx"
         report_path = os.path.join(self.reports_dir, report_filename)
         
-        # 按职业分类卡牌并统计数量
-        cards_by_class = {}
-        # 先按职业和ID分类卡牌
-        cards_temp = defaultdict(lambda: defaultdict(int))
-        
-        # 使用副本避免修改原始数据
-        cards_copy = list(all_opened_cards)
-        
-        # 如果需要包含核心和活动卡
+        # 如果需要包含核心和活动卡，按固定数量（传说1张，其余2张）加入
+        fixed_cards = []
         if include_core_event:
-            # 从卡牌管理器中获取核心和活动卡
-            core_cards = self.card_manager.get_cards_by_set('CORE')
-            event_cards = self.card_manager.get_cards_by_set('EVENT')
-            
-            # 预先处理核心和活动卡，并设置固定数量
-            for card_list, set_id in [(core_cards, 'CORE'), (event_cards, 'EVENT')]:
-                for card in card_list:
-                    card_class = card.get('cardClass', 'NEUTRAL')
-                    card_id = card.get('id', '')
-                    if not card_id:
-                        continue
-                    
-                    # 根据稀有度设置固定数量
-                    if card.get('rarity') == 'LEGENDARY':
-                        # 传说卡设置为1张
-                        fixed_count = 1
-                    else:
-                        # 非传说卡设置为2张
-                        fixed_count = 2
-                    
-                    # 直接设置到cards_temp中
-                    cards_temp[card_class][card_id] = fixed_count
-                    
-                    # 将卡牌添加到cards_copy以便后续提取卡牌信息
-                    card_copy = card.copy()
-                    card_copy['set'] = set_id
-                    cards_copy.append(card_copy)
-        
-        # 处理常规抽到的卡牌
-        for card in all_opened_cards:  # 注意这里使用原始的all_opened_cards而不是cards_copy
-            card_class = card.get('cardClass', 'NEUTRAL')
-            card_id = card.get('id', '')
-            if not card_id:
-                continue
-            cards_temp[card_class][card_id] += 1
+            for set_id in ('CORE', 'EVENT'):
+                fixed_cards.extend((card, set_id) for card in self.get_set_cards(set_id))
         
-        # 转换为最终数据结构
-        for class_id, card_counts in cards_temp.items():
-            cards_by_class[class_id] = []
-            for card_id, count in card_counts.items():
-                # 找到该卡牌的完整信息
-                card_info = None
-                for card in cards_copy:
-                    if card.get('id') == card_id:
-                        card_info = card.copy()  # 复制一份避免修改原始数据
-                        break
-                if card_info:
-                    card_info['count'] = count
-                    cards_by_class[class_id].append(card_info)
+        # 按职业分类卡牌并统计数量
+        cards_by_class = aggregate_cards_by_class(card_counts, fixed_cards)
         
-        # 创建Excel报告
+        # 创建Excel报告，并在旁边写一份卡池文件供卡组构建器快速导入
         if self.create_excel_report(report_path, cards_by_class):
+            self.write_pool_file(report_path, cards_by_class)
             return report_path
         
         return None 
 
+    def generate_pack_html_report(self, simulation_results, timestamp=None):
+        """生成抽卡HTML报告（逐包列出抽到的卡牌）
+        
+        Args:
+            simulation_results: SimulationResults，模拟得到的紧凑抽卡记录
+            timestamp: 可选时间戳，用于文件名
+            
+        Returns:
+            str: 报告文件路径，失败时返回None
+        """
+        import datetime
+        
+        if timestamp is None:
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        report_path = os.path.join(self.reports_dir, f"抽卡报告_{timestamp}.html")
+        try:
+            return write_pack_html_report(report_path, simulation_results)
+        except Exception as e:
+            print(f"生成HTML报告时出错: {e}")
+            return None
+    
     def generate_transmog_report(self, selected_sets, timestamp=None, include_core_event=False):
         """生成幻变卡牌报告
         
@@ -397,82 +376,19 @@ class ReportGenerator:
         report_filename = f"幻变卡牌报告_{timestamp}.xlsx"
         report_path = os.path.join(self.reports_dir, report_filename)
         
-        # 按职业分类卡牌
-        cards_by_class = {}
-        cards_temp = defaultdict(lambda: defaultdict(int))
-        
-        # 处理选中的扩展包卡牌
-        for set_id in selected_sets:
-            cards = self.card_manager.get_cards_by_set(set_id)
-            for card in cards:
-                card_class = card.get('cardClass', 'NEUTRAL')
-                card_id = card.get('id', '')
-                if not card_id:
-                    continue
-                
-                # 根据稀有度设置固定数量
-                if card.get('rarity') == 'LEGENDARY':
-                    # 传说卡设置为1张
-                    fixed_count = 1
-                else:
-                    # 非传说卡设置为2张
-                    fixed_count = 2
-                
-                # 直接设置到cards_temp中
-                cards_temp[card_class][card_id] = fixed_count
-        
+        # 所选扩展包的卡牌按固定数量（传说1张，其余2张）加入
+        set_ids = list(selected_sets)
         # 如果需要包含核心和活动卡
         if include_core_event:
-            # 从卡牌管理器中获取核心和活动卡
-            core_cards = self.card_manager.get_cards_by_set('CORE')
-            event_cards = self.card_manager.get_cards_by_set('EVENT')
-            
-            # 预先处理核心和活动卡，并设置固定数量
-            for card_list in [core_cards, event_cards]:
-                for card in card_list:
-                    card_class = card.get('cardClass', 'NEUTRAL')
-                    card_id = card.get('id', '')
-                    if not card_id:
-                        continue
-                    
-                    # 根据稀有度设置固定数量
-                    if card.get('rarity') == 'LEGENDARY':
-                        # 传说卡设置为1张
-                        fixed_count = 1
-                    else:
-                        # 非传说卡设置为2张
-                        fixed_count = 2
-                    
-                    # 直接设置到cards_temp中
-                    cards_temp[card_class][card_id] = fixed_count
-        
-        # 收集所有卡牌信息
-        all_cards = []
-        for set_id in selected_sets:
-            cards = self.card_manager.get_cards_by_set(set_id)
-            for card in cards:
-                all_cards.append(card)
-        
-        if include_core_event:
-            all_cards.extend(core_cards)
-            all_cards.extend(event_cards)
+            set_ids += ['CORE', 'EVENT']
+        fixed_cards = [(card, None) for set_id in set_ids for card in self.get_set_cards(set_id)]
         
-        # 转换为最终数据结构
-        for class_id, card_counts in cards_temp.items():
-            cards_by_class[class_id] = []
-            for card_id, count in card_counts.items():
-                # 找到该卡牌的完整信息
-                card_info = None
-                for card in all_cards:
-                    if card.get('id') == card_id:
-                        card_info = card.copy()  # 复制一份避免修改原始数据
-                        break
-                if card_info:
-                    card_info['count'] = count
-                    cards_by_class[class_id].append(card_info)
+        # 按职业分类卡牌
+        cards_by_class = aggregate_cards_by_class(fixed_cards=fixed_cards)
         
-        # 创建Excel报告
+        # 创建Excel报告，并在旁边写一份卡池文件供卡组构建器快速导入
         if self.create_excel_report(report_path, cards_by_class):
+            self.write_pool_file(report_path, cards_by_class)
             return report_path
         
         return None
\ No newline at end of file
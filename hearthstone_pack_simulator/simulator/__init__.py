@@ -1 +1,4 @@
-from .simulator import PackSimulator, CardDataManager
\ No newline at end of file
+from .simulator import PackSimulator, CardDataManager
+from .state import SimulationState
+from .monte_carlo import MonteCarloPoolSimulator, PoolStatistics
+from .stream import PackStream, PackBatch, PackConsumer, RarityCounter, CardCounter, SimulationResults
@@ -0,0 +1,160 @@
+import sys
+
+import numpy as np
+
+from .rarity_sampler import RARITY_CODES
+
+MISSING_CODE = -1  # 分类列中缺少该字段
+MISSING_INT = -1   # 整数列中缺少该字段
+
+
+class CardTable:
+    """列式卡牌表
+
+    加载时构建一次，每张卡牌对应一个整数行号。常用字段按列存放：
+    字符串列（id、name）使用驻留字符串，dbfId、费用以及稀有度/职业/扩展包编码
+    使用 NumPy 数组；其余字段按字段名分列保存。抽卡和统计只使用行号，
+    卡牌字典只在需要显示时通过 card()/cards() 生成。
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        self.dbf_ids = np.zeros(0, dtype=np.int32)
+        self.costs = np.zeros(0, dtype=np.int16)
+        self.rarity_codes = np.zeros(0, dtype=np.int8)
+        self.class_codes = np.zeros(0, dtype=np.int16)
+        self.set_codes = np.zeros(0, dtype=np.int16)
+
+        # 分类列的编码表，稀有度编码与 RARITY_CODES 保持一致
+        self.rarity_names = list(RARITY_CODES)
+        self.class_names = []
+        self.set_names = []
+        self._category_index = {
+            'rarity': {name: code for code, name in enumerate(self.rarity_names)},
+            'cardClass': {},
+            'set': {},
+        }
+
+        # 其它字段：字段名 -> 每行的值（缺少该字段时为None）
+        self.extra_columns = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _category_code(self, field, names, value):
+        """获取分类值的编码，新值追加到编码表"""
+        if value is None:
+            return MISSING_CODE
+        index = self._category_index[field]
+        code = index.get(value)
+        if code is None:
+            code = len(names)
+            names.append(value)
+            index[value] = code
+        return code
+
+    @staticmethod
+    def _intern(value):
+        return sys.intern(value) if isinstance(value, str) else value
+
+    def add_cards(self, cards):
+        """
+        追加卡牌到表中
+
+        Args:
+            cards: 卡牌字典列表
+
+        Returns:
+            numpy.ndarray: 新卡牌的行号数组
+        """
+        start = len(self.ids)
+        count = len(cards)
+        dbf_ids = np.full(count, MISSING_INT, dtype=np.int32)
+        costs = np.full(count, MISSING_INT, dtype=np.int16)
+        rarity_codes = np.empty(count, dtype=np.int8)
+        class_codes = np.empty(count, dtype=np.int16)
+        set_codes = np.empty(count, dtype=np.int16)
+
+        core_fields = ('id', 'name', 'dbfId', 'cost', 'rarity', 'cardClass', 'set')
+        for i, card in enumerate(cards):
+            row = start + i
+            self.ids.append(self._intern(card.get('id')))
+            self.names.append(self._intern(card.get('name')))
+
+            # 非整数值（理论上不会出现）放到其它字段中原样保存
+            for field, column in (('dbfId', dbf_ids), ('cost', costs)):
+                value = card.get(field)
+                if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+                    column[i] = value
+                elif value is not None:
+                    self._set_extra(field, row, value)
+
+            rarity_codes[i] = self._category_code('rarity', self.rarity_names, card.get('rarity'))
+            class_codes[i] = self._category_code('cardClass', self.class_names, card.get('cardClass'))
+            set_codes[i] = self._category_code('set', self.set_names, card.get('set'))
+
+            for field, value in card.items():
+                if field not in core_fields:
+                    self._set_extra(field, row, self._intern(value))
+
+        self.dbf_ids = np.concatenate((self.dbf_ids, dbf_ids))
+        self.costs = np.concatenate((self.costs, costs))
+        self.rarity_codes = np.concatenate((self.rarity_codes, rarity_codes))
+        self.class_codes = np.concatenate((self.class_codes, class_codes))
+        self.set_codes = np.concatenate((self.set_codes, set_codes))
+
+        # 让所有字段列与行数保持一致
+        for column in self.extra_columns.values():
+            column.extend([None] * (len(self.ids) - len(column)))
+
+        return np.arange(start, start + count, dtype=np.int32)
+
+    def _set_extra(self, field, row, value):
+        column = self.extra_columns.get(field)
+        if column is None:
+            column = self.extra_columns[field] = []
+        if len(column) <= row:
+            column.extend([None] * (row + 1 - len(column)))
+        column[row] = value
+
+    def rarity(self, row):
+        """获取某行的稀有度名称，缺少时返回None"""
+        code = int(self.rarity_codes[row])
+        return self.rarity_names[code] if code != MISSING_CODE else None
+
+    def card(self, row):
+        """
+        生成某行的卡牌字典（仅在显示或导出时使用）
+
+        Args:
+            row: 行号
+
+        Returns:
+            dict: 卡牌数据
+        """
+        row = int(row)
+        card = {}
+        if self.ids[row] is not None:
+            card['id'] = self.ids[row]
+        if self.dbf_ids[row] != MISSING_INT:
+            card['dbfId'] = int(self.dbf_ids[row])
+        if self.names[row] is not None:
+            card['name'] = self.names[row]
+        for field, names, codes in (('set', self.set_names, self.set_codes),
+                                    ('cardClass', self.class_names, self.class_codes),
+                                    ('rarity', self.rarity_names, self.rarity_codes)):
+            code = int(codes[row])
+            if code != MISSING_CODE:
+                card[field] = names[code]
+        if self.costs[row] != MISSING_INT:
+            card['cost'] = int(self.costs[row])
+        for field, column in self.extra_columns.items():
+            value = column[row]
+            if value is not None:
+                card[field] = value
+        return card
+
+    def cards(self, rows):
+        """生成多行的卡牌字典列表"""
+        return [self.card(row) for row in np.asarray(rows).ravel().tolist()]
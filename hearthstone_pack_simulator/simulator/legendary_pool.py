@@ -0,0 +1,98 @@
+import random
+
+
+class LegendaryPool:
+    """某个扩展包的传说卡抽取池
+
+    传说卡行号保存在数组中，前 unopened 个为尚未抽到的传说。
+    记录抽到的传说时把它与未抽到区间的最后一个元素交换，并缩小区间（swap-remove），
+    因此抽取未抽到的传说和记录已抽到的传说都是 O(1)。重置时按相反顺序撤销记录过的交换，
+    开销只与上次重置后记录的传说数量有关，并且数组恢复为初始顺序，
+    同一随机数序列在重置后总能得到相同的结果。
+    """
+
+    def __init__(self, rows, card_ids):
+        """
+        Args:
+            rows: 该扩展包所有传说卡的行号
+            card_ids: 与 rows 对应的卡牌ID
+        """
+        self.rows = [int(row) for row in rows]
+        self.card_ids = list(card_ids)
+        # 卡牌ID -> 当前在数组中的位置
+        self.positions = {card_id: i for i, card_id in enumerate(self.card_ids) if card_id}
+        self.unopened = len(self.rows)
+        # 记录时发生交换的位置，用于重置时回退
+        self._swaps = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def all_opened(self):
+        """是否已抽到所有传说"""
+        return self.unopened == 0
+
+    def draw(self, rand=random.random):
+        """
+        抽取一张传说卡的行号（不记录）
+
+        还有未抽到的传说时只在其中抽取，否则在所有传说中随机抽取
+
+        Args:
+            rand: 返回 [0, 1) 随机数的函数
+
+        Returns:
+            int: 卡牌行号，没有传说卡时返回None
+        """
+        return self.draw_at(rand())
+
+    def draw_at(self, value):
+        """根据给定的 [0, 1) 随机数抽取一张传说卡的行号（不记录），没有传说卡时返回None"""
+        if not self.rows:
+            return None
+        size = self.unopened or len(self.rows)
+        return self.rows[int(value * size)]
+
+    def record(self, card_id):
+        """记录已抽到的传说卡（不属于该池或已记录过的ID会被忽略）"""
+        position = self.positions.get(card_id)
+        if position is None or position >= self.unopened:
+            return
+        last = self.unopened - 1
+        self._swap(position, last)
+        self._swaps.append(position)
+        self.unopened = last
+
+    def _swap(self, i, j):
+        """交换两个位置的传说卡"""
+        if i == j:
+            return
+        rows, card_ids = self.rows, self.card_ids
+        rows[i], rows[j] = rows[j], rows[i]
+        card_ids[i], card_ids[j] = card_ids[j], card_ids[i]
+        if card_ids[i]:
+            self.positions[card_ids[i]] = i
+        if card_ids[j]:
+            self.positions[card_ids[j]] = j
+
+    def recorded_ids(self):
+        """按记录顺序返回已抽到的传说卡ID（每次记录都把卡牌换到未抽到区间的末尾）"""
+        return [self.card_ids[i] for i in range(len(self.rows) - 1, self.unopened - 1, -1)]
+
+    def copy(self):
+        """复制抽取池（用于分叉模拟状态）"""
+        pool = LegendaryPool.__new__(LegendaryPool)
+        pool.rows = list(self.rows)
+        pool.card_ids = list(self.card_ids)
+        pool.positions = dict(self.positions)
+        pool.unopened = self.unopened
+        pool._swaps = list(self._swaps)
+        return pool
+
+    def reset(self):
+        """重置为所有传说都未抽到（按相反顺序撤销交换，恢复初始顺序）"""
+        swaps = self._swaps
+        while swaps:
+            self._swap(swaps.pop(), self.unopened)
+            self.unopened += 1
@@ -0,0 +1,332 @@
+"""
+现开卡池蒙特卡洛模拟
+
+将大量相互独立的卡池模拟（例如 10 万个 40 包卡池）切分成固定大小的分片，
+分发到进程池中执行。每个分片使用由种子派生的独立随机数流，
+因此同一个种子的结果与进程数量、分片完成顺序都无关。
+"""
+
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .rarity_sampler import RARITY_CODES, LEGENDARY_CODE
+from .simulator import CardDataManager, PackSimulator
+
+DEFAULT_SHARD_SIZE = 1000  # 每个分片模拟的卡池数量
+
+
+def _add_histogram(a, b):
+    """按下标相加两个长度可能不同的直方图"""
+    if len(a) < len(b):
+        a, b = b, a
+    result = a.copy()
+    result[:len(b)] += b
+    return result
+
+
+class PoolStatistics:
+    """卡池模拟的统计结果，可与其它分片的结果合并
+
+    Attributes:
+        pools: 已模拟的卡池数量
+        class_names: 职业名称列表，与各统计数组的职业下标对应
+        rarity_totals: 各稀有度的卡牌总数，下标为 RARITY_CODES 编码
+        rarity_histograms: 稀有度 -> 直方图，第 k 项为该稀有度恰好出现 k 张的卡池数
+        class_rarity_totals: 形状为 (职业数, 稀有度数) 的卡牌总数
+        class_legendary_histograms: 职业 -> 直方图，第 k 项为该职业恰好有 k 张传说的卡池数
+        card_counts: 扩展包ID -> 每张卡牌（按 get_cards_by_set 返回的顺序）被抽到的次数
+        seed_entropy: 生成各分片随机数流的种子，可用于复现结果
+    """
+
+    def __init__(self, class_names, card_counts_shape):
+        """
+        Args:
+            class_names: 职业名称列表
+            card_counts_shape: 扩展包ID -> 该扩展包的卡牌数量
+        """
+        self.pools = 0
+        self.class_names = list(class_names)
+        self.rarity_totals = np.zeros(len(RARITY_CODES), dtype=np.int64)
+        self.rarity_histograms = {rarity: np.zeros(1, dtype=np.int64) for rarity in RARITY_CODES}
+        self.class_rarity_totals = np.zeros((len(self.class_names), len(RARITY_CODES)), dtype=np.int64)
+        self.class_legendary_histograms = {name: np.zeros(1, dtype=np.int64) for name in self.class_names}
+        self.card_counts = {set_id: np.zeros(size, dtype=np.int64)
+                            for set_id, size in card_counts_shape.items()}
+        self.seed_entropy = None
+
+    def merge(self, other):
+        """合并另一个分片的统计结果（加法满足交换律，合并顺序不影响结果）"""
+        self.pools += other.pools
+        self.rarity_totals += other.rarity_totals
+        for rarity, histogram in other.rarity_histograms.items():
+            self.rarity_histograms[rarity] = _add_histogram(self.rarity_histograms[rarity], histogram)
+        self.class_rarity_totals += other.class_rarity_totals
+        for name, histogram in other.class_legendary_histograms.items():
+            self.class_legendary_histograms[name] = _add_histogram(
+                self.class_legendary_histograms[name], histogram)
+        for set_id, counts in other.card_counts.items():
+            self.card_counts[set_id] += counts
+        return self
+
+    def legendary_distribution(self, class_name):
+        """返回某职业每个卡池传说数量的概率分布（第 k 项为恰好 k 张的概率）"""
+        histogram = self.class_legendary_histograms[class_name]
+        return histogram / max(self.pools, 1)
+
+    def mean_legendaries(self, class_name):
+        """返回某职业每个卡池的平均传说数量"""
+        histogram = self.class_legendary_histograms[class_name]
+        return float(np.dot(np.arange(len(histogram)), histogram)) / max(self.pools, 1)
+
+
+class _ShardRunner:
+    """在单个进程内执行分片模拟，持有该进程独立的卡牌数据和模拟器状态"""
+
+    def __init__(self, set_cards, pack_counts, rarity_probabilities):
+        """
+        Args:
+            set_cards: 扩展包ID -> 卡牌列表
+            pack_counts: [(扩展包ID, 卡包数量)] 列表，描述一个卡池
+            rarity_probabilities: 稀有度概率
+        """
+        self.card_manager = CardDataManager()
+        for set_id, cards in set_cards.items():
+            self.card_manager.add_set_cards(set_id, cards)
+        self.simulator = PackSimulator(self.card_manager, rarity_probabilities)
+        self.pack_counts = list(pack_counts)
+        self.class_names = collect_class_names(set_cards)
+
+        # 卡牌表行号 -> 统计结果中的职业下标（缺少职业的卡牌视为中立）
+        card_table = self.card_manager.card_table
+        class_index = {name: i for i, name in enumerate(self.class_names)}
+        table_to_class = np.array([class_index[name] for name in card_table.class_names]
+                                  + [class_index['NEUTRAL'] if 'NEUTRAL' in class_index else 0],
+                                  dtype=np.int32)
+        self.row_class_codes = table_to_class[card_table.class_codes]
+
+    def card_counts_shape(self):
+        """返回每个扩展包的卡牌数量"""
+        return {set_id: len(self.card_manager.get_set_rows(set_id)) for set_id, _ in self.pack_counts}
+
+    def run(self, seed_sequence, pool_count):
+        """
+        模拟一个分片
+
+        Args:
+            seed_sequence: 该分片的 numpy SeedSequence
+            pool_count: 该分片模拟的卡池数量
+
+        Returns:
+            PoolStatistics: 分片统计结果
+        """
+        simulator = self.simulator
+        simulator.state.reseed(seed_sequence)
+        class_count = len(self.class_names)
+        rarity_count = len(RARITY_CODES)
+
+        stats = PoolStatistics(self.class_names, self.card_counts_shape())
+        rarity_per_pool = np.zeros((pool_count, rarity_count), dtype=np.int64)
+        legendary_per_pool = np.zeros((pool_count, class_count), dtype=np.int64)
+
+        for pool in range(pool_count):
+            # 每个卡池都是全新账号：清空保底计数和已抽传说记录
+            simulator.reset_legendary_records()
+            for set_id, packs in self.pack_counts:
+                rarity_codes, card_indices = simulator.simulate_packs(set_id, packs)
+                rarity_codes = rarity_codes.ravel()
+                card_indices = card_indices.ravel()
+                known = rarity_codes >= 0
+                codes = rarity_codes[known].astype(np.int64)
+                class_codes = self.row_class_codes[card_indices[known]]
+
+                rarity_per_pool[pool] += np.bincount(codes, minlength=rarity_count)
+                legendary_per_pool[pool] += np.bincount(
+                    class_codes[codes == LEGENDARY_CODE], minlength=class_count)
+                stats.class_rarity_totals += np.bincount(
+                    class_codes * rarity_count + codes,
+                    minlength=class_count * rarity_count).reshape(class_count, rarity_count)
+                # 行号换算为扩展包内的顺序
+                set_positions = np.searchsorted(self.card_manager.get_set_rows(set_id), card_indices)
+                stats.card_counts[set_id] += np.bincount(
+                    set_positions, minlength=len(stats.card_counts[set_id]))
+
+        stats.pools = pool_count
+        stats.rarity_totals = rarity_per_pool.sum(axis=0)
+        for code, rarity in enumerate(RARITY_CODES):
+            stats.rarity_histograms[rarity] = np.bincount(rarity_per_pool[:, code])
+        for i, name in enumerate(self.class_names):
+            stats.class_legendary_histograms[name] = np.bincount(legendary_per_pool[:, i])
+        return stats
+
+
+# 工作进程内的分片执行器，由进程池的 initializer 创建
+_worker_runner = None
+
+
+def _init_worker(set_cards, pack_counts, rarity_probabilities):
+    """进程池初始化：每个工作进程只接收并构建一次卡牌数据"""
+    global _worker_runner
+    _worker_runner = _ShardRunner(set_cards, pack_counts, rarity_probabilities)
+
+
+def _run_worker_shard(seed_sequence, pool_count):
+    """在工作进程中执行一个分片"""
+    return _worker_runner.run(seed_sequence, pool_count)
+
+
+def collect_class_names(set_cards):
+    """收集卡牌中出现的所有职业（排序后保证各进程一致）"""
+    names = set()
+    for cards in set_cards.values():
+        for card in cards:
+            if card.get('collectible', False):
+                names.add(card.get('cardClass', 'NEUTRAL'))
+    return sorted(names)
+
+
+class MonteCarloPoolSimulator:
+    """多进程现开卡池蒙特卡洛模拟器"""
+
+    def __init__(self, card_manager, pack_counts, rarity_probabilities=None,
+                 seed=None, workers=None, shard_size=DEFAULT_SHARD_SIZE):
+        """
+        Args:
+            card_manager: 已加载卡牌数据的 CardDataManager
+            pack_counts: 描述一个卡池的字典 {扩展包ID: 卡包数量} 或 [(扩展包ID, 卡包数量)] 列表
+            rarity_probabilities: 稀有度概率，默认使用配置中的概率
+            seed: 随机种子，相同种子得到相同结果；为None时随机生成
+            workers: 进程数量，默认使用CPU核心数，为1时在当前进程内执行
+            shard_size: 每个分片的卡池数量，结果只与种子和分片大小有关
+        """
+        if isinstance(pack_counts, dict):
+            pack_counts = list(pack_counts.items())
+        self.pack_counts = [(set_id, int(packs)) for set_id, packs in pack_counts]
+        if not self.pack_counts:
+            raise ValueError("卡池至少需要包含一个扩展包")
+
+        self.set_cards = {}
+        for set_id, _ in self.pack_counts:
+            cards = card_manager.get_cards_by_set(set_id)
+            if not cards:
+                raise ValueError(f"扩展包 {set_id} 没有可用卡牌数据")
+            self.set_cards[set_id] = cards
+
+        self.rarity_probabilities = rarity_probabilities
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = max(1, int(shard_size))
+
+    def _shard_plan(self, pools):
+        """根据卡池总数生成 (种子, 卡池数量) 分片列表"""
+        seed_sequence = np.random.SeedSequence(self.seed)
+        shard_count = math.ceil(pools / self.shard_size)
+        seeds = seed_sequence.spawn(shard_count)
+        counts = [self.shard_size] * shard_count
+        if shard_count:
+            counts[-1] = pools - self.shard_size * (shard_count - 1)
+        return seed_sequence.entropy, list(zip(seeds, counts))
+
+    def run(self, pools, progress_callback=None):
+        """
+        模拟指定数量的卡池
+
+        Args:
+            pools: 卡池数量
+            progress_callback: 进度回调 callback(已完成卡池数, 卡池总数)
+
+        Returns:
+            PoolStatistics: 合并后的统计结果
+        """
+        pools = int(pools)
+        entropy, shards = self._shard_plan(pools)
+        init_args = (self.set_cards, self.pack_counts, self.rarity_probabilities)
+        done = 0
+
+        if self.workers <= 1 or len(shards) <= 1:
+            # 单进程执行，免去进程启动和数据传输的开销
+            runner = _ShardRunner(*init_args)
+            result = PoolStatistics(runner.class_names, runner.card_counts_shape())
+            for seed, count in shards:
+                result.merge(runner.run(seed, count))
+                done += count
+                if progress_callback:
+                    progress_callback(done, pools)
+        else:
+            result = None
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(shards)),
+                                     initializer=_init_worker, initargs=init_args) as executor:
+                futures = {executor.submit(_run_worker_shard, seed, count): count
+                           for seed, count in shards}
+                for future in as_completed(futures):
+                    shard_stats = future.result()
+                    result = shard_stats if result is None else result.merge(shard_stats)
+                    done += futures[future]
+                    if progress_callback:
+                        progress_callback(done, pools)
+
+        result.seed_entropy = entropy
+        return result
+
+
+def format_statistics(stats, display_manager=None):
+    """
+    将统计结果格式化为文本
+
+    Args:
+        stats: PoolStatistics
+        display_manager: 可选的 HearthstoneDisplayManager，用于显示本地化名称
+
+    Returns:
+        str: 统计文本
+    """
+    def class_label(name):
+        return display_manager.get_localized_class_name(name) if display_manager else name
+
+    def rarity_label(name):
+        return display_manager.get_localized_rarity_name(name) if display_manager else name
+
+    pools = max(stats.pools, 1)
+    lines = [f"模拟卡池数: {stats.pools}（种子: {stats.seed_entropy}）", "", "每个卡池的平均卡牌数:"]
+    for code, rarity in enumerate(RARITY_CODES):
+        lines.append(f"  {rarity_label(rarity)}: {stats.rarity_totals[code] / pools:.3f}")
+
+    lines.extend(["", "各职业传说数量分布（每个卡池）:"])
+    for name in stats.class_names:
+        distribution = stats.legendary_distribution(name)
+        parts = ", ".join(f"{k}张 {p:.2%}" for k, p in enumerate(distribution) if p > 0)
+        lines.append(f"  {class_label(name)}: 平均 {stats.mean_legendaries(name):.3f} | {parts}")
+    return "\n".join(lines)
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='现开卡池蒙特卡洛模拟')
+    parser.add_argument('--pool', action='append', required=True, metavar='SET_ID:PACKS',
+                        help='卡池中的扩展包及卡包数量，例如 SPACE:40，可重复指定')
+    parser.add_argument('--pools', type=int, default=100_000, help='模拟的卡池数量')
+    parser.add_argument('--seed', type=int, help='随机种子')
+    parser.add_argument('--workers', type=int, help='进程数量，默认使用CPU核心数')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE, help='每个分片的卡池数量')
+    args = parser.parse_args()
+
+    pack_counts = []
+    for item in args.pool:
+        set_id, _, packs = item.rpartition(':')
+        if not set_id or not packs.isdigit():
+            parser.error(f"无效的卡池参数: {item}")
+        pack_counts.append((set_id, int(packs)))
+
+    card_manager = CardDataManager()
+    card_manager.load_card_data()
+    monte_carlo = MonteCarloPoolSimulator(card_manager, pack_counts, seed=args.seed,
+                                          workers=args.workers, shard_size=args.shard_size)
+    stats = monte_carlo.run(args.pools)
+    print(format_statistics(stats))
+
+
+if __name__ == '__main__':
+    main()
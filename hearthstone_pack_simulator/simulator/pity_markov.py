@@ -0,0 +1,310 @@
+"""
+传说卡保底规则的精确概率计算（马尔可夫链）
+
+开包规则由稀有度概率、第5张卡稀有或以上保底、前10包必出传说和40包保底完全确定，
+因此每包的传说数量只依赖当前的保底状态。本模块根据这些配置构建保底状态的马尔可夫链，
+不经过随机抽样直接得到精确的概率分布：
+    - N 包中传说卡数量的分布
+    - 抽到第 k 张传说卡所需包数的分布
+    - 在传说不重复规则下，抽到某一张指定传说所需包数的分布
+
+同一组参数的计算结果会被缓存，重复查询直接返回。
+"""
+
+import argparse
+from functools import lru_cache
+from math import comb
+
+import numpy as np
+
+from config import (RARITY_PROBABILITIES, GUARANTEE_RARE_OR_HIGHER,
+                    LEGENDARY_PITY_TIMER, FIRST_LEGENDARY_GUARANTEE)
+from .rarity_sampler import RARE_OR_HIGHER
+
+CARDS_PER_PACK = 5
+MAX_PACKS = 100_000      # 没有保底上限时（例如关闭了保底）的最大计算包数
+TAIL_TOLERANCE = 1e-15   # 剩余概率低于该值时停止计算
+
+
+def _read_only(array):
+    """缓存结果以只读数组返回，避免调用者修改缓存"""
+    array.setflags(write=False)
+    return array
+
+
+def _pack_legendary_distributions(probabilities, guarantee_rare_or_higher):
+    """
+    计算单个卡包中传说卡数量的分布
+
+    Args:
+        probabilities: (稀有度, 概率) 元组
+        guarantee_rare_or_higher: 是否启用第5张卡稀有或以上保底
+
+    Returns:
+        tuple: (自然开包分布, 触发传说保底时的分布)，下标为传说数量 0~5
+    """
+    probabilities = dict(probabilities)
+    p_legendary = probabilities.get('LEGENDARY', 0)
+    p_common = probabilities.get('COMMON', 0)
+    p_rare_or_higher = sum(probabilities.get(r, 0) for r in RARE_OR_HIGHER)
+
+    # 前4张中传说的数量服从二项分布；其中"全部为普通卡"的情况单独计算
+    first_four = np.array([comb(4, k) * p_legendary ** k * (1 - p_legendary) ** (4 - k)
+                           for k in range(CARDS_PER_PACK)])
+    all_common = p_common ** 4
+    # 第5张卡：前4张都是普通卡时从稀有或以上中抽取
+    if guarantee_rare_or_higher:
+        fifth_after_commons = p_legendary / p_rare_or_higher if p_rare_or_higher > 0 else 0.0
+    else:
+        fifth_after_commons = p_legendary
+
+    natural = np.zeros(CARDS_PER_PACK + 1)
+    forced = np.zeros(CARDS_PER_PACK + 1)
+    no_legendary_with_rare = first_four[0] - all_common
+    natural[0] = no_legendary_with_rare * (1 - p_legendary) + all_common * (1 - fifth_after_commons)
+    natural[1] = no_legendary_with_rare * p_legendary + all_common * fifth_after_commons
+    # 保底卡包：前4张没有传说时第5张必定是传说
+    forced[1] = first_four[0]
+    for k in range(1, CARDS_PER_PACK):
+        natural[k] += first_four[k] * (1 - p_legendary)
+        natural[k + 1] += first_four[k] * p_legendary
+        forced[k] += first_four[k] * (1 - p_legendary)
+        forced[k + 1] += first_four[k] * p_legendary
+    return natural, forced
+
+
+@lru_cache(maxsize=None)
+def _build_chain(params):
+    """
+    构建保底状态链
+
+    状态 0 ~ G-1 表示还没抽到第一张传说、已开 m 包；状态 G + c 表示已抽到过传说、
+    40包保底计数为 c。
+
+    Returns:
+        tuple: (每个状态的传说数量分布矩阵, 不出传说时的下一状态, 出传说后的状态)
+    """
+    probabilities, pity_timer, first_guarantee, guarantee_rare_or_higher = params
+    natural, forced = _pack_legendary_distributions(probabilities, guarantee_rare_or_higher)
+
+    pre_states = max(first_guarantee, 1)
+    pity_timer = max(pity_timer, 1)
+    state_count = pre_states + pity_timer
+    after_legendary = pre_states
+
+    emissions = np.empty((state_count, CARDS_PER_PACK + 1))
+    zero_next = np.empty(state_count, dtype=np.int64)
+    for m in range(pre_states):
+        # 第 m+1 包正好是前10包保底的那一包
+        emissions[m] = forced if m + 1 == first_guarantee else natural
+        zero_next[m] = min(m + 1, pre_states - 1)
+    for c in range(pity_timer):
+        state = pre_states + c
+        # 开包前计数加1，达到保底值时强制出传说
+        emissions[state] = forced if c + 1 >= pity_timer else natural
+        zero_next[state] = pre_states + min(c + 1, pity_timer - 1)
+    return emissions, zero_next, after_legendary
+
+
+@lru_cache(maxsize=None)
+def _legendaries_in_packs(params, packs):
+    emissions, zero_next, after_legendary = _build_chain(params)
+    state_count = len(zero_next)
+    max_total = CARDS_PER_PACK * packs
+    dist = np.zeros((state_count, max_total + 1))
+    dist[0, 0] = 1.0
+
+    for step in range(packs):
+        width = CARDS_PER_PACK * step + 1
+        current = dist[:, :width]
+        new = np.zeros_like(dist)
+        np.add.at(new[:, :width], zero_next, current * emissions[:, :1])
+        for k in range(1, CARDS_PER_PACK + 1):
+            new[after_legendary, k:width + k] += emissions[:, k] @ current
+        dist = new
+    return _read_only(dist.sum(axis=0))
+
+
+@lru_cache(maxsize=None)
+def _packs_until_kth_legendary(params, k):
+    emissions, zero_next, after_legendary = _build_chain(params)
+    state_count = len(zero_next)
+    # alive[s, c]：处于状态 s、已抽到 c 张传说（c < k）的概率
+    alive = np.zeros((state_count, k))
+    alive[0, 0] = 1.0
+    result = [0.0]
+
+    while alive.sum() > TAIL_TOLERANCE and len(result) <= MAX_PACKS:
+        new = np.zeros_like(alive)
+        np.add.at(new, zero_next, alive * emissions[:, :1])
+        counts = emissions[:, 1:].T @ alive  # counts[j-1, c]：本包抽到 j 张传说
+        finished = 0.0
+        for j in range(1, CARDS_PER_PACK + 1):
+            if j < k:
+                new[after_legendary, j:] += counts[j - 1, :k - j]
+            finished += counts[j - 1, max(k - j, 0):].sum()
+        result.append(finished)
+        alive = new
+    return _read_only(np.array(result))
+
+
+def _occupancy(draws, items):
+    """从 items 张卡中有放回地抽取 draws 次，不同卡牌数量的分布"""
+    dist = np.zeros(draws + 1)
+    dist[0] = 1.0
+    for _ in range(draws):
+        new = np.zeros_like(dist)
+        for m in range(draws + 1):
+            if dist[m]:
+                new[m] += dist[m] * (m / items)
+                if m + 1 <= draws:
+                    new[m + 1] += dist[m] * ((items - m) / items)
+        dist = new
+    return dist
+
+
+@lru_cache(maxsize=None)
+def _packs_until_specific_legendary(params, legendary_count):
+    emissions, zero_next, after_legendary = _build_chain(params)
+    state_count = len(zero_next)
+    # alive[s, d]：处于状态 s、已抽到 d 张其它传说、指定传说仍未抽到的概率
+    alive = np.zeros((state_count, legendary_count))
+    alive[0, 0] = 1.0
+    result = [0.0]
+
+    # 同一卡包内的传说都从开包前未抽到的传说中抽取（开完一包才记录），
+    # 因此一包中有 j 张传说时，指定传说未被抽到的概率为 (1 - 1/u)^j，
+    # 其余 j 次抽取在另外 u-1 张未抽到的传说中均匀分布
+    transitions = {}
+    for d in range(legendary_count):
+        unopened = legendary_count - d
+        for j in range(1, CARDS_PER_PACK + 1):
+            miss = (1 - 1 / unopened) ** j
+            others = _occupancy(j, unopened - 1) if unopened > 1 else np.zeros(j + 1)
+            transitions[d, j] = (miss, others)
+
+    while alive.sum() > TAIL_TOLERANCE and len(result) <= MAX_PACKS:
+        new = np.zeros_like(alive)
+        np.add.at(new, zero_next, alive * emissions[:, :1])
+        counts = emissions[:, 1:].T @ alive  # counts[j-1, d]
+        finished = 0.0
+        for d in range(legendary_count):
+            for j in range(1, CARDS_PER_PACK + 1):
+                mass = counts[j - 1, d]
+                if not mass:
+                    continue
+                miss, others = transitions[d, j]
+                finished += mass * (1 - miss)
+                for m, p in enumerate(others):
+                    if p and d + m < legendary_count:
+                        new[after_legendary, d + m] += mass * miss * p
+        result.append(finished)
+        alive = new
+    return _read_only(np.array(result))
+
+
+class PityMarkovModel:
+    """基于保底状态马尔可夫链的传说卡精确概率计算器
+
+    所有分布都从新账号（未开过该扩展包）开始计算。
+    """
+
+    def __init__(self, rarity_probabilities=None, pity_timer=None,
+                 first_legendary_guarantee=None, guarantee_rare_or_higher=None):
+        """
+        Args:
+            rarity_probabilities: 稀有度概率，默认使用配置中的概率
+            pity_timer: 传说保底包数，默认使用配置
+            first_legendary_guarantee: 前N包必出传说，默认使用配置
+            guarantee_rare_or_higher: 是否启用第5张卡稀有或以上保底，默认使用配置
+        """
+        probabilities = rarity_probabilities or RARITY_PROBABILITIES
+        self.params = (
+            tuple(sorted((rarity, float(p)) for rarity, p in probabilities.items())),
+            int(LEGENDARY_PITY_TIMER if pity_timer is None else pity_timer),
+            int(FIRST_LEGENDARY_GUARANTEE if first_legendary_guarantee is None else first_legendary_guarantee),
+            bool(GUARANTEE_RARE_OR_HIGHER if guarantee_rare_or_higher is None else guarantee_rare_or_higher),
+        )
+
+    @classmethod
+    def from_simulator(cls, simulator):
+        """使用模拟器当前的概率和保底设置创建计算器"""
+        return cls(simulator.rarity_probabilities, simulator.legendary_pity_timer,
+                   simulator.first_legendary_guarantee, simulator.guarantee_rare_or_higher)
+
+    def pack_legendary_distribution(self):
+        """
+        单个卡包的传说数量分布
+
+        Returns:
+            tuple: (自然开包分布, 触发保底时的分布)，下标为传说数量
+        """
+        natural, forced = _pack_legendary_distributions(self.params[0], self.params[3])
+        return _read_only(natural), _read_only(forced)
+
+    def legendaries_in_packs(self, packs):
+        """
+        开 packs 包得到的传说卡数量分布
+
+        Returns:
+            numpy.ndarray: 第 k 项为恰好得到 k 张传说的概率
+        """
+        return _legendaries_in_packs(self.params, int(packs))
+
+    def packs_until_kth_legendary(self, k):
+        """
+        抽到第 k 张传说卡（包含重复）所需包数的分布
+
+        Returns:
+            numpy.ndarray: 第 n 项为恰好在第 n 包抽到第 k 张传说的概率
+        """
+        if k < 1:
+            raise ValueError("k 必须大于等于1")
+        return _packs_until_kth_legendary(self.params, int(k))
+
+    def packs_until_specific_legendary(self, legendary_count):
+        """
+        在传说不重复规则下，抽到某一张指定传说所需包数的分布
+
+        同一卡包内的多张传说基于开包前的记录抽取，可能重复，与模拟器的行为一致。
+
+        Args:
+            legendary_count: 扩展包中传说卡的数量
+
+        Returns:
+            numpy.ndarray: 第 n 项为恰好在第 n 包抽到该传说的概率
+        """
+        if legendary_count < 1:
+            raise ValueError("传说卡数量必须大于等于1")
+        return _packs_until_specific_legendary(self.params, int(legendary_count))
+
+    @staticmethod
+    def expected_value(distribution):
+        """分布的期望值（下标为取值）"""
+        return float(np.dot(np.arange(len(distribution)), distribution))
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='传说卡保底精确概率计算')
+    parser.add_argument('--packs', type=int, default=40, help='计算该包数内传说数量的分布')
+    parser.add_argument('--kth', type=int, default=1, help='计算抽到第k张传说所需包数')
+    parser.add_argument('--legendaries', type=int, help='扩展包传说卡数量，用于计算抽到指定传说所需包数')
+    args = parser.parse_args()
+
+    model = PityMarkovModel()
+    per_packs = model.legendaries_in_packs(args.packs)
+    print(f"{args.packs} 包传说数量期望: {model.expected_value(per_packs):.4f}")
+    for k, p in enumerate(per_packs[:8]):
+        print(f"  {k} 张: {p:.4%}")
+
+    kth = model.packs_until_kth_legendary(args.kth)
+    print(f"抽到第 {args.kth} 张传说的期望包数: {model.expected_value(kth):.2f}（最多 {len(kth) - 1} 包）")
+
+    if args.legendaries:
+        specific = model.packs_until_specific_legendary(args.legendaries)
+        print(f"抽到指定传说（共 {args.legendaries} 张）的期望包数: {model.expected_value(specific):.2f}")
+
+
+if __name__ == '__main__':
+    main()
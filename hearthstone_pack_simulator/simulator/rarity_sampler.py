@@ -0,0 +1,115 @@
+import random
+
+import numpy as np
+
+# 批量模拟使用的稀有度整数编码（按稀有度从低到高）
+RARITY_CODES = ['COMMON', 'RARE', 'EPIC', 'LEGENDARY']
+RARITY_TO_CODE = {rarity: code for code, rarity in enumerate(RARITY_CODES)}
+LEGENDARY_CODE = RARITY_TO_CODE['LEGENDARY']
+UNKNOWN_RARITY_CODE = -1
+
+# 第5张卡保底时可选的稀有度
+RARE_OR_HIGHER = ('RARE', 'EPIC', 'LEGENDARY')
+
+
+class AliasTable:
+    """Walker 别名表，构建一次后每次抽样只需 O(1)"""
+
+    def __init__(self, weights):
+        """
+        根据权重构建别名表
+
+        Args:
+            weights: 各编码的权重列表，不需要归一化
+        """
+        weights = [float(w) for w in weights]
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError("权重总和必须大于0")
+
+        size = len(weights)
+        scaled = [w * size / total for w in weights]
+        prob = [1.0] * size
+        alias = list(range(size))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # 剩余项由于浮点误差可能略偏离1，直接视为1
+
+        self.size = size
+        self.prob = prob
+        self.alias = alias
+        self._prob_array = np.array(prob, dtype=np.float64)
+        self._alias_array = np.array(alias, dtype=np.int8)
+
+    def draw(self, rand=random.random):
+        """抽取一个编码（逐包模拟使用）"""
+        u = rand() * self.size
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def draw_many(self, rng, size):
+        """
+        批量抽取编码
+
+        Args:
+            rng: numpy 随机数生成器
+            size: 输出数组形状
+
+        Returns:
+            numpy.ndarray: int8 编码数组
+        """
+        u = rng.random(size) * self.size
+        column = u.astype(np.int8)
+        keep = (u - column) < self._prob_array[column]
+        return np.where(keep, column, self._alias_array[column])
+
+
+class RaritySampler:
+    """编译后的稀有度抽样器
+
+    在设置概率时构建一次，包含普通卡位的别名表和第5张卡"稀有或以上"保底的别名表，
+    开包循环中不再重复构建权重列表。
+    """
+
+    def __init__(self, probabilities):
+        """
+        Args:
+            probabilities: 稀有度到概率的映射
+        """
+        self.probabilities = dict(probabilities)
+        self.slot_table = AliasTable([self.probabilities.get(r, 0) for r in RARITY_CODES])
+
+        # 第5张卡保底表：普通卡权重为0，其余按原概率重新归一化
+        rare_weights = [self.probabilities.get(r, 0) if r in RARE_OR_HIGHER else 0 for r in RARITY_CODES]
+        self.rare_or_higher_table = AliasTable(rare_weights) if sum(rare_weights) > 0 else None
+
+    def draw(self, rand=random.random):
+        """抽取一个普通卡位的稀有度"""
+        return RARITY_CODES[self.slot_table.draw(rand)]
+
+    def draw_rare_or_higher(self, rand=random.random):
+        """抽取一个稀有或以上的稀有度，若没有可用概率则返回None"""
+        if self.rare_or_higher_table is None:
+            return None
+        return RARITY_CODES[self.rare_or_higher_table.draw(rand)]
+
+    def draw_codes(self, rng, size):
+        """批量抽取普通卡位的稀有度编码"""
+        return self.slot_table.draw_many(rng, size)
+
+    def draw_rare_or_higher_codes(self, rng, size):
+        """批量抽取稀有或以上的稀有度编码，若没有可用概率则返回None"""
+        if self.rare_or_higher_table is None:
+            return None
+        return self.rare_or_higher_table.draw_many(rng, size)
@@ -1,61 +1,38 @@
 import json
 import os
-import random
 from collections import defaultdict
+import numpy as np
 from config import (RARITY_PROBABILITIES, GUARANTEE_RARE_OR_HIGHER, 
-                    LEGENDARY_PITY_TIMER, DATA_PATH)
+                    LEGENDARY_PITY_TIMER, FIRST_LEGENDARY_GUARANTEE)
 import config
-from typing import Dict, List, Any, Optional
+from card_repository import CardRepository
+from typing import Dict, List, Any, Optional, Tuple
+from .rarity_sampler import (RaritySampler, RARITY_CODES, RARITY_TO_CODE,
+                             LEGENDARY_CODE, UNKNOWN_RARITY_CODE)
+from .card_table import CardTable
+from .state import SimulationState
+from .stream import PackBatch, DEFAULT_BATCH_SIZE
+
+CARDS_PER_PACK = 5
 
 class CardDataManager:
     """卡牌数据管理类"""
     def __init__(self):
-        self.data_path = DATA_PATH
+        # 所有卡牌保存在列式卡牌表中，以下两个字典只保存行号
+        self.card_table = CardTable()
         self.cards_by_set = {}
         self.cards_by_set_rarity = {}
-        self.pity_counter = {}  # 每个系列的保底计数器
-        self.opened_legendaries = defaultdict(set)  # 记录已抽到的传说卡
+        # 保底计数和已抽到的传说等模拟状态保存在 PackSimulator.state（SimulationState）中
         
     def load_card_data(self):
-        """加载所有可收藏卡牌数据"""
+        """加载所有可收藏卡牌数据（来自进程内共享的卡牌数据仓库，不会重复解析JSON）"""
         try:
-            # 读取统计信息以获取所有扩展包
-            stats_path = os.path.join(self.data_path, "stats.json")
-            with open(stats_path, 'r', encoding='utf-8') as f:
-                stats = json.load(f)
+            repository = CardRepository.instance()
             
             # 遍历所有扩展包
-            for set_key in stats['sets']:
-                # 确保set_key是扩展包的英文ID，不再使用旧的"英文ID_中文名"格式
-                set_id = set_key
-                
-                # 构建扩展包数据路径
-                set_path = os.path.join(self.data_path, set_key, "all_cards.json")
-                if os.path.exists(set_path):
-                    with open(set_path, 'r', encoding='utf-8') as f:
-                        cards = json.load(f)
-                    
-                    # 只保留可收藏的卡牌
-                    collectible_cards = [card for card in cards if card.get('collectible', False)]
-                    
-                    if collectible_cards:
-                        # 保存扩展包的所有卡牌，name字段将暂时保存英文ID
-                        # 稍后会使用HearthstoneDisplayManager进行本地化处理
-                        self.cards_by_set[set_id] = {
-                            'name': set_id,  # 使用ID作为name，便于后续使用display_manager处理
-                            'cards': collectible_cards
-                        }
-                        
-                        # 按稀有度分类卡牌
-                        cards_by_rarity = defaultdict(list)
-                        for card in collectible_cards:
-                            rarity = card.get('rarity', 'COMMON')
-                            cards_by_rarity[rarity].append(card)
-                        
-                        self.cards_by_set_rarity[set_id] = cards_by_rarity
-                        
-                        # 初始化保底计数器
-                        self.pity_counter[set_id] = 0
+            for set_id in repository.set_ids():
+                if set_id not in self.cards_by_set:
+                    self.add_set_cards(set_id, repository.cards_in_set(set_id))
             
             print(f"已加载 {len(self.cards_by_set)} 个扩展包的卡牌数据")
             return len(self.cards_by_set)
@@ -64,6 +41,38 @@ class CardDataManager:
             print(f"加载卡牌数据时出错: {e}")
             raise e
     
+    def add_set_cards(self, set_id, cards):
+        """登记一个扩展包的卡牌（只保留可收藏的卡牌）
+        
+        Args:
+            set_id: 扩展包ID
+            cards: 该扩展包的卡牌列表
+            
+        Returns:
+            bool: 是否登记了可收藏卡牌
+        """
+        collectible_cards = [card for card in cards if card.get('collectible', False)]
+        if not collectible_cards:
+            return False
+        
+        # 保存扩展包所有卡牌的行号，name字段将暂时保存英文ID
+        # 稍后会使用HearthstoneDisplayManager进行本地化处理
+        rows = self.card_table.add_cards(collectible_cards)
+        self.cards_by_set[set_id] = {
+            'name': set_id,  # 使用ID作为name，便于后续使用display_manager处理
+            'rows': rows
+        }
+        
+        # 按稀有度分类卡牌行号
+        grouped = defaultdict(list)
+        for row in rows.tolist():
+            grouped[self.card_table.rarity(row) or 'COMMON'].append(row)
+        
+        self.cards_by_set_rarity[set_id] = {
+            rarity: np.array(rarity_rows, dtype=np.int32) for rarity, rarity_rows in grouped.items()
+        }
+        return True
+    
     def get_cards_by_set(self, set_id):
         """获取指定扩展包的所有卡牌
         
@@ -74,22 +83,86 @@ class CardDataManager:
             list: 该扩展包的所有卡牌列表
         """
         set_data = self.cards_by_set.get(set_id)
-        if set_data and 'cards' in set_data:
-            return set_data['cards']
+        if set_data:
+            return self.card_table.cards(set_data['rows'])
         return []
+    
+    def get_set_rows(self, set_id):
+        """获取指定扩展包所有卡牌在卡牌表中的行号（不存在时返回空数组）"""
+        set_data = self.cards_by_set.get(set_id)
+        if set_data:
+            return set_data['rows']
+        return np.zeros(0, dtype=np.int32)
+    
+    def get_card(self, row):
+        """根据行号生成卡牌字典"""
+        return self.card_table.card(row)
+    
+    def get_cards(self, rows):
+        """根据行号数组生成卡牌字典列表"""
+        return self.card_table.cards(rows)
 
 
 class PackSimulator:
     """卡包模拟器核心"""
-    def __init__(self, card_data_manager, rarity_probabilities=None):
+    def __init__(self, card_data_manager, rarity_probabilities=None, seed=None, state=None):
+        """
+        Args:
+            card_data_manager: 卡牌数据管理器
+            rarity_probabilities: 稀有度概率，默认使用配置中的概率
+            seed: 随机种子（整数或 numpy SeedSequence），默认不固定
+            state: 模拟状态，默认创建新的 SimulationState
+        """
         self.card_manager = card_data_manager
         self.rarity_probabilities = rarity_probabilities or RARITY_PROBABILITIES
+        # 预编译的稀有度抽样表，仅在概率改变时重建
+        self.rarity_sampler = RaritySampler(self.rarity_probabilities)
         self.guarantee_rare_or_higher = GUARANTEE_RARE_OR_HIGHER
         self.legendary_pity_timer = LEGENDARY_PITY_TIMER
-        # 记录每个扩展包是否已经抽到第一张传说
-        self.first_legendary_obtained = {}
-        # 记录每个扩展包已抽取的包数（用于前10包保底）
-        self.packs_opened = {}
+        self.first_legendary_guarantee = FIRST_LEGENDARY_GUARANTEE
+        # 保底计数、已开包数、已抽到的传说和随机数生成器都保存在模拟状态中
+        self.state = state if state is not None else SimulationState(seed)
+    
+    @property
+    def first_legendary_obtained(self):
+        """每个扩展包是否已经抽到第一张传说"""
+        return self.state.first_legendary_obtained
+    
+    @property
+    def packs_opened(self):
+        """每个扩展包已抽取的包数（用于前10包保底）"""
+        return self.state.packs_opened
+    
+    @property
+    def pity_counter(self):
+        """每个扩展包的40包保底计数器"""
+        return self.state.pity_counter
+    
+    @property
+    def opened_legendaries(self):
+        """每个扩展包已抽到的传说卡ID"""
+        return self.state.opened_legendaries
+    
+    @property
+    def rng(self):
+        """批量模拟使用的随机数生成器"""
+        return self.state.rng
+    
+    def fork(self, seed=None):
+        """
+        从当前状态分叉出一个独立的模拟器（共享卡牌数据和概率设置）
+        
+        Args:
+            seed: 分叉使用的新随机种子；为None时复制当前随机数状态
+            
+        Returns:
+            PackSimulator: 新的模拟器，之后对两者的模拟互不影响
+        """
+        simulator = PackSimulator(self.card_manager, self.rarity_probabilities, state=self.state.fork(seed))
+        simulator.guarantee_rare_or_higher = self.guarantee_rare_or_higher
+        simulator.legendary_pity_timer = self.legendary_pity_timer
+        simulator.first_legendary_guarantee = self.first_legendary_guarantee
+        return simulator
         
     def simulate_pack_opening(self, set_id):
         """模拟单个卡包的抽卡过程"""
@@ -97,9 +170,9 @@ class PackSimulator:
             if set_id not in self.card_manager.cards_by_set_rarity:
                 print(f"警告: 扩展包 {set_id} 的按稀有度分类数据不存在")
                 # 返回备选方案
-                if set_id in self.card_manager.cards_by_set and self.card_manager.cards_by_set[set_id]['cards']:
-                    all_cards = self.card_manager.cards_by_set[set_id]['cards']
-                    return random.sample(all_cards, min(5, len(all_cards)))
+                all_rows = self.card_manager.get_set_rows(set_id).tolist()
+                if all_rows:
+                    return self.card_manager.get_cards(self.state.random.sample(all_rows, min(5, len(all_rows))))
                 else:
                     raise ValueError(f"扩展包 {set_id} 没有可用卡牌数据")
             
@@ -108,6 +181,8 @@ class PackSimulator:
                 self.first_legendary_obtained[set_id] = False
             if set_id not in self.packs_opened:
                 self.packs_opened[set_id] = 0
+            if set_id not in self.pity_counter:
+                self.pity_counter[set_id] = 0
                 
             # 增加已开包计数
             self.packs_opened[set_id] += 1
@@ -125,69 +200,70 @@ class PackSimulator:
             if not has_enough_cards:
                 print(f"警告: 扩展包 {set_id} 缺少以下稀有度的卡牌: {', '.join(missing_rarities)}")
                 # 如果某个稀有度没有卡牌，则随机从所有卡牌中抽取
-                all_cards = self.card_manager.cards_by_set[set_id]['cards']
-                if not all_cards:
+                all_rows = self.card_manager.get_set_rows(set_id).tolist()
+                if not all_rows:
                     raise ValueError(f"扩展包 {set_id} 没有可用卡牌数据")
-                return random.sample(all_cards, min(5, len(all_cards)))
+                return self.card_manager.get_cards(self.state.random.sample(all_rows, min(5, len(all_rows))))
             
             # 保底机制处理
             guaranteed_legendary = False
             
             # 前10包保底逻辑：如果未抽到传说且当前是第10包，强制出传说
-            if not self.first_legendary_obtained[set_id] and self.packs_opened[set_id] == 10:
+            if not self.first_legendary_obtained[set_id] and self.packs_opened[set_id] == self.first_legendary_guarantee:
                 guaranteed_legendary = True
                 print(f"扩展包 {set_id} 第10包保底触发，必出传说")
             # 每40包保底逻辑：仅在已经抽到第一张传说后生效
             elif self.first_legendary_obtained[set_id]:
-                self.card_manager.pity_counter[set_id] += 1
-                if self.card_manager.pity_counter[set_id] >= self.legendary_pity_timer:
+                self.pity_counter[set_id] += 1
+                if self.pity_counter[set_id] >= self.legendary_pity_timer:
                     guaranteed_legendary = True
-                    self.card_manager.pity_counter[set_id] = 0
+                    self.pity_counter[set_id] = 0
                     print(f"扩展包 {set_id} 40包保底触发，必出传说")
             
-            # 抽取5张卡片
-            cards = []
+            # 抽取5张卡片（先记录行号，返回前再生成卡牌字典）
+            card_table = self.card_manager.card_table
+            rows = []
             rarities = self.determine_pack_rarities(guaranteed_legendary)
             
             for rarity in rarities:
                 try:
-                    card = self.draw_card_of_rarity(set_id, rarity)
-                    if card:
-                        cards.append(card)
+                    row = self._draw_row_of_rarity(set_id, rarity)
+                    if row is not None:
+                        rows.append(row)
                         
                         # 如果抽到了传说卡
-                        if card.get('rarity') == 'LEGENDARY':
+                        if card_table.rarity(row) == 'LEGENDARY':
                             # 记录已获得第一张传说
                             if not self.first_legendary_obtained[set_id]:
                                 self.first_legendary_obtained[set_id] = True
                                 print(f"扩展包 {set_id} 已抽到第一张传说，开始应用40包保底规则")
                                 # 重置保底计数器
-                                self.card_manager.pity_counter[set_id] = 0
+                                self.pity_counter[set_id] = 0
                             # 已经抽到过传说，正常重置40包保底计数
                             else:
-                                self.card_manager.pity_counter[set_id] = 0
+                                self.pity_counter[set_id] = 0
                 except Exception as e:
                     print(f"抽取{rarity}稀有度卡牌时出错: {e}")
                     # 继续尝试抽取其他卡牌
             
             # 确保返回5张卡片
-            while len(cards) < 5:
+            while len(rows) < 5:
                 # 如果卡片不足5张，从所有卡牌中随机补充
                 print(f"扩展包 {set_id} 卡牌不足5张，从所有卡牌中随机补充")
-                all_cards = self.card_manager.cards_by_set[set_id]['cards']
-                if not all_cards:
+                all_rows = self.card_manager.get_set_rows(set_id).tolist()
+                if not all_rows:
                     raise ValueError(f"扩展包 {set_id} 没有可用卡牌数据")
-                cards.append(random.choice(all_cards))
+                rows.append(self.state.random.choice(all_rows))
             
-            return cards
+            return self.card_manager.get_cards(rows)
             
         except Exception as e:
             print(f"模拟卡包抽取过程中出错: {e}")
             # 尝试使用备选方案
             try:
-                if set_id in self.card_manager.cards_by_set and self.card_manager.cards_by_set[set_id]['cards']:
-                    all_cards = self.card_manager.cards_by_set[set_id]['cards']
-                    return random.sample(all_cards, min(5, len(all_cards)))
+                all_rows = self.card_manager.get_set_rows(set_id).tolist()
+                if all_rows:
+                    return self.card_manager.get_cards(self.state.random.sample(all_rows, min(5, len(all_rows))))
             except:
                 pass
             # 如果备选方案也失败，重新抛出异常
@@ -195,12 +271,19 @@ class PackSimulator:
     
     def draw_card_of_rarity(self, set_id, rarity):
         """抽取指定稀有度的卡牌，对传说卡进行特殊处理"""
+        row = self._draw_row_of_rarity(set_id, rarity)
+        if row is None:
+            return None
+        return self.card_manager.get_card(row)
+    
+    def _draw_row_of_rarity(self, set_id, rarity):
+        """抽取指定稀有度的卡牌，返回其在卡牌表中的行号"""
         try:
             if set_id not in self.card_manager.cards_by_set_rarity:
                 return None
                 
             cards_by_rarity = self.card_manager.cards_by_set_rarity[set_id]
-            available_cards = cards_by_rarity.get(rarity, [])
+            available_cards = cards_by_rarity.get(rarity, ())
             
             # 如果没有该稀有度的卡牌，尝试使用更高稀有度
             # if not available_cards and rarity != 'LEGENDARY':
@@ -209,39 +292,26 @@ class PackSimulator:
             #             available_cards = cards_by_rarity[higher_rarity]
             #             break
             
-            if not available_cards:
+            if not len(available_cards):
                 print(f"扩展包 {set_id} 没有可用的 {rarity} 稀有度卡牌")
                 return None
                 
             # 对传说卡进行特殊处理
             if rarity == 'LEGENDARY':
-                # 获取该扩展包中所有传说卡
-                all_legendaries = cards_by_rarity.get('LEGENDARY', [])
-                if not all_legendaries:
+                # 传说卡抽取池：未抽到的传说保存在数组前部，抽取为O(1)
+                legendary_pool = self.state.legendary_pool(set_id, self.card_manager)
+                if not legendary_pool:
                     print(f"扩展包 {set_id} 没有传说卡")
                     return None
-                    
-                # 已抽到的传说卡ID集合
-                opened_legendary_ids = self.card_manager.opened_legendaries[set_id]
                 
                 # 检查是否已抽到所有传说卡
-                if len(opened_legendary_ids) >= len(all_legendaries):
+                if legendary_pool.all_opened:
                     print(f"扩展包 {set_id} 所有传说卡都已抽到，随机抽取一张")
-                    # 如果已抽到所有传说，随机抽取一张
-                    return random.choice(all_legendaries)
-                else:
-                    # 否则只能抽还没抽到过的传说
-                    unopened_legendaries = [card for card in all_legendaries 
-                                          if card.get('id', '') not in opened_legendary_ids]
-                    if unopened_legendaries:
-                        return random.choice(unopened_legendaries)
-                    else:
-                        # 理论上不应该到这里，但以防万一
-                        print(f"扩展包 {set_id} 未抽到的传说卡计算错误，随机抽取一张")
-                        return random.choice(all_legendaries)
+                # 还有未抽到的传说时只抽未抽到的，否则在所有传说中随机抽取
+                return legendary_pool.draw(self.state.random.random)
             else:
                 # 非传说卡正常抽取
-                return random.choice(available_cards)
+                return int(self.state.random.choice(available_cards))
                 
         except Exception as e:
             print(f"抽取卡牌时出错: {e}, set_id={set_id}, rarity={rarity}")
@@ -250,15 +320,11 @@ class PackSimulator:
     
     def determine_pack_rarities(self, guaranteed_legendary=False):
         """确定一个卡包中5张卡的稀有度"""
-        rarities = []
+        sampler = self.rarity_sampler
+        rand = self.state.random.random
         
         # 先抽取前4张卡
-        for _ in range(4):
-            rarity_items = list(self.rarity_probabilities.items())
-            rarities_list = [r[0] for r in rarity_items]
-            weights = [r[1] for r in rarity_items]
-            selected_rarity = random.choices(rarities_list, weights=weights, k=1)[0]
-            rarities.append(selected_rarity)
+        rarities = [sampler.draw(rand) for _ in range(4)]
         
         # 检查前4张卡中是否已经有传说
         has_legendary = 'LEGENDARY' in rarities
@@ -271,28 +337,258 @@ class PackSimulator:
             rarities.append('LEGENDARY')
         elif self.guarantee_rare_or_higher and not has_rare_or_higher:
             # 如果需要保底稀有且还没抽到稀有或更高，从稀有及以上随机抽取
-            higher_rarities = ['LEGENDARY', 'EPIC', 'RARE']
-            weights = [self.rarity_probabilities.get(r, 0) for r in higher_rarities]
-            total_weight = sum(weights)
-            if total_weight > 0:
-                normalized_weights = [w/total_weight for w in weights]
-                selected_rarity = random.choices(higher_rarities, weights=normalized_weights, k=1)[0]
+            selected_rarity = sampler.draw_rare_or_higher(rand)
+            if selected_rarity:
                 rarities.append(selected_rarity)
         else:
             # 如果不需要特殊处理，正常抽取
-            rarity_items = list(self.rarity_probabilities.items())
-            rarities_list = [r[0] for r in rarity_items]
-            weights = [r[1] for r in rarity_items]
-            selected_rarity = random.choices(rarities_list, weights=weights, k=1)[0]
-            rarities.append(selected_rarity)
+            rarities.append(sampler.draw(rand))
         
         return rarities
-        
+
+    def simulate_packs(self, set_id, n) -> Tuple[np.ndarray, np.ndarray]:
+        """批量模拟开启 n 个卡包
+
+        与逐包调用 simulate_pack_opening 遵循相同的规则（前10包保底、40包保底、
+        第5张卡稀有或以上保底、传说卡不重复），但使用 NumPy 一次性生成所有卡包。
+        抽到的传说卡会直接记录到已抽传说列表中。
+
+        Args:
+            set_id: 扩展包ID
+            n: 卡包数量
+
+        Returns:
+            tuple: (rarity_codes, card_indices)，形状均为 (n, 5)。
+                rarity_codes 为 RARITY_CODES 中的稀有度编码，
+                card_indices 为卡牌在 card_manager.card_table 中的行号
+        """
+        n = int(n)
+        set_data = self.card_manager.cards_by_set.get(set_id)
+        if not set_data or not len(set_data['rows']):
+            raise ValueError(f"扩展包 {set_id} 没有可用卡牌数据")
+
+        # 初始化当前扩展包的状态记录
+        self.first_legendary_obtained.setdefault(set_id, False)
+        self.packs_opened.setdefault(set_id, 0)
+        self.pity_counter.setdefault(set_id, 0)
+
+        rarity_indices = self._get_rarity_indices(set_id)
+        if rarity_indices is None:
+            # 缺少某个稀有度的卡牌时，与逐包模拟一样从所有卡牌中随机抽取
+            print(f"警告: 扩展包 {set_id} 缺少部分稀有度的卡牌，从所有卡牌中随机抽取")
+            self.packs_opened[set_id] += n
+            return self._simulate_packs_fallback(set_id, n)
+
+        rng = self.rng
+
+        # 1. 使用预编译的别名表生成所有卡包的稀有度
+        sampler = self.rarity_sampler
+        first_four = sampler.draw_codes(rng, (n, CARDS_PER_PACK - 1))
+        has_legendary = (first_four == LEGENDARY_CODE).any(axis=1)
+        has_rare_or_higher = (first_four >= RARITY_TO_CODE['RARE']).any(axis=1)
+
+        fifth = sampler.draw_codes(rng, n)
+        if self.guarantee_rare_or_higher:
+            need_rare = ~has_rare_or_higher
+            rare_or_higher = sampler.draw_rare_or_higher_codes(rng, int(need_rare.sum()))
+            if rare_or_higher is not None:
+                fifth[need_rare] = rare_or_higher
+
+        # 2. 按顺序应用保底规则，确定哪些卡包强制出传说
+        natural_legendary = has_legendary | (fifth == LEGENDARY_CODE)
+        guaranteed = self._apply_legendary_guarantees(set_id, natural_legendary)
+        fifth[guaranteed & ~has_legendary] = LEGENDARY_CODE
+
+        rarity_codes = np.empty((n, CARDS_PER_PACK), dtype=np.int8)
+        rarity_codes[:, :CARDS_PER_PACK - 1] = first_four
+        rarity_codes[:, CARDS_PER_PACK - 1] = fifth
+
+        # 3. 所有卡位按稀有度整体抽取（传说卡位随后按不重复规则覆盖）
+        pool_sizes = np.array([len(rarity_indices[code]) for code in range(len(RARITY_CODES))])
+        pool_offsets = np.concatenate(([0], np.cumsum(pool_sizes)[:-1])).astype(np.int32)
+        all_pools = np.concatenate([rarity_indices[code] for code in range(len(RARITY_CODES))])
+        local = (rng.random((n, CARDS_PER_PACK)) * pool_sizes[rarity_codes]).astype(np.int32)
+        card_indices = all_pools[pool_offsets[rarity_codes] + local]
+
+        # 4. 传说卡需要遵循不重复规则，按卡包顺序逐张抽取
+        legendary_slots = np.argwhere(rarity_codes == LEGENDARY_CODE)
+        if len(legendary_slots):
+            card_indices[legendary_slots[:, 0], legendary_slots[:, 1]] = self._draw_legendary_indices(
+                set_id, rarity_indices[LEGENDARY_CODE], legendary_slots[:, 0])
+
+        return rarity_codes, card_indices
+
+    def iter_packs(self, set_id, n, batch_size=DEFAULT_BATCH_SIZE, start=0):
+        """按批生成 n 个卡包的紧凑记录
+
+        每批调用一次 simulate_packs，保底状态在批之间连续，结果与一次性调用相同规则。
+        生成器不保留已生成的批次，内存占用与 n 无关。
+
+        Args:
+            set_id: 扩展包ID
+            n: 卡包数量
+            batch_size: 每批卡包数量
+            start: 已完成的包数（从检查点恢复时跳过这些卡包）
+
+        Yields:
+            PackBatch: 一批卡包的稀有度编码和卡牌行号
+        """
+        n = int(n)
+        batch_size = max(1, int(batch_size))
+        start = int(start)
+        while start < n:
+            size = min(batch_size, n - start)
+            rarity_codes, card_rows = self.simulate_packs(set_id, size)
+            yield PackBatch(set_id, start, rarity_codes, card_rows)
+            start += size
+
+    def cards_from_indices(self, card_indices):
+        """将批量模拟得到的卡牌行号转换为卡牌数据
+
+        Args:
+            card_indices: simulate_packs 返回的卡牌行号数组
+
+        Returns:
+            list: 卡牌字典列表，每个卡包一个子列表
+        """
+        return [self.card_manager.get_cards(pack) for pack in np.atleast_2d(card_indices)]
+
+    def _get_rarity_indices(self, set_id):
+        """获取扩展包内按稀有度编码分组的卡牌行号，缺少任一稀有度时返回None"""
+        cards_by_rarity = self.card_manager.cards_by_set_rarity.get(set_id, {})
+        rarity_indices = {}
+        for code, rarity in enumerate(RARITY_CODES):
+            rows = cards_by_rarity.get(rarity)
+            if rows is None or not len(rows):
+                return None
+            rarity_indices[code] = rows
+        return rarity_indices
+
+    def _apply_legendary_guarantees(self, set_id, natural_legendary):
+        """按顺序执行前10包保底和40包保底，并更新保底状态
+
+        抽到第一张传说后，相邻两次自然出传说之间，每隔40包触发一次保底，
+        因此保底位置可以按区间整体计算，无需逐包循环。
+
+        Args:
+            set_id: 扩展包ID
+            natural_legendary: 每个卡包在不触发保底时是否已经包含传说
+
+        Returns:
+            numpy.ndarray: 每个卡包是否触发了保底（布尔数组）
+        """
+        n = len(natural_legendary)
+        timer = self.legendary_pity_timer
+        guaranteed = np.zeros(n, dtype=bool)
+        legendary_packs = np.flatnonzero(natural_legendary)
+
+        first_obtained = self.first_legendary_obtained[set_id]
+        packs_before = self.packs_opened[set_id]
+        pity = self.pity_counter[set_id]
+
+        if first_obtained:
+            # 把当前计数器换算成"上一次出传说"所在的位置
+            anchor = -1 - min(pity, timer - 1)
+        else:
+            next_natural = legendary_packs[0] if len(legendary_packs) else n
+            # 第10包（累计）保底所在的卡包位置
+            guarantee_pack = self.first_legendary_guarantee - packs_before - 1
+            if 0 <= guarantee_pack < n and guarantee_pack <= next_natural:
+                guaranteed[guarantee_pack] = True
+                anchor = guarantee_pack
+            else:
+                anchor = next_natural
+            first_obtained = anchor < n
+
+        if first_obtained and anchor < n:
+            # 每个区间从一次出传说开始，到下一次自然出传说（或最后一包）结束
+            naturals = legendary_packs[legendary_packs > anchor]
+            starts = np.concatenate(([anchor], naturals))
+            ends = np.concatenate((naturals, [n - 1]))
+            per_segment = (ends - starts) // timer
+            total = int(per_segment.sum())
+            if total:
+                # 区间内第k次保底位于 start + k*timer
+                segment_starts = np.repeat(starts, per_segment)
+                offsets = np.arange(total) - np.repeat(np.cumsum(per_segment) - per_segment, per_segment) + 1
+                guaranteed[segment_starts + offsets * timer] = True
+
+            last_event = starts[-1]
+            if per_segment[-1]:
+                last_event += per_segment[-1] * timer
+            pity = int(n - 1 - last_event)
+        elif first_obtained:
+            pity = 0
+
+        self.first_legendary_obtained[set_id] = bool(first_obtained)
+        self.packs_opened[set_id] = packs_before + n
+        self.pity_counter[set_id] = pity
+        return guaranteed
+
+    def _draw_legendary_indices(self, set_id, legendary_pool, pack_numbers):
+        """按卡包顺序抽取传说卡行号，遵循已抽到的传说不重复的规则
+
+        同一卡包内的传说卡基于开包前的记录抽取，开完一包后统一记录，
+        与界面逐包开启再调用 add_legendary_record 的行为一致。
+
+        Args:
+            set_id: 扩展包ID
+            legendary_pool: 该扩展包所有传说卡的行号数组
+            pack_numbers: 每个传说卡位所在的卡包序号（已按顺序排列）
+
+        Returns:
+            numpy.ndarray: 每个传说卡位抽到的卡牌行号
+        """
+        card_ids = self.card_manager.card_table.ids
+        pool = self.state.legendary_pool(set_id, self.card_manager)
+        result = np.empty(len(pack_numbers), dtype=np.int32)
+        random_values = self.rng.random(len(pack_numbers))
+        values = random_values.tolist()
+
+        pending_ids = []
+        current_pack = None
+        slot = 0
+        for slot, pack_number in enumerate(pack_numbers.tolist()):
+            if pack_number != current_pack:
+                for card_id in pending_ids:
+                    self.add_legendary_record(set_id, card_id)
+                pending_ids = []
+                current_pack = pack_number
+                if pool.all_opened:
+                    break
+
+            index = pool.draw_at(values[slot])
+            result[slot] = index
+            card_id = card_ids[index]
+            if card_id:
+                pending_ids.append(card_id)
+        else:
+            for card_id in pending_ids:
+                self.add_legendary_record(set_id, card_id)
+            return result
+
+        # 所有传说都已抽到后，剩余的传说卡位直接在全部传说中随机抽取
+        remaining = random_values[slot:]
+        result[slot:] = legendary_pool[(remaining * len(legendary_pool)).astype(np.int64)]
+        return result
+
+    def _simulate_packs_fallback(self, set_id, n):
+        """缺少稀有度数据时的备选方案：每包从所有卡牌中不重复地随机抽取"""
+        rows = self.card_manager.get_set_rows(set_id)
+        k = min(CARDS_PER_PACK, len(rows))
+        card_indices = np.empty((n, k), dtype=np.int32)
+        for i in range(n):
+            card_indices[i] = rows[self.rng.choice(len(rows), size=k, replace=False)]
+        # 卡牌表中的非标准稀有度（编码超出 RARITY_CODES）统一视为未知
+        rarity_codes = self.card_manager.card_table.rarity_codes[card_indices]
+        rarity_codes[rarity_codes >= len(RARITY_CODES)] = UNKNOWN_RARITY_CODE
+        return rarity_codes, card_indices
+
     def add_legendary_record(self, set_id, card_id):
         """添加已抽到的传说卡记录"""
         try:
             if set_id and card_id:
-                self.card_manager.opened_legendaries[set_id].add(card_id)
+                self.state.record_legendary(set_id, card_id, self.card_manager)
         except Exception as e:
             print(f"添加传说卡记录时出错: {e}")
             # 但不会抛出异常中断流程
@@ -300,15 +596,9 @@ class PackSimulator:
     def reset_legendary_records(self):
         """重置传说卡记录和保底计数器"""
         try:
-            # 清空已抽到传说的记录
-            self.card_manager.opened_legendaries = defaultdict(set)
-            # 重置保底计数器
-            for set_id in self.card_manager.pity_counter:
-                self.card_manager.pity_counter[set_id] = 0
-            # 重置首次传说记录
-            self.first_legendary_obtained = {}
-            # 重置已开包数记录
-            self.packs_opened = {}
+            # 清空已抽到传说的记录、保底计数器、首次传说记录和已开包数，
+            # 传说卡抽取池直接回退为全部未抽到
+            self.state.reset()
         except Exception as e:
             print(f"重置传说卡记录时出错: {e}")
             raise e
@@ -320,6 +610,8 @@ class PackSimulator:
         # 允许更小范围的浮点误差，以适应四位小数精度
         if 0.9999 <= total <= 1.0001:
             self.rarity_probabilities = probabilities
+            # 重建稀有度抽样表（开包循环中不再重建）
+            self.rarity_sampler = RaritySampler(probabilities)
             print(f"概率设置成功，总和为: {total}")
             return True
         else:
@@ -0,0 +1,211 @@
+import json
+import os
+import random
+import tempfile
+from collections import defaultdict
+
+import numpy as np
+
+from .legendary_pool import LegendaryPool
+
+STATE_FORMAT_VERSION = 1
+
+
+class SimulationState:
+    """开包模拟的全部可变状态
+
+    包括每个扩展包的已开包数、是否已抽到第一张传说、40包保底计数、已抽到的传说
+    （及其抽取池）和随机数生成器状态。卡牌数据本身保存在 CardDataManager 中且只读，
+    因此多个模拟器可以共享同一份卡牌数据而各自持有独立的状态。
+
+    状态可以分叉（fork）出互不影响的副本，可以导出为 JSON 兼容的快照，
+    也可以原子地保存到磁盘并在之后恢复，用于长时间模拟的断点续跑。
+    """
+
+    def __init__(self, seed=None):
+        """
+        Args:
+            seed: 随机种子（整数或 numpy SeedSequence），默认不固定
+        """
+        self.packs_opened = {}
+        self.first_legendary_obtained = {}
+        self.pity_counter = {}
+        self.opened_legendaries = defaultdict(set)
+        # 每个扩展包的传说卡抽取池，按需创建
+        self.legendary_pools = {}
+        # 恢复快照时记录的传说抽取顺序，创建抽取池时按该顺序重放
+        self._recorded_order = {}
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        """
+        重新设置随机数生成器
+
+        批量模拟使用 numpy 生成器，逐包模拟使用 random.Random，两者都由同一个种子派生。
+        """
+        seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(seed_sequence)
+        child = seed_sequence.spawn(1)[0]
+        self.random = random.Random(int.from_bytes(child.generate_state(4).tobytes(), 'little'))
+
+    def reset(self):
+        """重置为未开过任何卡包的状态（传说卡抽取池回退而不是重建，随机数生成器保持不变）"""
+        self.packs_opened = {}
+        self.first_legendary_obtained = {}
+        self.pity_counter = {}
+        self.opened_legendaries = defaultdict(set)
+        self._recorded_order = {}
+        for pool in self.legendary_pools.values():
+            pool.reset()
+
+    def legendary_pool(self, set_id, card_manager):
+        """
+        获取指定扩展包的传说卡抽取池（首次使用时创建）
+
+        Args:
+            set_id: 扩展包ID
+            card_manager: 提供卡牌数据的 CardDataManager
+
+        Returns:
+            LegendaryPool: 传说卡抽取池，扩展包不存在时返回None
+        """
+        pool = self.legendary_pools.get(set_id)
+        if pool is None:
+            if set_id not in card_manager.cards_by_set_rarity:
+                return None
+            rows = card_manager.cards_by_set_rarity[set_id].get('LEGENDARY', np.zeros(0, dtype=np.int32)).tolist()
+            pool = LegendaryPool(rows, [card_manager.card_table.ids[row] for row in rows])
+            opened = self.opened_legendaries.get(set_id, set())
+            order = [card_id for card_id in self._recorded_order.pop(set_id, []) if card_id in opened]
+            for card_id in order + sorted(opened.difference(order)):
+                pool.record(card_id)
+            self.legendary_pools[set_id] = pool
+        return pool
+
+    def record_legendary(self, set_id, card_id, card_manager):
+        """记录已抽到的传说卡"""
+        self.opened_legendaries[set_id].add(card_id)
+        pool = self.legendary_pool(set_id, card_manager)
+        if pool is not None:
+            pool.record(card_id)
+
+    def fork(self, seed=None):
+        """
+        复制出一个独立的状态，之后对两者的修改互不影响
+
+        Args:
+            seed: 为分叉设置新的随机种子；为None时复制当前随机数状态（两者之后会抽出相同的结果）
+
+        Returns:
+            SimulationState: 状态副本
+        """
+        state = SimulationState.__new__(SimulationState)
+        state.packs_opened = dict(self.packs_opened)
+        state.first_legendary_obtained = dict(self.first_legendary_obtained)
+        state.pity_counter = dict(self.pity_counter)
+        state.opened_legendaries = defaultdict(set, {k: set(v) for k, v in self.opened_legendaries.items()})
+        state.legendary_pools = {k: pool.copy() for k, pool in self.legendary_pools.items()}
+        state._recorded_order = {k: list(v) for k, v in self._recorded_order.items()}
+        if seed is None:
+            state.rng = np.random.default_rng()
+            state.rng.bit_generator.state = self.rng.bit_generator.state
+            state.random = random.Random()
+            state.random.setstate(self.random.getstate())
+        else:
+            state.reseed(seed)
+        return state
+
+    def snapshot(self):
+        """
+        导出 JSON 兼容的状态快照
+
+        Returns:
+            dict: 状态快照，可通过 from_snapshot 恢复
+        """
+        opened = {}
+        for set_id, card_ids in self.opened_legendaries.items():
+            if not card_ids:
+                continue
+            pool = self.legendary_pools.get(set_id)
+            # 按记录顺序保存，恢复后抽取池的顺序与原状态一致
+            order = pool.recorded_ids() if pool is not None else self._recorded_order.get(set_id, [])
+            order = [card_id for card_id in order if card_id in card_ids]
+            opened[set_id] = order + sorted(card_ids.difference(order))
+
+        version, internal_state, gauss_next = self.random.getstate()
+        return {
+            'version': STATE_FORMAT_VERSION,
+            'packs_opened': dict(self.packs_opened),
+            'first_legendary_obtained': dict(self.first_legendary_obtained),
+            'pity_counter': dict(self.pity_counter),
+            'opened_legendaries': opened,
+            'numpy_rng': self.rng.bit_generator.state,
+            'python_random': [version, list(internal_state), gauss_next],
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """
+        从快照恢复状态
+
+        Args:
+            snapshot: snapshot() 导出的字典
+
+        Returns:
+            SimulationState: 恢复的状态
+        """
+        if snapshot.get('version') != STATE_FORMAT_VERSION:
+            raise ValueError(f"不支持的模拟状态版本: {snapshot.get('version')}")
+
+        state = cls()
+        state.packs_opened = {k: int(v) for k, v in snapshot['packs_opened'].items()}
+        state.first_legendary_obtained = {k: bool(v) for k, v in snapshot['first_legendary_obtained'].items()}
+        state.pity_counter = {k: int(v) for k, v in snapshot['pity_counter'].items()}
+        for set_id, card_ids in snapshot['opened_legendaries'].items():
+            state.opened_legendaries[set_id] = set(card_ids)
+            state._recorded_order[set_id] = list(card_ids)
+
+        bit_generator = snapshot['numpy_rng']
+        state.rng = np.random.Generator(getattr(np.random, bit_generator['bit_generator'])())
+        state.rng.bit_generator.state = bit_generator
+        version, internal_state, gauss_next = snapshot['python_random']
+        state.random.setstate((version, tuple(internal_state), gauss_next))
+        return state
+
+    def save(self, path):
+        """
+        原子地保存状态到文件（先写入临时文件再替换，写入中途崩溃不会损坏已有文件）
+
+        Args:
+            path: 文件路径
+        """
+        write_json_atomic(path, self.snapshot())
+
+    @classmethod
+    def load(cls, path):
+        """从文件加载状态"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_snapshot(json.load(f))
+
+
+def write_json_atomic(path, data):
+    """
+    原子地写入JSON文件
+
+    Args:
+        path: 文件路径
+        data: JSON 兼容的数据
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
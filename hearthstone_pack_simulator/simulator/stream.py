@@ -0,0 +1,357 @@
+"""
+流式开包
+
+PackSimulator.iter_packs 按批生成紧凑的卡包记录（稀有度编码和卡牌行号数组），
+不保存任何卡牌字典。PackStream 把这些记录依次分发给订阅的消费者
+（稀有度计数、卡牌计数、报告写入等），因此内存占用只与批大小和卡牌数量有关，
+与模拟的总包数无关。
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import NamedTuple
+
+import numpy as np
+
+from .rarity_sampler import RARITY_CODES
+from .state import SimulationState, write_json_atomic
+
+DEFAULT_BATCH_SIZE = 10_000  # 每批生成的卡包数量
+DEFAULT_CHECKPOINT_INTERVAL = 1_000_000  # 每生成多少包保存一次检查点
+
+
+class PackBatch(NamedTuple):
+    """一批卡包的紧凑记录"""
+    set_id: str
+    start: int                  # 本批第一包的序号（从0开始，断点续跑时从已完成的包数开始）
+    rarity_codes: np.ndarray    # 形状 (包数, 5)，RARITY_CODES 稀有度编码，未知稀有度为-1
+    card_rows: np.ndarray       # 形状 (包数, 5)，卡牌在 CardTable 中的行号
+
+    @property
+    def packs(self):
+        """本批卡包数量"""
+        return len(self.card_rows)
+
+
+class PackConsumer(ABC):
+    """卡包流的消费者基类（子类必须实现 consume，否则创建时就会报错）"""
+
+    @abstractmethod
+    def consume(self, batch):
+        """处理一批卡包记录"""
+
+    def finish(self):
+        """卡包流结束时调用"""
+
+    def get_state(self):
+        """返回 JSON 兼容的消费者状态，用于断点续跑；不支持时返回None"""
+        return None
+
+    def set_state(self, state):
+        """从 get_state 返回的状态恢复"""
+
+
+class RarityCounter(PackConsumer):
+    """稀有度计数器"""
+
+    def __init__(self):
+        self.packs = 0
+        self.totals = np.zeros(len(RARITY_CODES), dtype=np.int64)
+        self.by_set = {}
+
+    def consume(self, batch):
+        codes = batch.rarity_codes.ravel()
+        counts = np.bincount(codes[codes >= 0], minlength=len(RARITY_CODES))
+        self.packs += batch.packs
+        self.totals += counts
+        if batch.set_id in self.by_set:
+            self.by_set[batch.set_id] += counts
+        else:
+            self.by_set[batch.set_id] = counts.astype(np.int64)
+
+    def get_state(self):
+        return {
+            'packs': self.packs,
+            'totals': self.totals.tolist(),
+            'by_set': {set_id: counts.tolist() for set_id, counts in self.by_set.items()},
+        }
+
+    def set_state(self, state):
+        self.packs = state['packs']
+        self.totals = np.array(state['totals'], dtype=np.int64)
+        self.by_set = {set_id: np.array(counts, dtype=np.int64) for set_id, counts in state['by_set'].items()}
+
+    def as_dict(self):
+        """返回 {稀有度: 数量}"""
+        return {rarity: int(count) for rarity, count in zip(RARITY_CODES, self.totals)}
+
+
+class CardCounter(PackConsumer):
+    """按卡牌行号计数，内存占用只与卡牌表大小有关"""
+
+    def __init__(self, card_table):
+        """
+        Args:
+            card_table: 卡牌数据管理器中的 CardTable
+        """
+        self.card_table = card_table
+        self.counts = np.zeros(len(card_table), dtype=np.int64)
+
+    def consume(self, batch):
+        self.counts += np.bincount(batch.card_rows.ravel(), minlength=len(self.counts))
+
+    def get_state(self):
+        return {'counts': self.counts.tolist()}
+
+    def set_state(self, state):
+        self.counts = np.array(state['counts'], dtype=np.int64)
+
+    def items(self):
+        """
+        生成每张抽到的卡牌及其数量（此时才生成卡牌字典）
+
+        Yields:
+            tuple: (卡牌字典, 数量)，可直接传给 ReportGenerator.generate_pack_report_from_counts
+        """
+        for row in np.flatnonzero(self.counts).tolist():
+            yield self.card_table.card(row), int(self.counts[row])
+
+    def most_common(self, n=10):
+        """返回数量最多的 n 张卡牌 [(卡牌字典, 数量)]"""
+        rows = np.argsort(self.counts, kind='stable')[::-1][:n]
+        return [(self.card_table.card(row), int(self.counts[row])) for row in rows if self.counts[row]]
+
+
+class _PackBuffer:
+    """一个扩展包的卡包记录，容量不足时按两倍扩容，追加的均摊开销与已保存的包数无关"""
+
+    MIN_CAPACITY = 1024
+
+    def __init__(self):
+        self.size = 0
+        self.codes = np.zeros((0, 5), dtype=np.int8)
+        self.rows = np.zeros((0, 5), dtype=np.int32)
+
+    def append(self, codes, rows):
+        end = self.size + len(rows)
+        if end > len(self.rows):
+            capacity = max(end, 2 * len(self.rows), self.MIN_CAPACITY)
+            new_codes = np.empty((capacity, 5), dtype=np.int8)
+            new_rows = np.empty((capacity, 5), dtype=np.int32)
+            new_codes[:self.size] = self.codes[:self.size]
+            new_rows[:self.size] = self.rows[:self.size]
+            self.codes, self.rows = new_codes, new_rows
+        self.codes[self.size:end] = codes
+        self.rows[self.size:end] = rows
+        self.size = end
+
+
+class SimulationResults(PackConsumer):
+    """保存每一包的紧凑记录（稀有度编码和卡牌行号），供界面展示和生成报告使用
+
+    每张卡只占 5 字节（1 字节稀有度编码 + 4 字节行号），100万张卡约 5MB，
+    卡牌字典只在需要展示或生成报告时才从 CardTable 生成。
+    """
+
+    def __init__(self, card_table):
+        """
+        Args:
+            card_table: 卡牌数据管理器中的 CardTable
+        """
+        self.card_table = card_table
+        self.clear()
+
+    def clear(self):
+        """清空所有记录"""
+        self.set_ids = []        # 按首次出现的顺序保存扩展包ID
+        self._buffers = {}       # 扩展包ID -> _PackBuffer
+        self.total_packs = 0
+
+    def consume(self, batch):
+        buffer = self._buffers.get(batch.set_id)
+        if buffer is None:
+            self.set_ids.append(batch.set_id)
+            buffer = self._buffers[batch.set_id] = _PackBuffer()
+        buffer.append(batch.rarity_codes, batch.card_rows)
+        self.total_packs += batch.packs
+
+    def pack_count(self, set_id):
+        """扩展包已保存的卡包数量"""
+        buffer = self._buffers.get(set_id)
+        return buffer.size if buffer is not None else 0
+
+    def rarity_codes(self, set_id):
+        """扩展包每包每张卡的稀有度编码，形状 (包数, 5)（内部缓冲区的视图，不拷贝，调用方不要修改）"""
+        buffer = self._buffers.get(set_id)
+        if buffer is None:
+            return np.zeros((0, 5), dtype=np.int8)
+        return buffer.codes[:buffer.size]
+
+    def card_rows(self, set_id):
+        """扩展包每包每张卡在 CardTable 中的行号，形状 (包数, 5)（内部缓冲区的视图，不拷贝，调用方不要修改）"""
+        buffer = self._buffers.get(set_id)
+        if buffer is None:
+            return np.zeros((0, 5), dtype=np.int32)
+        return buffer.rows[:buffer.size]
+
+    def pack_cards(self, set_id, index):
+        """返回扩展包第 index 包（从0开始）的卡牌字典列表"""
+        return self.card_table.cards(self.card_rows(set_id)[index])
+
+    def rarity_counts(self):
+        """返回 {稀有度: 数量}，只包含数量大于0的稀有度"""
+        totals = np.zeros(len(RARITY_CODES), dtype=np.int64)
+        for set_id in self.set_ids:
+            codes = self.rarity_codes(set_id).ravel()
+            totals += np.bincount(codes[codes >= 0], minlength=len(RARITY_CODES))
+        return {rarity: int(count) for rarity, count in zip(RARITY_CODES, totals) if count}
+
+    def card_counts(self):
+        """返回每个卡牌行号被抽到的次数"""
+        counts = np.zeros(len(self.card_table), dtype=np.int64)
+        for set_id in self.set_ids:
+            counts += np.bincount(self.card_rows(set_id).ravel(), minlength=len(counts))
+        return counts
+
+    def items(self):
+        """
+        生成每张抽到的卡牌及其数量
+
+        Yields:
+            tuple: (卡牌字典, 数量)，可直接传给 ReportGenerator.generate_pack_report_from_counts
+        """
+        counts = self.card_counts()
+        for row in np.flatnonzero(counts).tolist():
+            yield self.card_table.card(row), int(counts[row])
+
+    def get_state(self):
+        return {set_id: [self.rarity_codes(set_id).tolist(), self.card_rows(set_id).tolist()]
+                for set_id in self.set_ids}
+
+    def set_state(self, state):
+        self.clear()
+        for set_id, (codes, rows) in state.items():
+            codes = np.array(codes, dtype=np.int8).reshape(-1, 5)
+            rows = np.array(rows, dtype=np.int32).reshape(-1, 5)
+            self.consume(PackBatch(set_id, 0, codes, rows))
+
+
+class PackStream:
+    """把模拟器生成的卡包流分发给订阅的消费者"""
+
+    def __init__(self, simulator, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Args:
+            simulator: PackSimulator
+            batch_size: 每批生成的卡包数量
+        """
+        self.simulator = simulator
+        self.batch_size = batch_size
+        self.consumers = []
+        self.stopped = False
+
+    def subscribe(self, consumer):
+        """订阅卡包流，返回传入的消费者以便链式使用"""
+        self.consumers.append(consumer)
+        return consumer
+
+    def unsubscribe(self, consumer):
+        """取消订阅"""
+        if consumer in self.consumers:
+            self.consumers.remove(consumer)
+
+    def stop(self):
+        """请求停止 run（可在其他线程调用，当前批次完成后生效）
+
+        停止请求在 run 开始之前发出也有效，且不会被清除：停止后的卡包流不再开启卡包，
+        继续模拟需要新建 PackStream（指定检查点时从检查点继续）。
+        """
+        self.stopped = True
+
+    def run(self, pack_counts, progress_callback=None, checkpoint_path=None,
+            checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+        """
+        按顺序开启各扩展包的卡包并分发给消费者
+
+        指定 checkpoint_path 时，每生成 checkpoint_interval 包就把模拟状态、各消费者状态和进度
+        原子地写入检查点文件；如果文件已存在，则先从中恢复并跳过已完成的卡包。
+        恢复时需要以相同顺序订阅相同类型的消费者。全部完成后删除检查点文件。
+        调用 stop 后在当前批次完成时返回，此时会保存检查点（如果指定了路径）以便之后继续。
+
+        Args:
+            pack_counts: {扩展包ID: 卡包数量} 或 [(扩展包ID, 卡包数量)] 列表
+            progress_callback: 进度回调 callback(已完成包数, 总包数)
+            checkpoint_path: 检查点文件路径，默认不保存检查点
+            checkpoint_interval: 保存检查点的间隔包数
+
+        Returns:
+            int: 开启的卡包总数（包含从检查点恢复的部分）
+        """
+        if isinstance(pack_counts, dict):
+            pack_counts = list(pack_counts.items())
+        pack_counts = [[set_id, int(n)] for set_id, n in pack_counts]
+        total = sum(n for _, n in pack_counts)
+
+        # 进度按 pack_counts 中的位置记录：同一扩展包可以出现多次，每一项单独计数
+        done_by_entry = [0] * len(pack_counts)
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            done_by_entry = self._restore_checkpoint(checkpoint_path, pack_counts)
+            print(f"已从检查点恢复，已完成 {sum(done_by_entry)} 包")
+        done = sum(done_by_entry)
+        since_checkpoint = 0
+
+        try:
+            for entry, (set_id, n) in enumerate(pack_counts):
+                if self.stopped:
+                    break
+                start = done_by_entry[entry]
+                for batch in self.simulator.iter_packs(set_id, n, self.batch_size, start=start):
+                    for consumer in self.consumers:
+                        consumer.consume(batch)
+                    done += batch.packs
+                    done_by_entry[entry] = batch.start + batch.packs
+                    since_checkpoint += batch.packs
+                    if checkpoint_path and since_checkpoint >= checkpoint_interval:
+                        self._save_checkpoint(checkpoint_path, pack_counts, done_by_entry)
+                        since_checkpoint = 0
+                    if progress_callback:
+                        progress_callback(done, total)
+                    if self.stopped:
+                        break
+        finally:
+            for consumer in self.consumers:
+                consumer.finish()
+
+        if self.stopped:
+            if checkpoint_path:
+                self._save_checkpoint(checkpoint_path, pack_counts, done_by_entry)
+        elif checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return done
+
+    def _save_checkpoint(self, path, pack_counts, done_by_entry):
+        """保存检查点"""
+        write_json_atomic(path, {
+            'pack_counts': pack_counts,
+            'done': done_by_entry,
+            'state': self.simulator.state.snapshot(),
+            'consumers': [consumer.get_state() for consumer in self.consumers],
+        })
+
+    def _restore_checkpoint(self, path, pack_counts):
+        """从检查点恢复模拟状态和消费者状态，返回 pack_counts 每一项已完成的包数"""
+        with open(path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint['pack_counts'] != pack_counts:
+            raise ValueError("检查点中的卡包设置与本次模拟不一致")
+        if not isinstance(checkpoint['done'], list) or len(checkpoint['done']) != len(pack_counts):
+            raise ValueError("检查点格式已过期，请删除检查点文件后重新模拟")
+        if len(checkpoint['consumers']) != len(self.consumers):
+            raise ValueError("检查点中的消费者数量与当前订阅不一致")
+
+        self.simulator.state = SimulationState.from_snapshot(checkpoint['state'])
+        for consumer, state in zip(self.consumers, checkpoint['consumers']):
+            if state is not None:
+                consumer.set_state(state)
+        return [int(n) for n in checkpoint['done']]
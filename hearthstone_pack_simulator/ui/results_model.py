@@ -0,0 +1,169 @@
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PyQt5.QtGui import QPalette
+from PyQt5.QtWidgets import QStyledItemDelegate
+
+from ui_utils import RARITY_COLORS
+from ..simulator.rarity_sampler import RARITY_CODES
+
+RARITY_ROLE = Qt.UserRole + 1   # 行对应的稀有度（卡包行为包内最高稀有度）
+FETCH_SIZE = 1000               # 每次向视图加载的卡包数量
+
+# internalId 编码：扩展包行为0，卡包行为 扩展包序号+1，
+# 卡牌行为 ((卡包序号+1) << SET_BITS) | (扩展包序号+1)
+SET_BITS = 16
+SET_MASK = (1 << SET_BITS) - 1
+
+
+class SimulationResultsModel(QAbstractItemModel):
+    """抽卡结果的树形模型：扩展包 -> 卡包 -> 卡牌
+
+    直接读取 SimulationResults 中的紧凑数组，只在视图请求某一行时才生成显示文本，
+    不为每张卡创建任何对象。卡包按 FETCH_SIZE 分页，通过 canFetchMore/fetchMore
+    在展开或滚动到底部时才加载，因此结果再多，视图也只处理可见和已加载的行。
+    """
+
+    def __init__(self, results, display_manager, rarity_tags, parent=None):
+        """
+        Args:
+            results: SimulationResults
+            display_manager: TextDisplayManager，用于本地化名称
+            rarity_tags: {稀有度: 显示标记}
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.results = results
+        self.display_manager = display_manager
+        self.rarity_tags = rarity_tags
+        self.set_ids = []
+        self.loaded = []  # 每个扩展包已加载到视图的卡包数
+
+    def refresh(self):
+        """SimulationResults 有新数据后调用，插入新的扩展包并补齐首页卡包"""
+        for set_id in self.results.set_ids[len(self.set_ids):]:
+            row = len(self.set_ids)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.set_ids.append(set_id)
+            self.loaded.append(0)
+            self.endInsertRows()
+
+        for row, set_id in enumerate(self.set_ids):
+            # 已加载的卡包不足一页时直接补齐，其余等视图请求时再加载
+            if self.loaded[row] < FETCH_SIZE:
+                self._load(row, FETCH_SIZE - self.loaded[row])
+            top_left = self.index(row, 0)
+            self.dataChanged.emit(top_left, top_left, [Qt.DisplayRole])
+
+    def reset(self):
+        """清空模型（SimulationResults 清空后调用）"""
+        self.beginResetModel()
+        self.set_ids = []
+        self.loaded = []
+        self.endResetModel()
+
+    def _load(self, set_row, count):
+        """向视图加载扩展包的至多 count 个卡包"""
+        total = self.results.pack_count(self.set_ids[set_row])
+        count = min(count, total - self.loaded[set_row])
+        if count <= 0:
+            return
+        first = self.loaded[set_row]
+        self.beginInsertRows(self.index(set_row, 0), first, first + count - 1)
+        self.loaded[set_row] += count
+        self.endInsertRows()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, 0)
+        parent_id = parent.internalId()
+        if parent_id == 0:
+            return self.createIndex(row, column, parent.row() + 1)
+        return self.createIndex(row, column, ((parent.row() + 1) << SET_BITS) | parent_id)
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        internal_id = index.internalId()
+        if internal_id == 0:
+            return QModelIndex()
+        set_row = (internal_id & SET_MASK) - 1
+        pack_row = (internal_id >> SET_BITS) - 1
+        if pack_row < 0:
+            return self.createIndex(set_row, 0, 0)
+        return self.createIndex(pack_row, 0, set_row + 1)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.set_ids)
+        if parent.column() != 0:
+            return 0
+        internal_id = parent.internalId()
+        if internal_id == 0:
+            return self.loaded[parent.row()]
+        if internal_id >> SET_BITS:
+            return 0
+        return self.results.card_rows(self.set_ids[internal_id - 1]).shape[1]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.set_ids)
+        internal_id = parent.internalId()
+        if internal_id == 0:
+            return self.results.pack_count(self.set_ids[parent.row()]) > 0
+        return not internal_id >> SET_BITS
+
+    def canFetchMore(self, parent):
+        if not parent.isValid() or parent.internalId() != 0:
+            return False
+        row = parent.row()
+        return self.loaded[row] < self.results.pack_count(self.set_ids[row])
+
+    def fetchMore(self, parent):
+        if parent.isValid() and parent.internalId() == 0:
+            self._load(parent.row(), FETCH_SIZE)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, RARITY_ROLE):
+            return None
+
+        internal_id = index.internalId()
+        if internal_id == 0:
+            if role != Qt.DisplayRole:
+                return None
+            set_id = self.set_ids[index.row()]
+            set_name = self.display_manager.get_localized_set_name(set_id)
+            return f"{set_name}（{self.results.pack_count(set_id)} 包）"
+
+        set_id = self.set_ids[(internal_id & SET_MASK) - 1]
+        pack_row = (internal_id >> SET_BITS) - 1
+        if pack_row < 0:
+            # 卡包行：以包内最高稀有度着色
+            if role == RARITY_ROLE:
+                code = int(self.results.rarity_codes(set_id)[index.row()].max())
+                return RARITY_CODES[code] if code >= 0 else None
+            return f"卡包 #{index.row() + 1}"
+
+        card_table = self.results.card_table
+        card_row = int(self.results.card_rows(set_id)[pack_row, index.row()])
+        rarity = card_table.rarity(card_row)
+        if role == RARITY_ROLE:
+            return rarity
+        rarity = rarity or 'COMMON'
+        card_name = card_table.names[card_row] or '未知卡牌'
+        localized_rarity = self.display_manager.get_localized_rarity_name(rarity)
+        rarity_tag = self.rarity_tags.get(rarity, "【灰】")
+        return f"{rarity_tag}{card_name} ({localized_rarity})"
+
+
+class RarityColorDelegate(QStyledItemDelegate):
+    """按 RARITY_ROLE 使用 RARITY_COLORS 为行文字着色"""
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        color = RARITY_COLORS.get(index.data(RARITY_ROLE))
+        if color is not None:
+            option.palette.setColor(QPalette.Text, color)
@@ -0,0 +1,85 @@
+import time
+import traceback
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from ..simulator.stream import PackStream, PackConsumer
+
+WORKER_BATCH_SIZE = 1000    # 后台线程每批生成的卡包数量（越小取消越及时）
+REFRESH_INTERVAL = 0.1      # 向界面发送结果的最短间隔（秒），即界面刷新频率上限
+
+
+class _ThrottledEmitter(PackConsumer):
+    """收集卡包批次，按固定时间间隔通过信号一次性发送给界面"""
+
+    def __init__(self, worker, interval):
+        self.worker = worker
+        self.interval = interval
+        self.pending = []
+        self.done = 0
+        self.last_emit = time.monotonic()
+
+    def consume(self, batch):
+        self.pending.append(batch)
+        self.done += batch.packs
+        if time.monotonic() - self.last_emit >= self.interval:
+            self.flush()
+
+    def finish(self):
+        self.flush()
+
+    def flush(self):
+        """发送已收集的批次和最新进度"""
+        self.last_emit = time.monotonic()
+        if self.pending:
+            batches, self.pending = self.pending, []
+            self.worker.batches_ready.emit(batches)
+        self.worker.progress.emit(self.done, self.worker.total)
+
+
+class SimulationWorker(QThread):
+    """在后台线程中运行开包模拟
+
+    模拟期间界面线程不应再使用同一个模拟器。结果以 PackBatch 列表的形式
+    按 REFRESH_INTERVAL 节流发送，界面每次收到信号只需要刷新一次，
+    模拟速度不再受界面重绘的影响。
+    """
+
+    progress = pyqtSignal(int, int)              # 已完成包数, 总包数
+    batches_ready = pyqtSignal(object)           # [PackBatch]
+    simulation_finished = pyqtSignal(int, bool)  # 完成包数, 是否被取消
+    simulation_failed = pyqtSignal(str)          # 错误信息
+
+    def __init__(self, simulator, pack_counts, batch_size=WORKER_BATCH_SIZE,
+                 refresh_interval=REFRESH_INTERVAL, parent=None):
+        """
+        Args:
+            simulator: PackSimulator
+            pack_counts: [(扩展包ID, 卡包数量)] 列表，按顺序模拟
+            batch_size: 每批生成的卡包数量
+            refresh_interval: 向界面发送结果的最短间隔（秒）
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.pack_counts = list(pack_counts)
+        self.total = sum(n for _, n in self.pack_counts)
+        self.stream = PackStream(simulator, batch_size)
+        self.stream.subscribe(_ThrottledEmitter(self, refresh_interval))
+
+    def cancel(self):
+        """请求取消模拟（当前批次完成后停止）"""
+        self.stream.stop()
+
+    @property
+    def cancelled(self):
+        """是否已请求取消"""
+        return self.stream.stopped
+
+    def run(self):
+        try:
+            done = self.stream.run(self.pack_counts)
+            self.simulation_finished.emit(done, self.stream.stopped)
+        except Exception as e:
+            print(f"后台模拟抽卡时出错: {e}")
+            traceback.print_exc()
+            self.simulation_failed.emit(str(e))
@@ -1,7 +1,9 @@
 import sys
 import os
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QPushButton, QLabel, QMessageBox, QWidget, QDialog
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QPushButton, QLabel, QMessageBox, QWidget, QDialog, QProgressBar
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from card_repository import CardRepository
+from config import CARD_JSON_DIR, CARD_STORE_PATH
 
 # 尝试导入主应用程序类
 try:
@@ -27,23 +29,26 @@ except ImportError as e:
 
 class UpdateThread(QThread):
     """更新数据的线程"""
-    finished = pyqtSignal(bool)  # 发送更新是否成功的信号
+    finished = pyqtSignal(bool, bool)  # 发送更新是否成功、卡牌数据是否有变化的信号
+    progress = pyqtSignal(int, int)  # 已下载字节数, 总字节数（未知时为0）
 
     def run(self):
         try:
-            data_manager = HearthstoneDataManager()
+            # 先关闭共享的卡牌数据库，更新时才能替换数据库文件；之后打开的工具会重新加载
+            CardRepository.reset_instance()
+            data_manager = HearthstoneDataManager(progress_callback=self.progress.emit)
             success = data_manager.run_all()
-            self.finished.emit(success)
+            self.finished.emit(success, data_manager.data_changed)
         except Exception as e:
             print(f"更新过程中出错: {e}")
-            self.finished.emit(False)
+            self.finished.emit(False, False)
 
 class UpdateDialog(QDialog):
     """更新进度窗口"""
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("更新数据")
-        self.setFixedSize(300, 100)
+        self.setFixedSize(360, 120)
         self.setWindowFlags(self.windowFlags() & ~Qt.WindowCloseButtonHint)  # 禁用关闭按钮
         
         # 创建布局
@@ -54,15 +59,38 @@ class UpdateDialog(QDialog):
         self.label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.label)
         
+        # 下载进度条（总大小未知时显示为忙碌状态）
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setTextVisible(False)
+        layout.addWidget(self.progress_bar)
+        
         # 创建并启动更新线程
         self.update_thread = UpdateThread()
+        self.update_thread.progress.connect(self.on_download_progress)
         self.update_thread.finished.connect(self.on_update_finished)
         self.update_thread.start()
     
-    def on_update_finished(self, success):
+    def on_download_progress(self, done, total):
+        """更新下载进度"""
+        done_mb = done / 1024 / 1024
+        if total > 0:
+            # 进度条按KB计算，避免超出int范围
+            self.progress_bar.setRange(0, total // 1024)
+            self.progress_bar.setValue(done // 1024)
+            self.label.setText(f"正在下载卡牌数据：{done_mb:.1f} / {total / 1024 / 1024:.1f} MB")
+        else:
+            self.label.setText(f"正在下载卡牌数据：{done_mb:.1f} MB")
+        if total > 0 and done >= total:
+            self.label.setText("下载完成，正在整理卡牌数据，请勿关闭程序...")
+            self.progress_bar.setRange(0, 0)
+    
+    def on_update_finished(self, success, changed):
         """更新完成后的处理"""
         self.accept()  # 关闭对话框
-        if success:
+        if success and not changed:
+            QMessageBox.information(self.parent(), "更新完成", "卡牌数据已是最新，无需更新。")
+        elif success:
             QMessageBox.information(self.parent(), "更新完成", "卡牌数据更新成功！")
         else:
             QMessageBox.warning(self.parent(), "更新失败", "卡牌数据更新失败，请检查控制台输出。")
@@ -161,13 +189,12 @@ def run_app():
     app = QApplication(sys.argv)
     app.setStyle("Fusion") # 设置一个现代的外观风格
 
-    # 检查必要的目录
-    required_dirs = ['hsJSON卡牌数据', '炉石卡牌分类']
-    missing_dirs = [d for d in required_dirs if not os.path.exists(d)]
+    # 检查必要的数据（卡牌数据库可以由已下载的 cards_complete.json 生成）
+    card_data_paths = [CARD_STORE_PATH, os.path.join(CARD_JSON_DIR, "cards_complete.json")]
     
-    if missing_dirs:
-        # 如果有缺失的目录，显示提示并自动运行数据管理器
-        msg = f"检测到以下必要目录缺失：\n{', '.join(missing_dirs)}\n\n即将自动下载所需数据..."
+    if not any(os.path.exists(path) for path in card_data_paths):
+        # 如果缺少卡牌数据，显示提示并自动运行数据管理器
+        msg = f"检测到卡牌数据缺失：\n{', '.join(card_data_paths)}\n\n即将自动下载所需数据..."
         QMessageBox.information(None, "数据检查", msg)
         
         if HearthstoneDataManager:
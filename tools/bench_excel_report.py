@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试Excel抽卡报告（create_excel_report）的生成时间和峰值内存
+以已加载的卡牌为模板生成指定行数的报告数据（每行一张不同的卡牌），
+峰值内存使用 tracemalloc 统计 Python 分配的内存（单独生成一次，不计入耗时）
+需要在项目根目录下运行，并已准备好卡牌数据
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hearthstone_pack_simulator.simulator.simulator import CardDataManager
+from hearthstone_pack_simulator.report_generator import ReportGenerator
+
+
+def build_cards_by_class(card_manager, rows):
+    """生成 rows 行报告数据 {职业: [卡牌]}"""
+    card_table = card_manager.card_table
+    cards_by_class = defaultdict(list)
+    for i in range(rows):
+        card = card_table.card(i % len(card_table))
+        card['id'] = f"{card.get('id', '')}_{i}"
+        card['name'] = f"{card.get('name', '')}{i}"
+        card['count'] = i % 3 + 1
+        cards_by_class[card.get('cardClass', 'NEUTRAL')].append(card)
+    return dict(cards_by_class)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Excel抽卡报告性能测试')
+    parser.add_argument('--rows', type=int, default=100_000, help='报告行数')
+    parser.add_argument('--skip-memory', action='store_true', help='不测量峰值内存（测量需要再生成一次报告）')
+    parser.add_argument('--output', help='报告输出路径，默认写入临时目录并在结束后删除')
+    args = parser.parse_args()
+
+    card_manager = CardDataManager()
+    card_manager.load_card_data()
+    report_generator = ReportGenerator()
+    cards_by_class = build_cards_by_class(card_manager, args.rows)
+
+    output = args.output or os.path.join(tempfile.mkdtemp(), 'bench_report.xlsx')
+
+    # 计时和内存分开测量：tracemalloc 会显著拖慢执行
+    start = time.perf_counter()
+    report_generator.create_excel_report(output, cards_by_class)
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if not args.skip_memory:
+        tracemalloc.start()
+        report_generator.create_excel_report(output, cards_by_class)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"报告行数: {args.rows}")
+    print(f"生成耗时: {seconds:.2f}s")
+    if peak is not None:
+        print(f"峰值内存: {peak / 1024 / 1024:.1f}MB")
+    print(f"文件大小: {os.path.getsize(output) / 1024 / 1024:.1f}MB")
+    if not args.output:
+        os.remove(output)
+        os.rmdir(os.path.dirname(output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试卡牌数据整理（organize_hearthstone_cards）的耗时和峰值内存随数据量的变化
+以现有的 cards_complete.json 为模板复制出指定数量的卡牌（复制的卡牌使用新的卡牌ID，扩展包不变），
+在临时目录中完整整理一次；峰值内存使用 tracemalloc 统计（单独整理一次，不计入耗时）
+需要在项目根目录下运行，并已下载卡牌数据
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CARD_JSON_DIR
+from hearthstone_data_manager.data_manager import HearthstoneDataManager
+
+
+def write_cards(template, count, path):
+    """复制模板卡牌生成 count 张卡牌，逐张写入 path"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for i in range(count):
+            card = dict(template[i % len(template)])
+            copy = i // len(template)
+            if copy:
+                card['id'] = f"{card.get('id', '')}_{copy}"
+            if i:
+                f.write(',')
+            f.write(json.dumps(card, ensure_ascii=False))
+        f.write(']')
+
+
+def organize(base_dir):
+    """在 base_dir 中整理一次（清空上次的结果），返回是否成功"""
+    manager = HearthstoneDataManager(base_dir=base_dir, export_json=True)
+    shutil.rmtree(manager.organized_dir)
+    os.makedirs(manager.organized_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return manager.organize_hearthstone_cards()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='卡牌数据整理性能测试')
+    parser.add_argument('--cards', type=int, nargs='+', default=[10_000, 50_000, 100_000], help='卡牌数量')
+    parser.add_argument('--skip-memory', action='store_true', help='不测量峰值内存（测量需要再整理一次）')
+    args = parser.parse_args()
+
+    with open(os.path.join(CARD_JSON_DIR, "cards_complete.json"), 'r', encoding='utf-8') as f:
+        template = json.load(f)
+
+    print(f"{'卡牌数':>8} {'文件(MB)':>9} {'耗时(s)':>8} {'峰值内存(MB)':>12}")
+    for count in args.cards:
+        base_dir = tempfile.mkdtemp()
+        try:
+            json_dir = os.path.join(base_dir, "hsJSON卡牌数据")
+            os.makedirs(json_dir)
+            cards_path = os.path.join(json_dir, "cards_complete.json")
+            write_cards(template, count, cards_path)
+            size = os.path.getsize(cards_path) / 1024 / 1024
+
+            start = time.perf_counter()
+            if not organize(base_dir):
+                print(f"{count:>8} 整理失败")
+                continue
+            seconds = time.perf_counter() - start
+
+            peak = ''
+            if not args.skip_memory:
+                tracemalloc.start()
+                organize(base_dir)
+                peak = f"{tracemalloc.get_traced_memory()[1] / 1024 / 1024:.1f}"
+                tracemalloc.stop()
+            print(f"{count:>8} {size:>9.1f} {seconds:>8.2f} {peak:>12}")
+        finally:
+            shutil.rmtree(base_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+对比逐包模拟 (simulate_pack_opening) 与批量模拟 (simulate_packs) 的速度
+需要在项目根目录下运行，并已准备好 炉石卡牌分类 数据目录
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hearthstone_pack_simulator.simulator.simulator import CardDataManager, PackSimulator
+
+
+def bench_loop(simulator, set_id, packs):
+    """逐包模拟，返回耗时（秒）"""
+    simulator.reset_legendary_records()
+    start = time.perf_counter()
+    # 屏蔽保底触发时的打印，避免输出影响计时
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(packs):
+            for card in simulator.simulate_pack_opening(set_id):
+                if card.get('rarity') == 'LEGENDARY':
+                    simulator.add_legendary_record(set_id, card.get('id', ''))
+    return time.perf_counter() - start
+
+
+def bench_batch(simulator, set_id, packs):
+    """批量模拟，返回耗时（秒）"""
+    simulator.reset_legendary_records()
+    start = time.perf_counter()
+    simulator.simulate_packs(set_id, packs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='卡包模拟性能对比')
+    parser.add_argument('--set', dest='set_id', help='扩展包ID，默认使用第一个已加载的扩展包')
+    parser.add_argument('--packs', type=int, default=1_000_000, help='批量模拟的卡包数量')
+    parser.add_argument('--loop-packs', type=int, default=20_000,
+                        help='逐包模拟的卡包数量（结果按比例换算到 --packs）')
+    args = parser.parse_args()
+
+    card_manager = CardDataManager()
+    card_manager.load_card_data()
+    simulator = PackSimulator(card_manager)
+    set_id = args.set_id or next(iter(card_manager.cards_by_set))
+
+    loop_seconds = bench_loop(simulator, set_id, args.loop_packs)
+    loop_estimate = loop_seconds / args.loop_packs * args.packs
+    batch_seconds = bench_batch(simulator, set_id, args.packs)
+
+    print(f"扩展包: {set_id}")
+    print(f"逐包模拟: {args.loop_packs} 包耗时 {loop_seconds:.2f}s，"
+          f"换算 {args.packs} 包约 {loop_estimate:.2f}s")
+    print(f"批量模拟: {args.packs} 包耗时 {batch_seconds:.2f}s")
+    print(f"加速比: {loop_estimate / batch_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试抽卡报告汇总阶段（计数 + 按职业关联卡牌信息）随抽到卡牌数量的扩展性
+抽到的卡牌用卡牌表行号随机生成，计数使用 NumPy bincount，再交给 aggregate_cards_by_class
+需要在项目根目录下运行，并已准备好卡牌数据
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hearthstone_pack_simulator.simulator.simulator import CardDataManager
+from hearthstone_pack_simulator.report_generator import aggregate_cards_by_class
+
+
+def bench(card_manager, pulled, fixed_cards, rng):
+    """
+    汇总 pulled 张随机抽到的卡牌
+
+    Returns:
+        tuple: (计数耗时, 关联耗时, 汇总后的卡牌种类数)
+    """
+    card_table = card_manager.card_table
+    rows = rng.integers(0, len(card_table), size=pulled, dtype=np.int32)
+
+    start = time.perf_counter()
+    counts = np.bincount(rows, minlength=len(card_table))
+    count_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    card_counts = ((card_table.card(row), int(counts[row])) for row in np.flatnonzero(counts).tolist())
+    cards_by_class = aggregate_cards_by_class(card_counts, fixed_cards)
+    join_seconds = time.perf_counter() - start
+    return count_seconds, join_seconds, sum(len(cards) for cards in cards_by_class.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抽卡报告汇总性能测试')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10_000, 100_000, 1_000_000, 10_000_000], help='抽到的卡牌数量')
+    parser.add_argument('--no-core-event', action='store_true', help='不包含核心和活动卡')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+
+    card_manager = CardDataManager()
+    card_manager.load_card_data()
+    fixed_cards = []
+    if not args.no_core_event:
+        for set_id in ('CORE', 'EVENT'):
+            fixed_cards.extend((card, set_id) for card in card_manager.get_cards_by_set(set_id))
+
+    rng = np.random.default_rng(args.seed)
+    print(f"卡牌表: {len(card_manager.card_table)} 张卡牌，固定卡牌: {len(fixed_cards)} 张")
+    print(f"{'抽到卡牌数':>12} {'计数(s)':>10} {'关联(s)':>10} {'合计(s)':>10} {'每百万张(s)':>12} {'卡牌种类':>8}")
+    for pulled in args.sizes:
+        count_seconds, join_seconds, kinds = bench(card_manager, pulled, fixed_cards, rng)
+        total = count_seconds + join_seconds
+        print(f"{pulled:>12} {count_seconds:>10.4f} {join_seconds:>10.4f} {total:>10.4f} "
+              f"{total / pulled * 1_000_000:>12.4f} {kinds:>8}")
+
+
+if __name__ == '__main__':
+    main()
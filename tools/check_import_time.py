@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+检查核心模块（卡牌数据、模拟器、卡组代码解析、报告统计）的冷启动导入时间
+在全新的子进程中导入核心模块，确认没有加载 Qt / pandas，并且导入耗时不超过预算
+需要在项目根目录下运行，超出预算或加载了界面依赖时返回非0退出码
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 核心模块：批量模拟进程和服务端只应导入这些模块
+CORE_MODULES = [
+    'config',
+    'utils',
+    'card_store',
+    'card_repository',
+    'card_pool',
+    'hearthstone_pack_simulator.simulator',
+    'hearthstone_pack_simulator.report_generator',
+    'deck_builder.deckstring_parser',
+    'deck_builder.search_index',
+    'deck_builder.card_filter',
+]
+
+# 核心模块不允许加载的依赖
+FORBIDDEN_PREFIXES = ('PyQt5', 'pandas')
+
+DEFAULT_BUDGET = 0.5  # 秒
+
+# 在子进程中执行，输出导入耗时和已加载的禁用模块
+PROBE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+loaded = sorted(m for m in sys.modules if m.split('.')[0] in {forbidden!r})
+print(json.dumps({{'elapsed': elapsed, 'forbidden': loaded}}))
+"""
+
+
+def measure(modules, repeat):
+    """
+    在全新子进程中测量导入时间
+
+    Args:
+        modules: 要导入的模块列表
+        repeat: 测量次数（取最小值，减少系统抖动的影响）
+
+    Returns:
+        tuple: (最短耗时（秒）, 被加载的禁用模块列表)
+    """
+    script = PROBE_SCRIPT.format(modules=list(modules), forbidden=list(FORBIDDEN_PREFIXES))
+    best = None
+    forbidden = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        best = result['elapsed'] if best is None else min(best, result['elapsed'])
+        forbidden = result['forbidden']
+    return best, forbidden
+
+
+def main():
+    parser = argparse.ArgumentParser(description='核心模块导入时间检查')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help='导入时间预算（秒）')
+    parser.add_argument('--repeat', type=int, default=3, help='测量次数')
+    args = parser.parse_args()
+
+    elapsed, forbidden = measure(CORE_MODULES, max(1, args.repeat))
+    print(f"核心模块: {', '.join(CORE_MODULES)}")
+    print(f"冷启动导入耗时: {elapsed * 1000:.1f}ms（预算 {args.budget * 1000:.0f}ms）")
+
+    failed = False
+    if forbidden:
+        print(f"错误: 核心模块加载了界面依赖: {', '.join(forbidden)}")
+        failed = True
+    if elapsed > args.budget:
+        print("错误: 导入时间超出预算")
+        failed = True
+    if not failed:
+        print("检查通过")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
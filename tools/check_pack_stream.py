@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+检查卡包流（PackStream.run）按 pack_counts 的每一项开包
+同一扩展包在列表中出现多次时每一项都要完整模拟；中途中断后从检查点继续，结果包数与一次跑完相同；
+运行前就已请求停止的卡包流不开启任何卡包
+需要在项目根目录下运行，并已下载卡牌数据，检查失败时返回非0退出码
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hearthstone_pack_simulator.simulator.simulator import CardDataManager, PackSimulator
+from hearthstone_pack_simulator.simulator.stream import PackStream, RarityCounter
+
+BATCH_SIZE = 16
+
+
+class _Interrupted(Exception):
+    """模拟中途崩溃"""
+
+
+class _FailAfter(RarityCounter):
+    """计数的同时在开启 limit 包后抛出异常，模拟中途崩溃"""
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+
+    def consume(self, batch):
+        super().consume(batch)
+        if self.packs >= self.limit:
+            raise _Interrupted()
+
+
+def check_duplicate_sets(card_manager, pack_counts):
+    """同一扩展包出现多次时，每一项的卡包都被开启"""
+    stream = PackStream(PackSimulator(card_manager), batch_size=BATCH_SIZE)
+    counter = stream.subscribe(RarityCounter())
+    done = stream.run(pack_counts)
+    expected = sum(n for _, n in pack_counts)
+    return done == expected and counter.packs == expected and int(counter.totals.sum()) == expected * 5
+
+
+def check_resume(card_manager, pack_counts):
+    """中途中断后从检查点继续，两次合计的包数与设置一致"""
+    expected = sum(n for _, n in pack_counts)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        checkpoint_path = os.path.join(temp_dir, "stream.checkpoint.json")
+        # 在第二次出现的扩展包中途中断（每批都保存检查点）
+        stream = PackStream(PackSimulator(card_manager), batch_size=BATCH_SIZE)
+        stream.subscribe(_FailAfter(expected - pack_counts[-1][1] // 2))
+        try:
+            stream.run(pack_counts, checkpoint_path=checkpoint_path, checkpoint_interval=BATCH_SIZE)
+            return False
+        except _Interrupted:
+            pass
+        if not os.path.exists(checkpoint_path):
+            return False
+
+        stream = PackStream(PackSimulator(card_manager), batch_size=BATCH_SIZE)
+        counter = stream.subscribe(RarityCounter())
+        done = stream.run(pack_counts, checkpoint_path=checkpoint_path)
+        return done == expected and counter.packs == expected and not os.path.exists(checkpoint_path)
+
+
+def check_stop_before_run(card_manager, pack_counts):
+    """run 开始前请求的停止不会被清除"""
+    stream = PackStream(PackSimulator(card_manager), batch_size=BATCH_SIZE)
+    counter = stream.subscribe(RarityCounter())
+    stream.stop()
+    return stream.run(pack_counts) == 0 and counter.packs == 0
+
+
+def main():
+    card_manager = CardDataManager()
+    with contextlib.redirect_stdout(io.StringIO()):
+        card_manager.load_card_data()
+    set_ids = list(card_manager.cards_by_set)
+    if len(set_ids) < 2:
+        print("错误: 至少需要两个扩展包的卡牌数据")
+        return 1
+    pack_counts = [(set_ids[0], 100), (set_ids[1], 10), (set_ids[0], 50)]
+    print(f"卡包设置: {pack_counts}")
+
+    checks = [
+        ("同一扩展包出现多次", check_duplicate_sets),
+        ("中断后从检查点继续", check_resume),
+        ("运行前请求停止", check_stop_before_run),
+    ]
+    failed = False
+    for name, check in checks:
+        with contextlib.redirect_stdout(io.StringIO()):
+            passed = check(card_manager, pack_counts)
+        print(f"{name}: {'通过' if passed else '失败'}")
+        failed = failed or not passed
+    if not failed:
+        print("检查通过")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,14 @@
+"""
+依赖 Qt 的界面公共组件
+
+config.py 和 utils.py 不导入 Qt，以便模拟器、卡组代码解析等核心模块可以在无界面环境中快速导入；
+需要 Qt 对象的常量和控件放在这里。
+"""
+
+from PyQt5.QtGui import QColor
+
+from config import PLOT_COLORS
+
+# 稀有度颜色设置 - Qt颜色
+RARITY_COLORS = {rarity: QColor(color) for rarity, color in PLOT_COLORS.items()}
+
@@ -1,6 +1,3 @@
-from PyQt5.QtWidgets import QTableWidgetItem
-from PyQt5.QtCore import Qt
-
 def write_varint(data, value):
     """
     将整数编码为 varint 并添加到字节数组中
@@ -21,16 +18,6 @@ def write_varint(data, value):
         if not value:
             break
 
-class NumericTableWidgetItem(QTableWidgetItem):
-    """自定义 TableWidgetItem 用于数字排序"""
-    def __lt__(self, other):
-        try:
-            # 尝试将文本转换为浮点数进行比较
-            return float(self.text()) < float(other.text())
-        except ValueError:
-            # 如果转换失败（例如文本不是数字），则按字符串比较
-            return super().__lt__(other)
-
 def normalize_card_name(name):
     """规范化卡牌名称，用于模糊匹配"""
     import re